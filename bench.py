@@ -0,0 +1,533 @@
+"""
+트래커 구성 요소 벤치마크 (Qt 없이 실행)
+
+사용 예:
+    python bench.py registration --map "C:/path/minimap.png" --frames 50
+    python bench.py registration            # 맵을 지정하지 않으면 합성 무늬 맵 사용
+    python bench.py features --map minimap.png --frames-dir recorded_frames/
+    python bench.py prune --map minimap.png --frames-dir recorded_frames/
+    python bench.py storage --map minimap.png --pca-dims 64,32
+    python bench.py synth --map minimap.png --sprite char.png --out synthetic/walk
+    python bench.py tracker --map minimap.png --sprite char.png --configs default,baseline --scales 1.0,0.8
+    python bench.py tracker --map minimap.png --sprite char.png --input synthetic/walk
+"""
+import argparse
+import glob
+import io
+import os
+import shutil
+import tempfile
+import time
+import cv2
+import numpy as np
+from src.features import (FLANN_INDEX_KDTREE, FEATURE_ENGINES, FeatureEngine, DescriptorPCA, keypoints_to_array,
+                          build_index, knn_match, ratio_test, compact_descriptors)
+from src.registration import REGISTRATION_MODELS, estimate_transform
+from src.pruning import train_keypoint_usage
+from src.engine import TrackerEngine
+from src.recording import SessionReader
+from src.synthetic import textured_map, default_sprite, generate_sequence, write_sequence, load_ground_truth
+from src.template_match import load_template
+from src.utils import calculate_relative_coordinates
+
+# 트래커 벤치마크 구성: 이름 -> 기본값에서 바꿀 TrackerEngine 속성 ('feature_engine'은 (검출기, 매처))
+TRACKER_CONFIGS = {
+    'default': {},
+    'baseline': {'homography_lock': False, 'fast_engine': None, 'roi_search': False, 'scale_lock': False,
+                 'sticky_map': False, 'motion_model': False, 'match_workers': 1, 'frame_gate': False},
+    'no-gate': {'frame_gate': False},
+    'no-lock': {'homography_lock': False},
+    'no-fast': {'fast_engine': None},
+    'no-roi': {'roi_search': False, 'scale_lock': False},
+    'ema': {'motion_model': False},
+    'serial': {'match_workers': 1},
+    'orb': {'feature_engine': ('orb', 'lsh'), 'fast_engine': None},
+    'pca64': {'descriptor_pca_dims': 64},
+}
+
+
+def load_gray(path):
+    """한글 경로도 읽을 수 있도록 np.fromfile + imdecode 사용"""
+    img = cv2.imdecode(np.fromfile(path, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        raise SystemExit(f"Failed to load image: {path}")
+    return img
+
+
+def synthesize_view(map_gray, scale, offset, noise, rng, margin=20):
+    """
+    맵을 scale배 축소/확대하여 offset 위치에 그린 가상 화면과 정답 변환을 만듭니다.
+
+    Returns:
+        tuple: (screen_gray, H_gt) H_gt는 맵 -> 화면 3x3 변환.
+    """
+    h, w = map_gray.shape[:2]
+    H_gt = np.array([[scale, 0, offset[0]], [0, scale, offset[1]], [0, 0, 1]], dtype=np.float64)
+    size = (int(w * scale + offset[0] + margin), int(h * scale + offset[1] + margin))
+    screen = cv2.warpAffine(map_gray, H_gt[:2], size, flags=cv2.INTER_LINEAR, borderValue=0)
+    if noise > 0:
+        screen = np.clip(screen + rng.normal(0, noise, screen.shape), 0, 255).astype(np.uint8)
+    return screen, H_gt
+
+
+def synthetic_frames(map_gray, count, scale, noise, rng):
+    """무작위 오프셋의 합성 미니맵 프레임과 정답 변환 목록"""
+    frames, truths = [], []
+    for _ in range(count):
+        offset = (float(rng.uniform(0, 30)), float(rng.uniform(0, 30)))
+        screen, H_gt = synthesize_view(map_gray, scale, offset, noise, rng)
+        frames.append(screen)
+        truths.append(H_gt)
+    return frames, truths
+
+
+def corner_error(H, H_gt, w, h):
+    """추정/정답 변환으로 옮긴 맵 코너 4개의 평균 거리 (px)"""
+    pts = np.float32([[0, 0], [0, h - 1], [w - 1, h - 1], [w - 1, 0]]).reshape(-1, 1, 2)
+    est = cv2.perspectiveTransform(pts, H).reshape(-1, 2)
+    gt = cv2.perspectiveTransform(pts, H_gt).reshape(-1, 2)
+    return float(np.mean(np.linalg.norm(est - gt, axis=1)))
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else float('nan')
+
+
+def bench_registration(args):
+    """정합 모델별 추정 시간과 정확도 비교"""
+    map_gray = load_gray(args.map) if args.map else textured_map()
+    h, w = map_gray.shape[:2]
+    rng = np.random.default_rng(args.seed)
+
+    sift = cv2.SIFT_create(nfeatures=args.nfeatures)
+    kp_m, des_m = sift.detectAndCompute(map_gray, None)
+    des_m = des_m.astype(np.float32)
+    pts_m = keypoints_to_array(kp_m)
+    index = build_index(des_m, dict(algorithm=FLANN_INDEX_KDTREE, trees=5))
+
+    # 프레임마다 한 번만 검출/매칭하고, 같은 대응점으로 모든 모델을 비교
+    times = {m: [] for m in REGISTRATION_MODELS}
+    errors = {m: [] for m in REGISTRATION_MODELS}
+    match_counts = []
+    for _ in range(args.frames):
+        scale = 1.0 if args.scale_jitter == 0 else float(rng.uniform(1 - args.scale_jitter, 1 + args.scale_jitter))
+        offset = (float(rng.uniform(0, 30)), float(rng.uniform(0, 30)))
+        screen, H_gt = synthesize_view(map_gray, scale, offset, args.noise, rng)
+
+        kp_s, des_s = sift.detectAndCompute(screen, None)
+        if des_s is None:
+            continue
+        indices, dists = knn_match(index, des_s.astype(np.float32))
+        query_idx, train_idx = ratio_test(indices, dists)
+        match_counts.append(len(query_idx))
+        src_pts = pts_m[train_idx].reshape(-1, 1, 2)
+        dst_pts = keypoints_to_array(kp_s)[query_idx].reshape(-1, 1, 2)
+
+        for model in REGISTRATION_MODELS:
+            t0 = time.perf_counter()
+            H, _ = estimate_transform(model, src_pts, dst_pts)
+            times[model].append((time.perf_counter() - t0) * 1000)
+            if H is not None:
+                errors[model].append(corner_error(H, H_gt, w, h))
+
+    print(f"map {w}x{h}, {len(kp_m)} features, {args.frames} frames, "
+          f"scale jitter ±{args.scale_jitter}, noise {args.noise}, median matches {percentile(match_counts, 50):.0f}")
+    print(f"{'model':<12} {'ok':>6} {'ms p50':>8} {'ms p99':>8} {'err p50':>8} {'err p99':>8}")
+    for model in REGISTRATION_MODELS:
+        ok = len(errors[model]) / max(1, len(times[model])) * 100
+        print(f"{model:<12} {ok:5.0f}% {percentile(times[model], 50):8.3f} {percentile(times[model], 99):8.3f} "
+              f"{percentile(errors[model], 50):8.2f} {percentile(errors[model], 99):8.2f}")
+
+
+def load_frames(frames_dir):
+    """녹화 프레임 폴더의 이미지들을 이름순으로 그레이스케일로 읽기"""
+    paths = sorted(p for ext in ('png', 'jpg', 'bmp') for p in glob.glob(os.path.join(frames_dir, f"*.{ext}")))
+    if not paths:
+        raise SystemExit(f"No frames found in {frames_dir}")
+    return [load_gray(p) for p in paths]
+
+
+def register(engine, index, pts_m, gray, min_matches=10):
+    """엔진으로 한 프레임을 정합: (H, 검출 ms, 매칭 ms). 실패하면 H는 None"""
+    t0 = time.perf_counter()
+    kp_s, des_s = engine.detect(gray)
+    t1 = time.perf_counter()
+    if des_s is None or len(kp_s) < 4:
+        return None, (t1 - t0) * 1000, 0.0
+    query_idx, train_idx = engine.match(index, des_s)
+    t2 = time.perf_counter()
+    if len(query_idx) < min_matches:
+        return None, (t1 - t0) * 1000, (t2 - t1) * 1000
+    H, _ = estimate_transform('homography', pts_m[train_idx].reshape(-1, 1, 2),
+                              keypoints_to_array(kp_s)[query_idx].reshape(-1, 1, 2))
+    return H, (t1 - t0) * 1000, (t2 - t1) * 1000
+
+
+def bench_features(args):
+    """특징점 엔진(검출기/매처)별 검출 시간, 매칭 시간, 위치 오차 비교"""
+    map_gray = load_gray(args.map) if args.map else textured_map()
+    h, w = map_gray.shape[:2]
+    rng = np.random.default_rng(args.seed)
+
+    # 평가 프레임과 정답 변환 준비
+    if args.frames_dir:
+        # 녹화 프레임은 정답이 없으므로 기준 엔진(SIFT/KD-tree) 결과를 정답으로 사용
+        frames = load_frames(args.frames_dir)
+        reference = FeatureEngine('sift', nfeatures=args.nfeatures)
+        kp_r, des_r = reference.detect(map_gray)
+        ref_index = reference.build_index(des_r)
+        ref_pts = keypoints_to_array(kp_r)
+        truths = [register(reference, ref_index, ref_pts, f)[0] for f in frames]
+        print(f"{len(frames)} recorded frames, error measured against sift/kdtree")
+    else:
+        frames, truths = synthetic_frames(map_gray, args.frames, args.scale, args.noise, rng)
+        print(f"{len(frames)} synthetic frames, scale {args.scale}, noise {args.noise}")
+
+    print(f"{'engine':<14} {'map kp':>7} {'ok':>6} {'det ms':>8} {'match ms':>9} {'err p50':>8} {'err p99':>8}")
+    for spec in args.engines.split(','):
+        detector, _, matcher = spec.strip().partition('/')
+        try:
+            engine = FeatureEngine(detector, matcher or None, nfeatures=args.nfeatures)
+            kp_m, des_m = engine.detect(map_gray)
+        except ValueError as e:
+            print(f"{spec:<14} skipped: {e}")
+            continue
+        if des_m is None:
+            print(f"{spec:<14} skipped: no features on map")
+            continue
+        index = engine.build_index(des_m)
+        pts_m = keypoints_to_array(kp_m)
+
+        det_ms, match_ms, errors, total = [], [], [], 0
+        for gray, H_gt in zip(frames, truths):
+            if H_gt is None:
+                continue
+            total += 1
+            H, t_det, t_match = register(engine, index, pts_m, gray)
+            det_ms.append(t_det)
+            match_ms.append(t_match)
+            if H is not None:
+                errors.append(corner_error(H, H_gt, w, h))
+
+        ok = len(errors) / max(1, total) * 100
+        print(f"{engine.name:<14} {len(kp_m):7d} {ok:5.0f}% {percentile(det_ms, 50):8.2f} "
+              f"{percentile(match_ms, 50):9.2f} {percentile(errors, 50):8.2f} {percentile(errors, 99):8.2f}")
+
+
+def bench_prune(args):
+    """키포인트 가지치기 전/후 맵 모델의 매칭 시간과 정확도 비교"""
+    map_gray = load_gray(args.map) if args.map else textured_map()
+    h, w = map_gray.shape[:2]
+    rng = np.random.default_rng(args.seed)
+    engine = FeatureEngine(args.engine, nfeatures=args.nfeatures)
+    kp_m, des_m = engine.detect(map_gray)
+    if des_m is None:
+        raise SystemExit("No features on map")
+    pts_m = keypoints_to_array(kp_m)
+    index = engine.build_index(des_m)
+
+    # 학습 프레임과 평가 프레임을 나눠서 과적합 여부도 확인
+    if args.frames_dir:
+        frames = load_frames(args.frames_dir)
+        split = max(1, len(frames) // 2)
+        train, evaluate = frames[:split], frames[split:] or frames
+        truths = [register(engine, index, pts_m, f)[0] for f in evaluate]
+        print(f"{len(train)} train / {len(evaluate)} eval recorded frames, error measured against the full model")
+    else:
+        train, _ = synthetic_frames(map_gray, args.frames, args.scale, args.noise, rng)
+        evaluate, truths = synthetic_frames(map_gray, args.frames, args.scale, args.noise, rng)
+        print(f"{len(train)} train / {len(evaluate)} eval synthetic frames, scale {args.scale}, noise {args.noise}")
+
+    usage = train_keypoint_usage(engine, pts_m, index, train)
+    keep = usage.select(args.min_hits, args.min_hit_ratio, args.min_keep)
+    models = {
+        'full': (pts_m, index, len(kp_m)),
+        'pruned': (pts_m[keep], engine.build_index(np.ascontiguousarray(des_m[keep])), len(keep)),
+    }
+
+    print(f"{'model':<8} {'map kp':>7} {'ok':>6} {'match ms':>9} {'err p50':>8} {'err p99':>8}")
+    for name, (pts, model_index, n_kp) in models.items():
+        match_ms, errors, total = [], [], 0
+        for gray, H_gt in zip(evaluate, truths):
+            if H_gt is None:
+                continue
+            total += 1
+            H, _, t_match = register(engine, model_index, pts, gray)
+            match_ms.append(t_match)
+            if H is not None:
+                errors.append(corner_error(H, H_gt, w, h))
+        ok = len(errors) / max(1, total) * 100
+        print(f"{name:<8} {n_kp:7d} {ok:5.0f}% {percentile(match_ms, 50):9.2f} "
+              f"{percentile(errors, 50):8.2f} {percentile(errors, 99):8.2f}")
+
+
+def npz_bytes(**arrays):
+    """압축 npz로 저장했을 때의 크기 (디스크 캐시 용량 추정)"""
+    buf = io.BytesIO()
+    np.savez_compressed(buf, **arrays)
+    return buf.tell()
+
+
+def bench_storage(args):
+    """맵 모델 저장 방식(float32 / uint8 / PCA)별 메모리, 캐시 크기, 재현율 비교"""
+    map_gray = load_gray(args.map) if args.map else textured_map()
+    h, w = map_gray.shape[:2]
+    rng = np.random.default_rng(args.seed)
+    engine = FeatureEngine('sift', nfeatures=args.nfeatures)
+    kp_m, des_m = engine.detect(map_gray)
+    if des_m is None:
+        raise SystemExit("No features on map")
+    pts_m = keypoints_to_array(kp_m)
+    frames, truths = synthetic_frames(map_gray, args.frames, args.scale, args.noise, rng)
+    screens = [engine.detect(f) for f in frames]
+
+    # (이름, 인덱스 디스크립터, 화면 디스크립터 투영 함수, 디스크 크기)
+    variants = [('float32', des_m, None, npz_bytes(pts=pts_m, des=des_m))]
+    des_u8 = compact_descriptors(des_m)
+    variants.append(('uint8', engine.prepare_descriptors(des_u8), None, npz_bytes(pts=pts_m, des=des_u8)))
+    for dims in (int(d) for d in args.pca_dims.split(',') if d.strip()):
+        pca = DescriptorPCA.fit(des_m, dims)
+        des_p = pca.project(des_m)
+        variants.append((f"pca{dims}", des_p, pca.project,
+                         npz_bytes(pts=pts_m, des=des_p.astype(np.float16), mean=pca.mean, components=pca.components)))
+
+    print(f"map {w}x{h}, {len(kp_m)} features, {len(frames)} synthetic frames, scale {args.scale}, noise {args.noise}")
+    print(f"{'model':<8} {'mem KB':>8} {'disk KB':>8} {'ok':>6} {'recall':>7} {'match ms':>9} {'err p50':>8}")
+    baseline_inliers = None
+    for name, des_index, project, disk in variants:
+        index = engine.build_index(des_index)
+        match_ms, errors, inliers = [], [], 0
+        for (kp_s, des_s), H_gt in zip(screens, truths):
+            if des_s is None:
+                continue
+            t0 = time.perf_counter()
+            query_idx, train_idx = engine.match(index, project(des_s) if project else des_s)
+            match_ms.append((time.perf_counter() - t0) * 1000)
+            H, mask = estimate_transform('homography', pts_m[train_idx].reshape(-1, 1, 2),
+                                         keypoints_to_array(kp_s)[query_idx].reshape(-1, 1, 2))
+            if H is not None:
+                inliers += int(mask.sum())
+                errors.append(corner_error(H, H_gt, w, h))
+        # 재현율: float32 모델 대비 RANSAC inlier 대응점 비율
+        baseline_inliers = baseline_inliers or max(1, inliers)
+        mem = (des_index.nbytes + pts_m.nbytes) / 1024
+        ok = len(errors) / max(1, len(frames)) * 100
+        print(f"{name:<8} {mem:8.1f} {disk / 1024:8.1f} {ok:5.0f}% {inliers / baseline_inliers:7.2f} "
+              f"{percentile(match_ms, 50):9.2f} {percentile(errors, 50):8.2f}")
+
+
+def load_bgr(path):
+    img = load_template(path)
+    if img is None:
+        raise SystemExit(f"Failed to load image: {path}")
+    return img
+
+
+def bench_inputs(args):
+    """(맵 BGR, 캐릭터 BGR) - 지정하지 않으면 합성 무늬 맵과 합성 마커"""
+    map_bgr = load_bgr(args.map[0]) if args.map else cv2.cvtColor(textured_map(args.seed), cv2.COLOR_GRAY2BGR)
+    sprite = load_template(args.sprite, cv2.IMREAD_UNCHANGED) if args.sprite else default_sprite()
+    if sprite is None:
+        raise SystemExit(f"Failed to load sprite: {args.sprite}")
+    return map_bgr, sprite
+
+
+def bench_synth(args):
+    """합성 미니맵 시퀀스를 녹화 형식 + ground_truth.json으로 저장"""
+    map_bgr, sprite = bench_inputs(args)
+    frames, truth = generate_sequence(map_bgr, sprite, args.frames, args.scale, (args.offset_x, args.offset_y),
+                                      args.noise, args.fps, args.speed, args.jump_prob, args.seed)
+    write_sequence(args.out, frames, truth, map_size=(map_bgr.shape[1], map_bgr.shape[0]))
+    print(f"{len(frames)} frames ({frames[0].shape[1]}x{frames[0].shape[0]}) -> {args.out}")
+
+
+def make_tracker_engine(config, map_paths, sprite_path):
+    """벤치마크 구성으로 엔진을 만들고 맵/캐릭터 로드 (맵 로드 시간은 측정에서 제외)"""
+    engine = TrackerEngine()
+    engine.use_feature_cache = False
+    engine.use_pruned_models = False
+    for key, value in config.items():
+        if key == 'feature_engine':
+            engine.set_feature_engine(*value)
+        elif key == 'match_workers':
+            engine.set_match_workers(value)
+        elif key == 'frame_gate':
+            engine.frame_gate.enabled = value
+        else:
+            setattr(engine, key, value)
+    for slot, path in enumerate(map_paths):
+        if not engine.set_map_source(slot, os.path.splitext(os.path.basename(path))[0], path):
+            raise SystemExit(f"Failed to load map: {path}")
+    engine.build_retrieval()
+    if not engine.set_template(sprite_path):
+        raise SystemExit(f"Failed to load sprite: {sprite_path}")
+    engine.replay = True  # 예측 기준 시각도 프레임 시각 (벽시계와 무관)
+    return engine
+
+
+def run_tracker(engine, frames, truth, map_w, map_h):
+    """프레임을 순서대로 처리하여 (처리 ms 목록, 위치 오차 목록(px), 찾은 프레임 수)"""
+    times, errors, found = [], [], 0
+    for frame, t in zip(frames, truth):
+        result = engine.process(frame, timestamp=t['timestamp'])
+        times.append(result['timings']['total'])
+        if result.get('relative') is None:
+            continue
+        found += 1
+        gt = calculate_relative_coordinates(map_w, map_h, *t['position'])
+        errors.append(float(np.hypot(result['relative'][0] - gt[0], result['relative'][1] - gt[1])))
+    return times, errors, found
+
+
+def bench_tracker(args):
+    """
+    합성(또는 저장된) 미니맵 시퀀스에 트래커 엔진 전체를 구성별로 실행하여
+    처리 속도(fps, p50/p99 ms)와 정답 대비 위치 오차를 비교
+    """
+    configs = [c.strip() for c in args.configs.split(',') if c.strip()]
+    for name in configs:
+        if name not in TRACKER_CONFIGS:
+            raise SystemExit(f"Unknown config '{name}' (choose from {', '.join(TRACKER_CONFIGS)})")
+
+    tmp = tempfile.mkdtemp()
+    try:
+        map_bgr, sprite = bench_inputs(args)
+        map_paths = list(args.map)
+        if not map_paths:
+            map_paths = [os.path.join(tmp, "map.png")]
+            cv2.imwrite(map_paths[0], map_bgr)
+        sprite_path = args.sprite
+        if not sprite_path:
+            sprite_path = os.path.join(tmp, "sprite.png")
+            cv2.imwrite(sprite_path, sprite)
+        map_h, map_w = map_bgr.shape[:2]
+
+        # (설명, 프레임, 정답) 시나리오: 저장된 시퀀스 또는 배율별 합성 시퀀스
+        scenarios = []
+        if args.input:
+            ground_truth = load_ground_truth(args.input)
+            # 오차는 녹화 당시 맵 크기 기준 (지정하지 않은 맵은 합성 맵이라 크기를 믿을 수 없음)
+            map_size = ground_truth.get('map_size')
+            if map_size is None:
+                if not args.map:
+                    raise SystemExit("ground_truth.json has no map_size; pass the recorded map with --map")
+            else:
+                if tuple(map_size) != (map_w, map_h):
+                    print(f"warning: map is {map_w}x{map_h} but the recording was made on "
+                          f"{map_size[0]}x{map_size[1]}; error is measured in recorded map coordinates")
+                map_w, map_h = map_size
+            reader = SessionReader(args.input)
+            frames = [cv2.cvtColor(f, cv2.COLOR_BGRA2BGR) for _, f, _ in reader.frames('region')]
+            scenarios.append((os.path.basename(os.path.normpath(args.input)), frames, ground_truth['frames']))
+        else:
+            for scale in (float(v) for v in args.scales.split(',') if v.strip()):
+                frames, truth = generate_sequence(map_bgr, sprite, args.frames, scale, (15, 10), args.noise,
+                                                  args.fps, args.speed, args.jump_prob, args.seed)
+                scenarios.append((f"x{scale:g}", frames, truth))
+
+        print(f"map {map_w}x{map_h}, {len(map_paths)} map(s), noise {args.noise}, speed {args.speed}px/s, "
+              f"jump prob {args.jump_prob}")
+        print(f"{'config':<10} {'scene':<8} {'fps':>7} {'ms p50':>7} {'ms p99':>7} {'found':>6} "
+              f"{'err p50':>8} {'err p99':>8} {'T/F/S/M':>14}")
+        for name in configs:
+            for scene, frames, truth in scenarios:
+                engine = make_tracker_engine(TRACKER_CONFIGS[name], map_paths, sprite_path)
+                try:
+                    times, errors, found = run_tracker(engine, frames, truth, map_w, map_h)
+                finally:
+                    engine.close()
+                tiers = engine.tier_counts
+                tier_info = f"{tiers['track']}/{tiers['fast']}/{tiers['full']}/{tiers['miss']}"
+                print(f"{name:<10} {scene:<8} {1000.0 * len(times) / max(1e-9, sum(times)):7.1f} "
+                      f"{percentile(times, 50):7.2f} {percentile(times, 99):7.2f} "
+                      f"{found / max(1, len(frames)) * 100:5.0f}% {percentile(errors, 50):8.2f} "
+                      f"{percentile(errors, 99):8.2f} {tier_info:>14}")
+    finally:
+        shutil.rmtree(tmp)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minimap tracker benchmarks")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('registration', help="compare translation / similarity / homography models")
+    p.add_argument('--map', help="map screenshot path (default: synthetic texture)")
+    p.add_argument('--frames', type=int, default=50)
+    p.add_argument('--nfeatures', type=int, default=3000)
+    p.add_argument('--scale-jitter', type=float, default=0.0, help="random scale range around 1.0")
+    p.add_argument('--noise', type=float, default=3.0, help="gaussian noise sigma")
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=bench_registration)
+
+    default_engines = ','.join(f"{d}/{m}" for d, matchers in FEATURE_ENGINES.items() for m in matchers)
+    p = sub.add_parser('features', help="compare feature detector / matcher engines")
+    p.add_argument('--map', help="map screenshot path (default: synthetic texture)")
+    p.add_argument('--frames-dir', help="folder of recorded minimap frames (default: synthetic frames)")
+    p.add_argument('--frames', type=int, default=30, help="number of synthetic frames")
+    p.add_argument('--engines', default=default_engines, help="comma separated detector/matcher list")
+    p.add_argument('--nfeatures', type=int, default=3000)
+    p.add_argument('--scale', type=float, default=1.0, help="synthetic minimap scale")
+    p.add_argument('--noise', type=float, default=3.0, help="gaussian noise sigma")
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=bench_features)
+
+    p = sub.add_parser('prune', help="compare a full map model with a keypoint-pruned one")
+    p.add_argument('--map', help="map screenshot path (default: synthetic texture)")
+    p.add_argument('--frames-dir', help="folder of recorded minimap frames, first half trains (default: synthetic)")
+    p.add_argument('--frames', type=int, default=40, help="number of synthetic train / eval frames")
+    p.add_argument('--engine', default='sift', choices=sorted(FEATURE_ENGINES))
+    p.add_argument('--nfeatures', type=int, default=3000)
+    p.add_argument('--min-hits', type=int, default=2)
+    p.add_argument('--min-hit-ratio', type=float, default=0.05)
+    p.add_argument('--min-keep', type=int, default=200)
+    p.add_argument('--scale', type=float, default=1.0, help="synthetic minimap scale")
+    p.add_argument('--noise', type=float, default=3.0, help="gaussian noise sigma")
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=bench_prune)
+
+    p = sub.add_parser('storage', help="compare float32 / uint8 / PCA map descriptor storage")
+    p.add_argument('--map', help="map screenshot path (default: synthetic texture)")
+    p.add_argument('--frames', type=int, default=30, help="number of synthetic frames")
+    p.add_argument('--nfeatures', type=int, default=3000)
+    p.add_argument('--pca-dims', default='64,32', help="comma separated PCA dimensions")
+    p.add_argument('--scale', type=float, default=1.0, help="synthetic minimap scale")
+    p.add_argument('--noise', type=float, default=3.0, help="gaussian noise sigma")
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=bench_storage)
+
+    p = sub.add_parser('synth', help="write a synthetic minimap sequence with ground truth")
+    p.add_argument('--map', action='append', default=[], help="map screenshot path (default: synthetic texture)")
+    p.add_argument('--sprite', help="character image (default: synthetic marker)")
+    p.add_argument('--out', required=True, help="output folder (session recording + ground_truth.json)")
+    p.add_argument('--frames', type=int, default=120)
+    p.add_argument('--scale', type=float, default=1.0, help="minimap scale")
+    p.add_argument('--offset-x', type=float, default=15.0)
+    p.add_argument('--offset-y', type=float, default=10.0)
+    p.add_argument('--noise', type=float, default=2.0, help="gaussian noise sigma")
+    p.add_argument('--fps', type=float, default=30.0)
+    p.add_argument('--speed', type=float, default=60.0, help="walking speed in map px/s")
+    p.add_argument('--jump-prob', type=float, default=0.0, help="per-frame teleport probability")
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=bench_synth)
+
+    p = sub.add_parser('tracker', help="run the full tracker engine per configuration against ground truth")
+    p.add_argument('--map', action='append', default=[],
+                   help="map screenshot path, repeatable; frames use the first (default: synthetic texture)")
+    p.add_argument('--sprite', help="character image (default: synthetic marker)")
+    p.add_argument('--input', help="sequence folder written by 'synth' (default: generate per scale)")
+    p.add_argument('--configs', default='default,no-gate,baseline', help=f"comma separated: {','.join(TRACKER_CONFIGS)}")
+    p.add_argument('--frames', type=int, default=120)
+    p.add_argument('--scales', default='1.0', help="comma separated minimap scales")
+    p.add_argument('--noise', type=float, default=2.0, help="gaussian noise sigma")
+    p.add_argument('--fps', type=float, default=30.0)
+    p.add_argument('--speed', type=float, default=60.0, help="walking speed in map px/s")
+    p.add_argument('--jump-prob', type=float, default=0.0, help="per-frame teleport probability")
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=bench_tracker)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import cv2
+import numpy as np
+
+
+def hsv_range_from_config(config):
+    """
+    config.json의 color_blob 설정({'hue': [low, high] 또는 [[low, high], ...], 'saturation': [low, high],
+    'value': [low, high]})에서 지정한 HSV 범위만 골라 from_template의 hsv_range 형식으로 (없으면 None)
+    """
+    hsv_range = {}
+    hue = config.get('hue')
+    if hue:
+        if isinstance(hue[0], (int, float)):
+            hue = [hue]
+        hsv_range['hue'] = [(int(low), int(high)) for low, high in hue]
+    for key in ('saturation', 'value'):
+        if config.get(key):
+            low, high = config[key]
+            hsv_range[key] = (int(low), int(high))
+    return hsv_range or None
+
+
+class ColorBlobDetector:
+    """
+    미니맵 플레이어 마커처럼 색이 뚜렷한 작은 점을 HSV 색 범위로 찾는 검출기.
+
+    캐릭터 템플릿에서 채도/명도가 높은 '마커 픽셀'의 HSV 분포로 색 범위를 정하고,
+    검색 영역을 inRange로 이진화한 뒤 연결 요소 중 크기가 맞는 덩어리를 찾습니다.
+    후보가 정확히 하나일 때만 결과를 돌려주고, 없거나 여러 개(모호함)면 None을 반환하여
+    호출자가 템플릿 매칭으로 대체하도록 합니다.
+    """
+
+    def __init__(self, hue_ranges, sat_range, val_range, marker_area, center_offset,
+                 area_ratio=(0.25, 4.0)):
+        self.hue_ranges = hue_ranges  # [(h_low, h_high)] 빨강처럼 0/180을 넘나들면 두 구간
+        self.sat_range = sat_range
+        self.val_range = val_range
+        self.marker_area = marker_area  # 템플릿 안 마커 픽셀 수
+        self.center_offset = center_offset  # 마커 무게중심 -> 템플릿 중심 (dx, dy)
+        self.area_ratio = area_ratio
+
+    @classmethod
+    def from_template(cls, template_bgr, min_saturation=80, min_value=80, hue_margin=8, min_pixels=4,
+                      hsv_range=None):
+        """
+        템플릿에서 색 범위를 추정합니다. 색이 뚜렷한 픽셀이 너무 적으면 None.
+
+        hsv_range = {'hue': [(low, high), ...], 'saturation': (low, high), 'value': (low, high)}를 주면
+        추정 대신 그 범위를 쓰고 (없는 항목은 추정값), 마커 픽셀도 그 범위 안의 템플릿 픽셀로 정합니다.
+        """
+        if hsv_range:
+            return cls._from_range(template_bgr, hsv_range, min_saturation, min_value, hue_margin, min_pixels)
+
+        hsv = cv2.cvtColor(template_bgr, cv2.COLOR_BGR2HSV)
+        hue = hsv[:, :, 0].astype(np.float32)
+        sat = hsv[:, :, 1]
+        val = hsv[:, :, 2]
+        marker = (sat >= min_saturation) & (val >= min_value)
+        if np.count_nonzero(marker) < min_pixels:
+            return None
+
+        # 색상(Hue)은 원형(0~179)이므로 원형 평균을 기준으로 퍼짐을 계산
+        angles = hue[marker] * (np.pi / 90.0)
+        mean_angle = np.arctan2(np.sin(angles).mean(), np.cos(angles).mean())
+        center = (mean_angle * 90.0 / np.pi) % 180.0
+        deltas = (hue[marker] - center + 90.0) % 180.0 - 90.0
+        low = center + np.percentile(deltas, 5) - hue_margin
+        high = center + np.percentile(deltas, 95) + hue_margin
+
+        if high - low >= 180:
+            hue_ranges = [(0, 179)]
+        elif low < 0:
+            hue_ranges = [(0, int(high)), (int(180 + low), 179)]
+        elif high > 179:
+            hue_ranges = [(int(low), 179), (0, int(high - 180))]
+        else:
+            hue_ranges = [(int(low), int(high))]
+
+        sat_low = max(min_saturation, int(np.percentile(sat[marker], 5)) - 30)
+        val_low = max(min_value, int(np.percentile(val[marker], 5)) - 30)
+
+        ys, xs = np.nonzero(marker)
+        th, tw = template_bgr.shape[:2]
+        center_offset = (tw / 2.0 - xs.mean(), th / 2.0 - ys.mean())
+        return cls(hue_ranges, (sat_low, 255), (val_low, 255), int(len(xs)), center_offset)
+
+    @classmethod
+    def _from_range(cls, template_bgr, hsv_range, min_saturation, min_value, hue_margin, min_pixels):
+        """지정한 HSV 범위로 검출기 생성 (범위 안의 템플릿 픽셀이 너무 적으면 None)"""
+        estimated = cls.from_template(template_bgr, min_saturation, min_value, hue_margin, min_pixels)
+        hue = hsv_range.get('hue') or (estimated.hue_ranges if estimated else [(0, 179)])
+        sat = hsv_range.get('saturation') or (estimated.sat_range if estimated else (min_saturation, 255))
+        val = hsv_range.get('value') or (estimated.val_range if estimated else (min_value, 255))
+        detector = cls([tuple(int(v) for v in r) for r in hue], tuple(int(v) for v in sat),
+                       tuple(int(v) for v in val), 0, (0.0, 0.0))
+        ys, xs = np.nonzero(detector.mask(template_bgr))
+        if len(xs) < min_pixels:
+            return None
+        th, tw = template_bgr.shape[:2]
+        detector.marker_area = int(len(xs))
+        detector.center_offset = (tw / 2.0 - xs.mean(), th / 2.0 - ys.mean())
+        return detector
+
+    def mask(self, image_bgr):
+        hsv = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2HSV)
+        result = None
+        for h_low, h_high in self.hue_ranges:
+            part = cv2.inRange(hsv, (h_low, self.sat_range[0], self.val_range[0]),
+                               (h_high, self.sat_range[1], self.val_range[1]))
+            result = part if result is None else cv2.bitwise_or(result, part)
+        return result
+
+    def detect(self, image_bgr):
+        """
+        검색 영역에서 마커를 찾습니다.
+
+        Returns:
+            tuple: 템플릿 중심 기준 (x, y) 좌표. 후보가 없거나 여러 개면 None.
+        """
+        n, _, stats, centroids = cv2.connectedComponentsWithStats(self.mask(image_bgr), connectivity=8)
+        min_area = self.marker_area * self.area_ratio[0]
+        max_area = self.marker_area * self.area_ratio[1]
+
+        candidates = [i for i in range(1, n) if min_area <= stats[i, cv2.CC_STAT_AREA] <= max_area]
+        if len(candidates) != 1:
+            return None
+        cx, cy = centroids[candidates[0]]
+        return cx + self.center_offset[0], cy + self.center_offset[1]
@@ -0,0 +1,112 @@
+import time
+import cv2
+import numpy as np
+
+# create_grabber가 만들 프레임 소스 (None이면 mss 화면 캡처, 아니면 grabber()를 가진 녹화 재생 세션)
+_frame_source = None
+
+
+def set_frame_source(source):
+    """화면 캡처 대신 녹화(ReplaySession 등)를 읽도록 전환 (None이면 다시 mss)"""
+    global _frame_source
+    _frame_source = source
+
+
+def create_grabber():
+    """현재 프레임 소스의 새 캡처 객체 (트래커, find_image, detect_npc가 각자 하나씩 사용)"""
+    if _frame_source is None:
+        return FrameGrabber()
+    return _frame_source.grabber()
+
+
+class FrameGrabber:
+    """
+    할당 없는 화면 캡처 도우미.
+
+    mss 스크린샷의 원시 BGRA 버퍼를 np.frombuffer로 복사 없이 감싸고,
+    BGRA -> GRAY / BGRA -> BGR 변환을 미리 만들어 둔 출력 버퍼에 직접 씁니다 (cvtColor dst).
+    캡처 크기가 같으면 매 프레임 같은 버퍼를 재사용하므로 루프 안의 메모리 할당이 거의 없습니다.
+
+    주의: 반환된 배열은 다음 grab 호출 때 덮어써집니다. 프레임을 보관하려면 copy() 하세요.
+    mss 객체는 만든 스레드에서만 써야 하므로 첫 grab 때 호출한 스레드에서 생성합니다.
+    녹화 재생 소스(ReplayGrabber)는 녹화가 끝나면 grab 계열 메서드가 None을 반환합니다.
+    timer(StageTimer)를 지정하면 grab_bgr_gray가 캡처('grab')와 색 변환('convert') 시간을 기록합니다.
+    """
+
+    replay = False  # 녹화 재생 소스 여부 (timestamp가 녹화 시각)
+
+    def __init__(self, sct=None):
+        self.sct = sct
+        self._shot = None  # 현재 BGRA 뷰가 참조하는 스크린샷 (버퍼 수명 유지)
+        self.last_frame = None  # 마지막 grab의 BGRA 프레임
+        self.timestamp = None  # 마지막 grab 시각 (time.time 기준 초)
+        self._gray = None
+        self._bgr = None
+        self.timer = None
+
+    def _ensure_sct(self):
+        if self.sct is None:
+            import mss
+            self.sct = mss.mss()
+        return self.sct
+
+    @property
+    def monitor(self):
+        """주 모니터 영역 (mss monitors[1])"""
+        return self._ensure_sct().monitors[1]
+
+    @staticmethod
+    def _buffer(out, shape, dtype=np.uint8):
+        if out is None or out.shape != shape:
+            return np.empty(shape, dtype)
+        return out
+
+    def grab(self, rect=None):
+        """rect 영역(기본: 주 모니터)을 캡처하여 (h, w, 4) BGRA 뷰를 반환 (복사 없음)"""
+        shot = self._ensure_sct().grab(rect or self.monitor)
+        self.timestamp = time.time()
+        self._shot = shot
+        self.last_frame = np.frombuffer(shot.raw, np.uint8).reshape(shot.height, shot.width, 4)
+        return self.last_frame
+
+    def grab_gray(self, rect=None):
+        """캡처 후 BGRA -> GRAY 한 번 변환 (재사용 버퍼)"""
+        bgra = self.grab(rect)
+        if bgra is None:
+            return None
+        self._gray = self._buffer(self._gray, bgra.shape[:2])
+        return cv2.cvtColor(bgra, cv2.COLOR_BGRA2GRAY, dst=self._gray)
+
+    def grab_bgr(self, rect=None):
+        """캡처 후 BGRA -> BGR 한 번 변환 (재사용 버퍼)"""
+        bgra = self.grab(rect)
+        if bgra is None:
+            return None
+        self._bgr = self._buffer(self._bgr, bgra.shape[:2] + (3,))
+        return cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=self._bgr)
+
+    def grab_bgr_gray(self, rect=None):
+        """
+        캡처 후 (bgr, gray)를 반환합니다. 둘 다 원본 BGRA에서 바로 변환하므로
+        BGR을 거쳐 GRAY를 만드는 것보다 변환 단계가 짧고 중간 배열이 없습니다.
+        """
+        t0 = time.perf_counter_ns()
+        bgra = self.grab(rect)
+        if bgra is None:
+            return None
+        t1 = time.perf_counter_ns()
+        self._bgr = self._buffer(self._bgr, bgra.shape[:2] + (3,))
+        self._gray = self._buffer(self._gray, bgra.shape[:2])
+        cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=self._bgr)
+        cv2.cvtColor(bgra, cv2.COLOR_BGRA2GRAY, dst=self._gray)
+        if self.timer is not None:
+            self.timer.add('grab', t1 - t0)
+            self.timer.add('convert', time.perf_counter_ns() - t1)
+        return self._bgr, self._gray
+
+    def close(self):
+        self._shot = None
+        self.last_frame = None
+        if self.sct is not None:
+            self.sct.close()
+            self.sct = None
@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+
+
+def thumbnail(gray, width=64):
+    """비교용 축소 썸네일 (INTER_AREA 축소로 노이즈/압축 잡음을 평균내어 작은 흔들림에 둔감)"""
+    h, w = gray.shape[:2]
+    tw = max(1, min(width, w))
+    th = max(1, int(round(h * tw / float(w))))
+    return cv2.resize(gray, (tw, th), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+def mean_abs_diff(a, b):
+    """두 썸네일의 픽셀당 평균 절대 차이 (크기가 다르면 무한대)"""
+    if a is None or b is None or a.shape != b.shape:
+        return float('inf')
+    return float(np.mean(np.abs(a - b)))
+
+
+def cell_means(gray, cell=8):
+    """cell x cell 칸별 평균 밝기 (INTER_AREA 축소, 칸 하나가 캐릭터 마커 크기 정도)"""
+    h, w = gray.shape[:2]
+    size = (max(1, w // cell), max(1, h // cell))
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+def max_abs_diff(a, b):
+    """두 칸 평균 배열의 칸별 최대 절대 차이 (크기가 다르면 무한대)"""
+    if a is None or b is None or a.shape != b.shape:
+        return float('inf')
+    return float(np.max(np.abs(a - b)))
+
+
+class FrameChangeDetector:
+    """
+    화면 변화 여부를 판단합니다: 축소 썸네일의 평균 절대 차이(MAD, 전체 화면 변화)와
+    마커 크기 칸(cell_size px)별 평균 밝기의 최대 차이(국소 변화) 중 하나라도 임계값을 넘으면 변화로 봅니다.
+    전체 평균만 보면 미니맵 위에서 걷는 작은 캐릭터 마커는 평균을 거의 바꾸지 못하므로
+    (9x9 마커 이동 시 약 0.07), 이동한 마커가 걸친 칸의 차이로 잡아냅니다.
+
+    캐릭터가 NPC 앞에 서 있는 동안처럼 캡처 영역이 (거의) 그대로면
+    SIFT/매칭/호모그래피를 다시 할 필요 없이 직전 결과를 재사용할 수 있습니다.
+    비교 기준은 '마지막으로 실제 처리한 프레임'이므로, 아주 느린 변화가
+    쌓여도 언젠가는 임계값을 넘어 다시 처리됩니다.
+    """
+
+    def __init__(self, threshold=1.5, thumb_width=64, max_skip=40, cell_size=8, cell_threshold=6.0):
+        self.enabled = True
+        self.bypass = False  # True인 동안(내비게이션 이동 중 등)은 매 프레임 처리
+        self.threshold = threshold  # 썸네일 픽셀당 평균 밝기 차이 (0~255)
+        self.thumb_width = thumb_width
+        # 칸 평균 밝기 차이 임계값: 캡처 잡음은 칸 안에서 평균되어 작고, 마커가 한 칸에 조금만 걸쳐도 넘음
+        self.cell_size = cell_size
+        self.cell_threshold = cell_threshold
+        self.max_skip = max_skip  # 연속 스킵 상한 (0이면 무제한), 넘으면 강제로 한 번 처리
+        self.reference = None
+        self.reference_cells = None
+        self.consecutive_skips = 0
+        self.skipped_total = 0
+
+    def reset(self):
+        self.reference = None
+        self.reference_cells = None
+        self.consecutive_skips = 0
+
+    def is_changed(self, gray):
+        """
+        화면이 바뀌었으면 True를 반환하고 기준 프레임을 갱신합니다.
+        바뀌지 않았으면 False를 반환하고 스킵 횟수를 셉니다.
+        """
+        thumb = thumbnail(gray, self.thumb_width)
+        cells = cell_means(gray, self.cell_size)
+        if (not self.enabled or self.bypass
+                or (self.max_skip and self.consecutive_skips >= self.max_skip)
+                or mean_abs_diff(thumb, self.reference) > self.threshold
+                or max_abs_diff(cells, self.reference_cells) > self.cell_threshold):
+            self.reference = thumb
+            self.reference_cells = cells
+            self.consecutive_skips = 0
+            return True
+
+        self.consecutive_skips += 1
+        self.skipped_total += 1
+        return False
@@ -0,0 +1,1016 @@
+import os
+import time
+import cv2
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from src.utils import calculate_relative_coordinates
+from src.features import (FeatureEngine, DescriptorPCA, keypoints_to_array,
+                          feature_cache_key, feature_cache_path, save_features, load_features)
+from src.retrieval import MapRetrievalIndex
+from src.pruning import KeypointUsage, pruned_model_path
+from src.registration import REGISTRATION_MODELS, estimate_transform
+from src.template_match import TemplateMatcher, load_template
+from src.blob_detector import ColorBlobDetector
+from src.change_detector import FrameChangeDetector, thumbnail, mean_abs_diff
+from src.motion import ConstantVelocityKalman
+from src.profiling import StageTimer
+
+
+class TrackerEngine:
+    """
+    Qt 없는 미니맵 위치 추적 엔진: 화면 프레임 하나 -> 맵 인식 + 정합 + 캐릭터 위치.
+
+    맵/캐릭터 모델, 재정합 캐스케이드, Homography 잠금, 예측 ROI, 칼만 필터 등
+    프레임 사이에 이어지는 상태를 모두 가지고 있으며 process(frame)로 한 프레임씩 처리합니다.
+    캡처와 처리 주기, 시그널 전송은 호출자(TrackerWorker, tracker_cli.py, 검출 프로세스)가 담당하므로
+    Qt 이벤트 루프 없이 벤치마크/프로파일링하거나 다른 프로세스에서 실행할 수 있습니다.
+
+    Args:
+        on_status (callable): 상태 메시지(맵 로드, 맵 감지, 잠금 등)를 받을 함수 (없으면 무시).
+    """
+
+    def __init__(self, on_status=None):
+        self.on_status = on_status
+        self.template = None # Character template
+        self.template_path = None
+        self.template_scale_factors = (0.8, 0.9, 1.0, 1.1, 1.2)
+        self.template_scales = []  # 다중 스케일 템플릿 [(scale, TemplateMatcher)]
+        
+        # 특징점 엔진: 기본은 SIFT + FLANN KD-tree (ORB보다 정확함)
+        # 저사양 PC에서는 set_feature_engine('orb', 'lsh') 등 이진 디스크립터로 전환 가능
+        # 맵마다 인덱스를 한 번만 구축해 두고, 매 프레임에는 화면 특징점으로 질의만 한다.
+        self.feature_engine = FeatureEngine('sift', nfeatures=3000)
+        self.use_feature_cache = True  # 맵 특징점을 feature_cache/*.npz에 캐시
+        # 맵 디스크립터 PCA 차원 (None이면 원본 128차원). 맵이 많을 때 메모리/매칭 시간 절감용,
+        # 재현율은 bench.py storage로 확인. 이진 디스크립터(ORB 등)에는 적용되지 않음
+        self.descriptor_pca_dims = None
+        
+        # 재정합 캐스케이드: 1) 잠금된 변환 + 템플릿  2) 현재 맵에 빠른 이진 특징점
+        # 3) 최후 수단으로 전체 엔진(SIFT) + 모든 맵 검색. 단계별 처리 횟수는 tier_counts에 기록
+        self.fast_engine = FeatureEngine('orb', 'lsh', nfeatures=1000)  # None이면 2단계 생략
+        self.fast_min_matches = 20  # 빠른 단계 결과를 믿기 위한 최소 매칭 수
+        self.tier_counts = {'track': 0, 'fast': 0, 'full': 0, 'miss': 0}
+        
+        # 키포인트 가지치기: 학습 모드에서 맵 특징점별 RANSAC inlier 횟수를 기록하고,
+        # 자주 맞는 특징점만 남긴 모델을 feature_cache/*.pruned.npz로 저장 (이후 로드 시 우선 사용)
+        self.use_pruned_models = True
+        self.training = False
+        self.keypoint_usage = {}  # slot -> KeypointUsage
+        self.prune_min_frames = 30  # 이보다 적게 학습된 맵은 저장하지 않음
+        self.prune_min_hits = 2
+        self.prune_min_hit_ratio = 0.05  # 학습 프레임의 5% 이상에서 inlier였던 특징점만 유지
+        self.prune_min_keep = 200  # 최소 유지 특징점 수
+        
+        # Maps storage: { slot_index: {'name': str, 'path': str, 'pts': (N,2) float32, 'des': des, 'index': 엔진 인덱스,
+        #                              'pca': DescriptorPCA 또는 None, 'nfeatures': int, 'model_key': 캐시 키, 'pruned': bool, 'w': w, 'h': h} }
+        # 맵 이미지와 cv2.KeyPoint 객체는 보관하지 않음 (좌표 배열 + 디스크립터만 있으면 정합 가능)
+        self.maps = {}
+        
+        # Char matching threshold
+        self.char_threshold = 0.65  # 낮춘 임계값 (다중 스케일로 보완)
+        # Map matching params
+        self.min_match_count = 10  # SIFT는 더 정확하므로 임계값 상향
+        # 미니맵 정합 모델: 'translation' | 'similarity' | 'homography'
+        # 미니맵은 축 정렬된 균일 스케일 복사본이라 가벼운 모델로도 충분한 경우가 많음 (bench.py registration 참고)
+        self.registration_model = 'homography'
+        self.ransac_threshold = 5.0
+        
+        self.current_map_slot = None
+        self.last_matches = 0  # 마지막 전체 추정의 최고 매칭 수 (맵을 못 찾았을 때 보고용)
+        
+        # 현재 맵 우선 매칭 (sticky): 현재 맵만 먼저 매칭하고 여유 있게 통과하면 다른 맵은 건너뜀
+        self.sticky_map = True
+        self.sticky_margin = 2.0  # min_match_count * margin 이상이면 현재 맵으로 확정
+        self.map_verify_interval = 30  # N 프레임마다 전체 맵 재검사 (0이면 실패 시에만 재검사)
+        self.frames_since_full_scan = 0
+        
+        # 맵 검색 인덱스 (BoVW): 맵이 많을 때 전체 검사 대신 후보 top-k 맵만 정밀 매칭
+        self.use_retrieval = True
+        self.retrieval_top_k = 3  # 맵 수가 이보다 많을 때만 검색 단계 사용
+        self.retrieval = MapRetrievalIndex()
+        self.retrieval_dirty = False  # 맵 추가/삭제 후 인덱스 재구축 필요 여부
+        
+        # 화면 변화 감지: 캡처 영역이 그대로면 직전 결과 재사용 (SIFT 등 생략)
+        self.frame_gate = FrameChangeDetector()
+        
+        # 적응형 처리 주기: 내비게이션이 이동 중이면(위치 수요 높음) target_fps에 맞춰
+        # 측정한 처리 시간만큼 뺀 나머지만 쉬고, 대기 중에는 heartbeat_fps로 낮춰 CPU를 아낌
+        self.target_fps = 30
+        self.heartbeat_fps = 2
+        self.position_demand = False
+        self.last_result = None  # 마지막으로 찾은 (맵 이름, rel_x, rel_y)
+        
+        # Homography 잠금: 같은 맵 안에서는 H가 사실상 고정이므로,
+        # N 프레임 연속 안정되면 SIFT/매칭을 생략하고 템플릿 매칭만 수행
+        self.homography_lock = True
+        self.lock_after_frames = 5  # 연속 안정 프레임 수
+        self.lock_tolerance = 2.0  # 안정 판정용 맵 코너 이동 허용치 (px)
+        self.lock_verify_interval = 60  # 잠금 중 N 프레임마다 전체 추정으로 드리프트 검사 (0이면 끄기)
+        self.lock_change_threshold = 12.0  # 잠금 기준 썸네일과의 평균 차이가 이보다 크면 맵 변경으로 보고 해제
+        self.lock_miss_limit = 3  # 잠금 중 캐릭터를 연속으로 못 찾으면 해제
+        self.locked = False
+        self.lock_slot = None
+        self.lock_H = None
+        self.lock_corners = None
+        self.lock_reference = None
+        self.stable_frames = 0
+        self.frames_since_lock_check = 0
+        self.lock_misses = 0
+        
+        # 색 덩어리 빠른 경로: 템플릿에서 HSV 색 범위를 추정해 inRange + 연결 요소로 마커 검출
+        self.color_blob = False  # 선택 기능 (마커 색이 뚜렷한 경우에 켜기)
+        self.color_blob_hsv = None  # 직접 지정한 HSV 범위 {'hue', 'saturation', 'value'} (None이면 템플릿에서 추정)
+        self.blob_detector = None
+        
+        # 템플릿 스케일 고정: 세션 중 캐릭터 크기는 변하지 않으므로 이기는 스케일을 학습
+        self.scale_lock = True
+        self.scale_lock_after = 5  # 같은 스케일이 연속으로 이긴 횟수
+        self.locked_scale_idx = None  # template_scales 인덱스 (None이면 전체 스케일 탐색)
+        self.scale_streak_idx = None
+        self.scale_streak = 0
+        
+        # 예측 ROI 캐릭터 검색: 직전 위치 주변 창만 템플릿 매칭
+        self.roi_search = True
+        self.roi_radius = 30  # 투영된 직전 위치 주변 검색 반경 (px, 템플릿 크기 별도)
+        self.roi_miss_limit = 2  # ROI에서 연속으로 못 찾으면 전체 영역으로 확장
+        self.roi_misses = 0
+        
+        # 병렬 매칭: OpenCV는 knnSearch/matchTemplate 동안 GIL을 놓으므로 맵별/스케일별 매칭을
+        # 스레드 풀에 나눠 돌림. 결과는 제출 순서대로 합치므로 동점 처리는 직렬 실행과 같음
+        # (먼저 나온 맵/작은 스케일 번호 우선). 1 이하이면 직렬 실행
+        self.match_workers = min(4, os.cpu_count() or 1)
+        self.parallel_template_min_area = 200 * 200  # 이보다 작은 검색 영역은 직렬이 더 빠름
+        self._pool = None
+        
+        # 위치 안정화를 위한 변수
+        self.last_position = None
+        self.position_smoothing = 0.7  # 0~1, 높을수록 이전 위치에 가중치 (motion_model을 끈 경우)
+        
+        # 등속 칼만 필터: 캡처 시각 기준으로 위치/속도를 추정하여 걷는 동안에도 지연 없이 평활하고,
+        # 처리 시점까지 지난 시간(+ prediction_lead초)만큼 외삽한 위치를 결과의 predicted로 제공
+        self.motion_model = True
+        self.motion = ConstantVelocityKalman()
+        self.prediction_lead = 0.0  # 추가로 앞당겨 예측할 시간 (키 입력 반응 지연 등)
+        # 녹화 재생 시 True: 예측 기준 시각을 벽시계 대신 '프레임 시각 + 처리 시간'으로 계산
+        self.replay = False
+        
+        # 단계별 처리 시간 (grab/convert/detect/match/homography/template 등, 결과의 timings와 같은 값)
+        self.timer = StageTimer()
+
+    def notify(self, msg):
+        if self.on_status is not None:
+            self.on_status(msg)
+
+    @property
+    def map_ready(self):
+        return len(self.maps) > 0
+
+    @property
+    def ready(self):
+        """맵과 캐릭터가 모두 준비되어 process를 호출할 수 있는지"""
+        return self.map_ready and self.template is not None
+
+    def set_feature_engine(self, detector='sift', matcher=None, nfeatures=3000):
+        """
+        특징점 엔진을 바꿉니다. 기존 맵 디스크립터와 호환되지 않으므로 맵은 모두 비워지며,
+        호출자가 set_map_source로 다시 불러와야 합니다.
+        """
+        self.feature_engine = FeatureEngine(detector, matcher, nfeatures)
+        if self.maps:
+            self.clear_maps()
+        self.notify(f"Feature engine: {self.feature_engine.name} ({nfeatures})")
+
+    def set_map_source(self, slot, name, image_path, nfeatures=None):
+        # Use numpy fromfile to handle unicode paths (e.g. Korean) correctly
+        try:
+            img_array = np.fromfile(image_path, np.uint8)
+            img_bgr = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+        except Exception:
+            img_bgr = None
+
+        if img_bgr is None:
+            self.notify(f"Failed to load map {name}")
+            return False
+            
+        # Convert to gray for features
+        img_gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
+        
+        engine = self.feature_engine
+        nfeatures = nfeatures or engine.nfeatures  # 맵별 특징점 수 (없으면 엔진 기본값)
+        
+        # 학습된 가지치기 모델이 있으면 우선 사용 (학습 모드에서는 전체 특징점 필요)
+        model_key = feature_cache_key(img_array, engine.cache_params(nfeatures))
+        pruned = None
+        if self.use_pruned_models and not self.training:
+            pruned = load_features(pruned_model_path(model_key))
+        if pruned is not None:
+            pts, des = pruned[0], engine.prepare_descriptors(pruned[1])
+        else:
+            pts, des = self.compute_map_features(engine, img_array, img_gray, nfeatures)
+        
+        if des is None or len(pts) < self.min_match_count:
+            self.notify(f"Not enough features in map {name} ({len(pts)})")
+            return False
+        
+        # 선택: PCA 저차원 디스크립터 (학습 모드에서는 가지치기 저장에 원본이 필요하므로 생략)
+        pca = None
+        if self.descriptor_pca_dims and not engine.binary and not self.training:
+            pca = DescriptorPCA.fit(des, self.descriptor_pca_dims)
+            des = pca.project(des)
+        
+        # 맵 특징점으로 매칭 인덱스를 미리 구축 (프레임마다 재구축하지 않음)
+        index = engine.build_index(des)
+        
+        # 캐스케이드 2단계용 빠른 이진 특징점 모델 (현재 맵 재정합 전용, 실패해도 맵 로드는 계속)
+        # 주 엔진이 이미 같은 검출기(ORB)면 같은 특징점을 한 번 더 만들 필요가 없으므로 생략
+        fast = None
+        if self.fast_engine is not None and self.fast_engine.detector_name != engine.detector_name:
+            pts_f, des_f = self.compute_map_features(self.fast_engine, img_array, img_gray, self.fast_engine.nfeatures)
+            if des_f is not None and len(pts_f) >= self.min_match_count:
+                fast = {'pts': pts_f, 'des': des_f, 'index': self.fast_engine.build_index(des_f)}
+        
+        h, w = img_gray.shape[:2]
+        self.maps[slot] = {
+            'name': name,
+            'path': image_path,
+            'pts': pts,  # 호모그래피 계산용 (N, 2) 좌표 배열
+            'des': des,  # 인덱스가 참조하므로 함께 보관 (PCA 사용 시 투영된 디스크립터)
+            'index': index,
+            'pca': pca,
+            'nfeatures': nfeatures,
+            'model_key': model_key,
+            'pruned': pruned is not None,
+            'fast': fast,  # {'pts', 'des', 'index'} 또는 None
+            'w': w,
+            'h': h
+        }
+        
+        self.retrieval_dirty = True
+        
+        detail = ''.join([', pruned' if pruned is not None else '', f', pca {pca.dims}' if pca is not None else ''])
+        self.notify(f"Map loaded: {name} ({len(pts)} features{detail})")
+        return True
+
+    def compute_map_features(self, engine, img_array, img_gray, nfeatures):
+        """
+        맵 특징점 (pts, des) 계산 (이미지 내용 해시 + 검출기 설정이 같으면 디스크 캐시에서 로드).
+        pts는 (N, 2) float32 좌표 배열, 특징점이 없으면 des는 None.
+        """
+        cache_path = None
+        cached = None
+        if self.use_feature_cache:
+            key = feature_cache_key(img_array, engine.cache_params(nfeatures))
+            cache_path = feature_cache_path(key)
+            cached = load_features(cache_path)
+        
+        if cached is not None:
+            pts, des = cached
+        else:
+            # 특징점 계산
+            kp, des = engine.detect(img_gray, nfeatures)
+            pts = keypoints_to_array(kp)
+            if cache_path and des is not None:
+                try:
+                    save_features(cache_path, pts, des)
+                except Exception as e:
+                    self.notify(f"Feature cache save failed: {e}")
+        
+        if des is None:
+            return pts, None
+        # KD-tree는 float32, 이진 매처는 uint8 (캐시는 uint8/float16으로 압축 저장됨)
+        return pts, engine.prepare_descriptors(des)
+
+    def set_training(self, enabled):
+        """
+        키포인트 학습 모드를 켜고 끕니다. 켤 때 가지치기 모델로 로드된 맵은
+        전체 특징점으로 다시 불러오며, 기록은 항상 새로 시작합니다.
+        프레임 처리 중인 엔진 상태를 바꾸므로 process와 같은 스레드에서 호출해야 합니다
+        (TrackerWorker는 트래킹 중이면 프레임 사이에 실행하도록 예약).
+        """
+        self.training = enabled
+        self.keypoint_usage = {}
+        self.release_lock()
+        if enabled:
+            for slot, m in list(self.maps.items()):
+                if m['pruned'] or m['pca'] is not None:
+                    self.set_map_source(slot, m['name'], m['path'], m['nfeatures'])
+            self.build_retrieval()
+        self.notify("Keypoint training on" if enabled else "Keypoint training off")
+
+    def save_pruned_models(self):
+        """
+        학습 기록으로 맵마다 자주 맞은 특징점만 남긴 모델을 저장하고, 학습 모드를 끈 뒤
+        저장한 맵을 가지치기 모델로 다시 불러옵니다. 저장한 맵 수를 반환합니다.
+        """
+        saved = []
+        for slot, usage in list(self.keypoint_usage.items()):
+            m = self.maps.get(slot)
+            if m is None or m['pruned'] or m['pca'] is not None or usage.frames < self.prune_min_frames:
+                continue
+            keep = usage.select(self.prune_min_hits, self.prune_min_hit_ratio,
+                                max(self.prune_min_keep, self.min_match_count))
+            try:
+                save_features(pruned_model_path(m['model_key']), m['pts'][keep], m['des'][keep])
+            except Exception as e:
+                self.notify(f"Pruned model save failed ({m['name']}): {e}")
+                continue
+            self.notify(f"Pruned {m['name']}: {len(m['pts'])} -> {len(keep)} features ({usage.frames} frames)")
+            saved.append(slot)
+        
+        self.training = False
+        self.keypoint_usage = {}
+        self.release_lock()
+        for slot in saved:
+            m = self.maps[slot]
+            self.set_map_source(slot, m['name'], m['path'], m['nfeatures'])
+        self.build_retrieval()
+        return len(saved)
+
+    def set_template(self, image_path):
+        # Use numpy fromfile to handle unicode paths correctly
+        img = load_template(image_path)
+
+        if img is None:
+            self.notify("Failed to load character image")
+            return False
+        
+        self.template = img
+        self.template_path = image_path
+        
+        # 다중 스케일 템플릿 생성 (0.8 ~ 1.2 배율)
+        self.template_scales = []
+        for scale in self.template_scale_factors:
+            h, w = img.shape[:2]
+            new_w = int(w * scale)
+            new_h = int(h * scale)
+            if new_w > 0 and new_h > 0:
+                scaled = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+                # 미니맵 캐릭터 마커는 색으로 다른 점(다른 플레이어 등)과 구분되므로 컬러로 매칭
+                # (작은 템플릿이라 피라미드 축소 없이 원본 해상도에서 바로 매칭됨)
+                self.template_scales.append((scale, TemplateMatcher(scaled, grayscale=False)))
+        
+        # 템플릿에 뚜렷한 색이 없으면 None -> 항상 템플릿 매칭
+        self.blob_detector = ColorBlobDetector.from_template(img, hsv_range=self.color_blob_hsv)
+        
+        self.reset_scale_lock()
+        self.notify(f"Character loaded ({len(self.template_scales)} scales)")
+        return True
+
+    def set_registration_model(self, model):
+        """맵 -> 화면 정합 모델 변경 (REGISTRATION_MODELS 중 하나). 잠금은 풀고 다음 프레임부터 새 모델로 추정"""
+        if model not in REGISTRATION_MODELS:
+            raise ValueError(f"Unknown registration model: {model}")
+        if model != self.registration_model:
+            self.registration_model = model
+            self.release_lock()
+
+    def set_color_blob(self, enabled, hsv_range=None):
+        """
+        색 덩어리 빠른 경로 설정. hsv_range는 ColorBlobDetector.from_template의 hsv_range와 같은 형식이며
+        바뀌면 불러온 캐릭터 이미지로 검출기를 다시 만듭니다.
+        """
+        self.color_blob = bool(enabled)
+        if hsv_range != self.color_blob_hsv:
+            self.color_blob_hsv = hsv_range
+            if self.template is not None:
+                self.blob_detector = ColorBlobDetector.from_template(self.template, hsv_range=hsv_range)
+        if self.color_blob and self.template is not None and self.blob_detector is None:
+            self.notify("Color blob: no marker colour in the character image, using template matching")
+
+    def set_position_demand(self, active):
+        """위치가 필요한 동안(내비게이션 이동 중) True: target_fps로, 아니면 heartbeat_fps로 처리"""
+        self.position_demand = bool(active)
+        # 이동 중에는 화면 변화 감지를 건너뛰고 매 프레임 위치를 새로 측정
+        self.frame_gate.bypass = self.position_demand
+
+    def frame_rate(self, max_speed=False):
+        """목표 처리 fps (0이면 쉬지 않음). max_speed는 최대 속도 녹화 재생 여부"""
+        if max_speed:
+            return 0
+        return self.target_fps if self.position_demand else self.heartbeat_fps
+
+    def frame_delay(self, elapsed, max_speed=False):
+        """
+        현재 목표 fps의 한 주기에서 이번 프레임 처리 시간(elapsed초)을 뺀 대기 시간 (초).
+        처리가 주기보다 오래 걸렸거나 최대 속도 녹화 재생이면 0.
+        """
+        fps = self.frame_rate(max_speed)
+        return max(0.0, 1.0 / fps - elapsed) if fps > 0 else 0.0
+
+    def set_match_workers(self, workers):
+        """병렬 매칭 스레드 수 변경 (기존 풀은 정리하고 다음 매칭 때 새로 만듦)"""
+        self.match_workers = max(1, int(workers))
+        self.shutdown_pool()
+
+    def shutdown_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def parallel_map(self, fn, items):
+        """
+        fn을 items에 적용한 결과를 items 순서대로 반환합니다.
+        항목이 2개 이상이고 match_workers > 1이면 스레드 풀에서 동시에 실행합니다.
+        """
+        items = list(items)
+        if self.match_workers <= 1 or len(items) < 2:
+            return [fn(item) for item in items]
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.match_workers, thread_name_prefix="match")
+        # map은 완료 순서와 관계없이 제출 순서로 결과를 돌려주므로 합치는 결과가 항상 같음
+        return list(self._pool.map(fn, items))
+
+    def match_map(self, map_data, des_s):
+        """맵 하나와 화면 디스크립터를 매칭하여 (query_idx, train_idx)를 반환"""
+        # 엔진 매칭 (query: 화면, train: 미리 구축된 맵 인덱스) + Lowe's ratio test (NumPy 벡터 연산)
+        if map_data['pca'] is not None:
+            des_s = map_data['pca'].project(des_s)
+        with self.timer.stage(f"match/{map_data['name']}"):
+            return self.feature_engine.match(map_data['index'], des_s)
+
+    def build_retrieval(self):
+        """
+        맵 검색 인덱스(BoVW)를 재구축합니다 (맵 구성이 바뀌었고 맵이 retrieval_top_k개보다 많을 때만).
+        k-means라 오래 걸리므로 맵을 다 불러온 뒤 한 번 호출합니다 (트래킹 중 첫 전체 검사에서 만들지 않도록).
+        """
+        if not self.use_retrieval or len(self.maps) <= self.retrieval_top_k:
+            return
+        if not self.retrieval_dirty and self.retrieval.ready:
+            return
+        self.retrieval_dirty = False
+        # PCA 맵은 원래 차원으로 근사 복원하여 모든 맵이 같은 어휘 공간을 쓰도록 함
+        self.retrieval.build({slot: m['des'] if m['pca'] is None else m['pca'].reconstruct(m['des'])
+                              for slot, m in self.maps.items()})
+        self.notify(f"Map index built ({len(self.maps)} maps)")
+
+    def candidate_slots(self, des_s):
+        """전체 검사 대상 맵 슬롯 목록 (맵이 많으면 BoVW 검색으로 top-k만 선택)"""
+        if not self.use_retrieval or len(self.maps) <= self.retrieval_top_k:
+            return list(self.maps.keys())
+        # 보통은 맵 로드 후 이미 만들어져 있음 (build_retrieval을 부르지 않은 호출자를 위한 대비)
+        self.build_retrieval()
+        return [slot for slot in self.retrieval.shortlist(des_s, self.retrieval_top_k) if slot in self.maps]
+
+    def find_best_map(self, des_s):
+        """
+        가장 많이 매칭되는 맵을 찾아 (slot, query_idx, train_idx)를 반환합니다.
+        sticky 모드에서는 현재 맵을 먼저 매칭하고, 여유 있게 통과하면 다른 맵 검사를 생략합니다.
+        현재 맵이 실패하거나 map_verify_interval 프레임이 지나면 전체 맵을 다시 검사합니다.
+        맵이 retrieval_top_k개보다 많으면 전체 검사는 검색 인덱스가 고른 후보 맵으로 제한됩니다.
+        """
+        empty = np.empty(0, dtype=np.int32)
+        results = {}
+        
+        current = self.current_map_slot
+        verify_due = self.map_verify_interval > 0 and self.frames_since_full_scan >= self.map_verify_interval
+        if self.sticky_map and current in self.maps and not verify_due:
+            try:
+                results[current] = self.match_map(self.maps[current], des_s)
+            except Exception:
+                results[current] = (empty, empty)
+            if len(results[current][0]) >= self.min_match_count * self.sticky_margin:
+                self.frames_since_full_scan += 1
+                return (current,) + results[current]
+        
+        # 전체(후보) 맵 검사 (이미 매칭한 현재 맵 결과는 재사용, 나머지는 병렬 매칭)
+        def safe_match(slot):
+            try:
+                return self.match_map(self.maps[slot], des_s)
+            except Exception:
+                return None
+        
+        # 이미 매칭한 현재 맵은 검색 후보에서 빠졌더라도 항상 비교 대상에 포함 (동점이면 현재 맵 유지)
+        candidates = [slot for slot in results if slot in self.maps]
+        candidates += [slot for slot in self.candidate_slots(des_s) if slot not in candidates]
+        pending = [slot for slot in candidates if slot not in results]
+        results.update(zip(pending, self.parallel_map(safe_match, pending)))
+        
+        # 후보 순서대로 비교하고 매칭 수가 '더 많을 때만' 교체 -> 동점이면 앞선 후보가 이김
+        best_slot, best_query_idx, best_train_idx = None, empty, empty
+        for slot in candidates:
+            if results.get(slot) is None:
+                continue
+            query_idx, train_idx = results[slot]
+            if len(query_idx) > len(best_query_idx):
+                best_slot, best_query_idx, best_train_idx = slot, query_idx, train_idx
+        
+        self.frames_since_full_scan = 0
+        return best_slot, best_query_idx, best_train_idx
+
+    def estimate_pose(self, img_screen_gray):
+        """
+        특징점 검출 + 맵 매칭 + 정합 모델 추정으로 (slot, H, 매칭 수)를 추정합니다.
+        실패하면 상태 메시지를 보내고 None을 반환합니다.
+        """
+        # 1. 특징점 검출 (화면)
+        with self.timer.stage('detect'):
+            kp_s, des_s = self.feature_engine.detect(img_screen_gray)
+        
+        if des_s is None or len(kp_s) < 4:
+            self.last_matches = 0
+            return None
+        
+        pts_s = keypoints_to_array(kp_s)
+        
+        # 2. 맵 매칭 (현재 맵 우선, 필요할 때만 전체 맵 검사)
+        with self.timer.stage('match'):
+            new_slot, best_query_idx, best_train_idx = self.find_best_map(des_s)
+        best_map = self.maps.get(new_slot)
+        max_good_matches = len(best_query_idx)
+        self.last_matches = max_good_matches
+
+        # 최소 매칭 수 확인 (프레임마다 반복되는 상태이므로 메시지 대신 결과의 matches로 전달)
+        if best_map is None or max_good_matches < self.min_match_count:
+            return None
+        
+        # 맵 변경 감지
+        if self.current_map_slot != new_slot:
+            self.current_map_slot = new_slot
+            self.last_position = None  # 맵 변경 시 위치 초기화
+            self.notify(f"Detected: {best_map['name']}")
+
+        # 3. 맵 -> 화면 변환 추정 (registration_model에 따라 평행이동/유사/Homography)
+        # query 인덱스는 화면 특징점, train 인덱스는 맵 특징점을 가리킨다
+        src_pts = best_map['pts'][best_train_idx].reshape(-1, 1, 2)
+        dst_pts = pts_s[best_query_idx].reshape(-1, 1, 2)
+        
+        # RANSAC(또는 중앙값)으로 outlier 제거, 결과는 항상 3x3 행렬
+        with self.timer.stage('homography'):
+            H, mask = estimate_transform(self.registration_model, src_pts, dst_pts, self.ransac_threshold)
+        
+        if H is None:
+            self.notify(f"Homography failed ({best_map['name']}, {self.registration_model})")
+            return None
+        
+        if self.training:
+            usage = self.keypoint_usage.setdefault(new_slot, KeypointUsage(len(best_map['pts'])))
+            usage.record(best_train_idx, mask)
+        return new_slot, H, max_good_matches
+
+    def estimate_pose_fast(self, img_screen_gray):
+        """
+        빠른 이진 특징점(ORB)으로 현재 맵에만 재정합합니다. 맵을 바꾸지 않으며,
+        실패하면 조용히 None을 반환하여 전체 검색 단계로 넘깁니다.
+        """
+        map_data = self.maps.get(self.current_map_slot)
+        if self.fast_engine is None or map_data is None or map_data.get('fast') is None:
+            return None
+        fast = map_data['fast']
+        
+        kp_s, des_s = self.fast_engine.detect(img_screen_gray)
+        if des_s is None or len(kp_s) < self.fast_min_matches:
+            return None
+        query_idx, train_idx = self.fast_engine.match(fast['index'], des_s)
+        if len(query_idx) < self.fast_min_matches:
+            return None
+        
+        src_pts = fast['pts'][train_idx].reshape(-1, 1, 2)
+        dst_pts = keypoints_to_array(kp_s)[query_idx].reshape(-1, 1, 2)
+        H, mask = estimate_transform(self.registration_model, src_pts, dst_pts, self.ransac_threshold)
+        if H is None or mask is None or int(mask.sum()) < self.fast_min_matches // 2:
+            return None
+        return self.current_map_slot, H, len(query_idx)
+
+    def locate_map(self, img_screen_gray):
+        """
+        재정합 캐스케이드. (pose, tier)를 반환하며 tier는 'track' | 'fast' | 'full' | 'miss'.
+        1) track: 잠금된 Homography 재사용 (특징점 계산 없음)
+        2) fast: 현재 맵에 빠른 이진 특징점
+        3) full: 전체 엔진으로 모든(후보) 맵 검색 - 순간이동/포탈 이동 후 복구용
+        학습 모드에서는 모든 프레임이 맵 특징점 사용 횟수를 기록하도록 항상 3단계만 사용합니다.
+        track/fast 프레임도 map_verify_interval에 포함되며, 맵이 여러 개이고 재검사 시점이 되면
+        1~2단계를 건너뛰고 전체 검색으로 비슷한 다른 맵에 계속 붙어 있지 않은지 확인합니다.
+        """
+        pose = None
+        verify_due = (len(self.maps) > 1 and self.map_verify_interval > 0
+                      and self.frames_since_full_scan >= self.map_verify_interval)
+        if not self.training and not verify_due:
+            with self.timer.stage('lock'):
+                pose = self.locked_pose(img_screen_gray)
+            if pose is not None:
+                self.frames_since_full_scan += 1
+                return pose, 'track'
+            with self.timer.stage('fast'):
+                pose = self.estimate_pose_fast(img_screen_gray)
+            if pose is not None:
+                self.frames_since_full_scan += 1
+        
+        tier = 'fast'
+        if pose is None:
+            pose = self.estimate_pose(img_screen_gray)
+            tier = 'full'
+        if pose is None:
+            return None, 'miss'
+        
+        if not self.training:
+            self.update_lock(pose[0], pose[1], img_screen_gray)
+        return pose, tier
+
+    def map_corners(self, H, map_data):
+        """맵 이미지 4개 코너를 화면 좌표로 변환한 (4, 2) 배열"""
+        h, w = map_data['h'], map_data['w']
+        pts = np.float32([[0, 0], [0, h-1], [w-1, h-1], [w-1, 0]]).reshape(-1, 1, 2)
+        return cv2.perspectiveTransform(pts, H).reshape(-1, 2)
+
+    def locked_pose(self, img_screen_gray):
+        """
+        Homography 잠금 상태면 (slot, H, -1)을 반환합니다.
+        잠금 기준 프레임과 화면이 크게 달라졌으면(맵 변경 의심) 잠금을 풀고 None,
+        lock_verify_interval 프레임마다 한 번은 None을 반환하여 전체 추정으로 드리프트를 검사합니다.
+        """
+        if not self.homography_lock or not self.locked or self.lock_slot not in self.maps:
+            return None
+        
+        # 저렴한 맵 변경 검사: 잠금 시점 썸네일과 비교 (캐릭터/점 정도의 변화는 허용)
+        if mean_abs_diff(thumbnail(img_screen_gray), self.lock_reference) > self.lock_change_threshold:
+            self.release_lock()
+            return None
+        
+        self.frames_since_lock_check += 1
+        if self.lock_verify_interval > 0 and self.frames_since_lock_check >= self.lock_verify_interval:
+            # 드리프트 검사 차례: 전체 추정 후 update_lock에서 잠금 유지 여부 결정
+            return None
+        return self.lock_slot, self.lock_H, -1
+
+    def update_lock(self, slot, H, img_screen_gray):
+        """
+        전체 추정 결과로 Homography 안정도를 갱신합니다.
+        같은 맵에서 코너 위치가 lock_tolerance 이내로 lock_after_frames 프레임 연속 유지되면 잠급니다.
+        잠금 중 드리프트 검사에서 어긋나면 잠금을 풀고 새 후보부터 다시 셉니다.
+        """
+        if not self.homography_lock:
+            return
+        corners = self.map_corners(H, self.maps[slot])
+        consistent = (self.lock_slot == slot and self.lock_corners is not None
+                      and float(np.max(np.abs(corners - self.lock_corners))) <= self.lock_tolerance)
+        
+        if not consistent:
+            if self.locked:
+                self.notify("Homography lock released (drift)")
+            self.locked = False
+            self.lock_slot = slot
+            self.lock_H = H
+            self.lock_corners = corners
+            self.stable_frames = 1
+            return
+        
+        self.stable_frames += 1
+        self.frames_since_lock_check = 0
+        if not self.locked and self.stable_frames >= self.lock_after_frames:
+            self.locked = True
+            self.lock_misses = 0
+            self.lock_reference = thumbnail(img_screen_gray)
+            self.notify(f"Homography locked ({self.maps[slot]['name']})")
+
+    def release_lock(self):
+        self.locked = False
+        self.lock_slot = None
+        self.lock_H = None
+        self.lock_corners = None
+        self.lock_reference = None
+        self.stable_frames = 0
+        self.frames_since_lock_check = 0
+        self.lock_misses = 0
+
+    def active_scale_indices(self):
+        """이번 프레임에 시도할 템플릿 스케일 번호 (고정 시 해당 스케일 ±1만)"""
+        n = len(self.template_scales)
+        if self.locked_scale_idx is None or self.locked_scale_idx >= n:
+            return range(n)
+        return range(max(0, self.locked_scale_idx - 1), min(n, self.locked_scale_idx + 2))
+
+    def update_scale_lock(self, idx):
+        """같은 스케일이 scale_lock_after번 연속으로 이기면 그 스케일로 고정"""
+        if not self.scale_lock:
+            return
+        if idx == self.scale_streak_idx:
+            self.scale_streak += 1
+        else:
+            self.scale_streak_idx = idx
+            self.scale_streak = 1
+        if self.scale_streak >= self.scale_lock_after:
+            self.locked_scale_idx = idx
+
+    def reset_scale_lock(self):
+        self.locked_scale_idx = None
+        self.scale_streak_idx = None
+        self.scale_streak = 0
+
+    def predicted_roi(self, screen_shape, H):
+        """
+        직전 맵 좌표(last_position)를 H로 화면에 투영하여 캐릭터 검색 창 (x0, y0, x1, y1)을 반환합니다.
+        직전 위치가 없거나, ROI 검색이 꺼져 있거나, 연속 실패가 roi_miss_limit에 도달하면 None (전체 검색).
+        """
+        if not self.roi_search or self.last_position is None or not self.template_scales:
+            return None
+        if self.roi_misses >= self.roi_miss_limit:
+            return None
+        
+        map_pt = np.array([[self.last_position]], dtype=np.float32)
+        sx, sy = cv2.perspectiveTransform(map_pt, H)[0][0]
+        
+        # 가장 큰 스케일 템플릿이 창 안에 온전히 들어가도록 여유를 더함
+        max_th = max(m.h for _, m in self.template_scales)
+        max_tw = max(m.w for _, m in self.template_scales)
+        half_w = self.roi_radius + max_tw
+        half_h = self.roi_radius + max_th
+        
+        screen_h, screen_w = screen_shape[:2]
+        x0, y0 = max(0, int(sx - half_w)), max(0, int(sy - half_h))
+        x1, y1 = min(screen_w, int(sx + half_w)), min(screen_h, int(sy + half_h))
+        if x1 - x0 < max_tw or y1 - y0 < max_th:
+            return None  # 투영 위치가 화면 밖이면 전체 검색
+        return x0, y0, x1, y1
+
+    def match_character_template(self, search_area):
+        """
+        다중 스케일 템플릿 매칭으로 검색 영역 안의 캐릭터 중심을 찾습니다.
+
+        Returns:
+            tuple: ((x, y) 또는 None, 최고 매칭 점수)
+        """
+        best_val = 0
+        best_loc = None
+        best_matcher = None
+        best_idx = None
+        
+        # 스케일이 고정되었으면 해당 스케일과 이웃 스케일만 시도
+        indices = list(self.active_scale_indices())
+        def match(idx):
+            scale, matcher = self.template_scales[idx]
+            with self.timer.stage(f"template/x{scale:g}"):
+                return matcher.match(search_area)
+        
+        with self.timer.stage('template'):
+            if search_area.shape[0] * search_area.shape[1] >= self.parallel_template_min_area:
+                scores = self.parallel_map(match, indices)
+            else:
+                scores = [match(idx) for idx in indices]
+        
+        # 스케일 번호 순으로 비교하므로 동점이면 작은 스케일이 이김 (직렬 실행과 동일)
+        for idx, (max_val, max_loc) in zip(indices, scores):
+            matcher = self.template_scales[idx][1]
+            
+            # 템플릿이 검색 영역보다 크면 loc이 None
+            if max_loc is None:
+                continue
+            
+            if max_val > best_val:
+                best_val = max_val
+                best_loc = max_loc
+                best_matcher = matcher
+                best_idx = idx
+        
+        if best_val < self.char_threshold or best_loc is None:
+            # 신뢰도가 떨어지면 전체 스케일 탐색 재개
+            self.reset_scale_lock()
+            return None, best_val
+        self.update_scale_lock(best_idx)
+        
+        tw, th = best_matcher.size
+        return (best_loc[0] + tw / 2, best_loc[1] + th / 2), best_val
+
+    def locate_character(self, img_screen_bgr, H):
+        """
+        캐릭터를 찾아 맵 좌표로 변환합니다.
+        색 덩어리 검출을 먼저 시도하고, 모호하면 다중 스케일 템플릿 매칭으로 대체합니다.
+
+        Returns:
+            tuple: ((map_x, map_y) 또는 None, 최고 매칭 점수)
+        """
+        # 5. 검색 영역 결정: 직전 위치를 H로 화면에 투영한 주변 창만 검색하고,
+        #    roi_miss_limit번 연속 실패하면 전체 감지 영역에서 검색 (미니맵 밖에서도 찾을 수 있도록)
+        roi = self.predicted_roi(img_screen_bgr.shape, H)
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            search_area = img_screen_bgr[y0:y1, x0:x1]
+        else:
+            x0, y0 = 0, 0
+            search_area = img_screen_bgr
+        
+        # 6-a. 색 덩어리 빠른 경로 (후보가 하나로 확실할 때만 사용)
+        center = None
+        best_val = 0
+        if self.color_blob and self.blob_detector is not None:
+            center = self.blob_detector.detect(search_area)
+            if center is not None:
+                best_val = 1.0
+        
+        # 6-b. 다중 스케일 템플릿 매칭 (덩어리 검출이 모호하거나 꺼져 있을 때)
+        if center is None:
+            center, best_val = self.match_character_template(search_area)
+        
+        if center is None:
+            if roi is not None:
+                self.roi_misses += 1
+            return None, best_val
+        self.roi_misses = 0
+        
+        # 화면 좌표 (전체 감지 영역 내 좌표, ROI 오프셋 보정)
+        screen_center_x = x0 + center[0]
+        screen_center_y = y0 + center[1]
+        
+        # Homography 역변환으로 맵 좌표 계산
+        H_inv = np.linalg.inv(H)
+        screen_pt = np.array([[[screen_center_x, screen_center_y]]], dtype=np.float32)
+        map_pt = cv2.perspectiveTransform(screen_pt, H_inv)
+        return (map_pt[0][0][0], map_pt[0][0][1]), best_val
+
+    def smooth_position(self, target, w, h, timestamp=None):
+        """
+        측정한 맵 좌표를 평활하여 last_position에 기록하고 반환합니다 (급격한 이동은 그대로).
+        motion_model이면 캡처 시각(timestamp)을 쓰는 칼만 필터, 아니면 직전 위치와의 지수 평활.
+        """
+        # 급격한 이동 감지 (맵 크기의 10% 이상 이동) -> 순간이동 등으로 보고 새 위치에서 다시 시작
+        jump_threshold = max(w, h) * 0.1
+        if self.motion_model:
+            if self.last_position is None:
+                self.motion.reset()  # 맵 변경/트래킹 재시작
+            self.last_position = self.motion.update(target, time.time() if timestamp is None else timestamp,
+                                                    jump_threshold)
+            return self.last_position
+        
+        target_x, target_y = target
+        if self.last_position is not None:
+            last_x, last_y = self.last_position
+            distance = np.sqrt((target_x - last_x)**2 + (target_y - last_y)**2)
+            
+            if distance < jump_threshold:
+                # 스무딩 적용
+                target_x = self.position_smoothing * last_x + (1 - self.position_smoothing) * target_x
+                target_y = self.position_smoothing * last_y + (1 - self.position_smoothing) * target_y
+            # 급격한 이동은 새 위치 그대로 사용 (순간이동 등)
+        
+        self.last_position = (target_x, target_y)
+        return target_x, target_y
+
+    def pipeline_spec(self):
+        """검출 프로세스용 FrameProcessor 설정 (현재 맵/캐릭터/엔진 설정의 스냅샷, 피클 가능)"""
+        engine = self.feature_engine
+        return {
+            'maps': [{'slot': slot, 'name': m['name'], 'path': m['path'], 'nfeatures': m['nfeatures']}
+                     for slot, m in self.maps.items()],
+            'template_path': self.template_path,
+            'engine': {'detector': engine.detector_name, 'matcher': engine.matcher_name,
+                       'nfeatures': engine.nfeatures},
+            'registration_model': self.registration_model,
+            'ransac_threshold': self.ransac_threshold,
+            'min_match_count': self.min_match_count,
+            'char_threshold': self.char_threshold,
+            'scales': tuple(self.template_scale_factors),
+            'descriptor_pca_dims': self.descriptor_pca_dims,
+            'color_blob': self.color_blob,
+            'color_blob_hsv': self.color_blob_hsv,
+            'use_feature_cache': self.use_feature_cache,
+            'use_pruned_models': self.use_pruned_models,
+            'training': self.training,
+            'sticky_map': self.sticky_map,
+        }
+
+    def clear_maps(self):
+        self.maps.clear()
+        self.current_map_slot = None
+        self.frames_since_full_scan = 0
+        self.retrieval = MapRetrievalIndex()
+        self.retrieval_dirty = False
+        self.keypoint_usage = {}
+        self.frame_gate.reset()
+        self.last_result = None
+        self.release_lock()
+        self.last_position = None
+        self.notify("All maps cleared")
+
+    def reset(self):
+        """트래킹 세션 시작 시 프레임 사이에 이어지는 상태 초기화 (맵/캐릭터 모델은 유지)"""
+        self.last_position = None
+        self.last_result = None
+        self.frame_gate.reset()
+        self.frame_gate.skipped_total = 0
+        self.release_lock()
+        self.roi_misses = 0
+        self.tier_counts = dict.fromkeys(self.tier_counts, 0)
+        self.timer.reset()
+
+    def close(self):
+        """매칭 스레드 풀 정리 (엔진은 다시 사용할 수 있으며 풀은 필요할 때 새로 만듦)"""
+        self.shutdown_pool()
+
+    def measure(self, img_screen_bgr, img_screen_gray):
+        """
+        프레임 하나에서 맵과 캐릭터를 찾습니다 (평활/예측 없음).
+
+        Returns:
+            dict: tier, slot(맵을 못 찾으면 None), matches, timings(단계별 ms)와
+            맵을 찾으면 name/w/h/corners(프레임 좌표 4x2)/target(맵 좌표 또는 None)/conf.
+            map_changed는 이번 프레임에서 현재 맵이 바뀌었는지 여부.
+        """
+        prev_slot = self.current_map_slot
+        
+        # 1~3. 맵 인식 + Homography (싼 단계부터 시도하는 캐스케이드)
+        with self.timer.stage('map'):
+            pose, tier = self.locate_map(img_screen_gray)
+        self.tier_counts[tier] += 1
+        if pose is None:
+            return {'tier': tier, 'slot': None, 'matches': self.last_matches,
+                    'map_changed': False, 'timings': self.timer.current_ms()}
+        
+        slot, H, matches = pose
+        m = self.maps[slot]
+        result = {'tier': tier, 'slot': slot, 'name': m['name'], 'w': m['w'], 'h': m['h'],
+                  'corners': self.map_corners(H, m), 'matches': matches, 'target': None, 'conf': 0.0,
+                  'map_changed': slot != prev_slot}
+        
+        # 5~6. 캐릭터 검색 후 Homography 역변환으로 맵 좌표 계산
+        with self.timer.stage('character'):
+            target, best_val = self.locate_character(img_screen_bgr, H)
+        result['conf'] = float(best_val)
+        result['timings'] = self.timer.current_ms()
+        if target is not None:
+            self.lock_misses = 0
+            result['target'] = (float(target[0]), float(target[1]))
+        elif self.locked:
+            # 잠금 상태에서 캐릭터를 계속 못 찾으면 맵이 바뀌었을 수 있으므로 잠금 해제
+            self.lock_misses += 1
+            if self.lock_misses >= self.lock_miss_limit:
+                self.release_lock()
+        return result
+
+    def predicted_relative(self, w, h, now=None):
+        """칼만 필터 상태를 now(+ prediction_lead)로 외삽한 상대 좌표 (필터가 없으면 None)"""
+        if not self.motion_model or not self.motion.initialized:
+            return None
+        now = time.time() if now is None else now
+        pred_x, pred_y = self.motion.predict(now + self.prediction_lead)
+        return calculate_relative_coordinates(w, h, pred_x, pred_y)
+
+    def track(self, measurement, timestamp, now=None):
+        """
+        measure 결과(또는 검출 프로세스가 보낸 같은 형식의 결과)에 캡처 시각 기준 평활과
+        now(기본: 현재 시각) 기준 지연 보정 예측을 적용합니다.
+        position(맵 좌표), relative, predicted(중심 기준 상대 좌표)가 추가됩니다.
+        """
+        result = dict(measurement, timestamp=timestamp, position=None, relative=None, predicted=None)
+        slot = result.get('slot')
+        if slot is None:
+            return result
+        if slot != self.current_map_slot:
+            # 다른 프로세스에서 측정한 결과 (파이프라인 모드): 여기서 맵 변경 처리
+            self.current_map_slot = slot
+            self.last_position = None
+            result['map_changed'] = True
+        if result['target'] is None:
+            return result
+        
+        # 7. 위치 스무딩 (칼만 필터, 급격한 변화는 그대로) + 지연 보정 예측
+        w, h = result['w'], result['h']
+        result['position'] = self.smooth_position(result['target'], w, h, timestamp)
+        result['relative'] = calculate_relative_coordinates(w, h, *result['position'])
+        predicted = self.predicted_relative(w, h, now)
+        result['predicted'] = result['relative'] if predicted is None else predicted
+        self.last_result = (result['name'], result['relative'][0], result['relative'][1])
+        return result
+
+    def process(self, img_screen_bgr, img_screen_gray=None, timestamp=None):
+        """
+        화면 프레임 하나를 처리하여 결과 dict를 반환합니다.
+
+        Args:
+            img_screen_bgr (ndarray): 감지 영역 BGR 프레임.
+            img_screen_gray (ndarray): 같은 프레임의 그레이스케일 (없으면 변환).
+            timestamp (float): 캡처 시각 (time.time 기준 초, 없으면 지금).
+
+        Returns:
+            dict: track 결과 + skipped(화면 변화가 없어 직전 결과를 재사용했는지),
+            error(처리 중 예외 메시지), timings(이 프레임의 단계별 ms, total 포함 - 호출자가 같은 프레임에
+            self.timer로 잰 grab/convert도 들어감).
+        """
+        start = time.perf_counter_ns()
+        timestamp = time.time() if timestamp is None else timestamp
+        if img_screen_gray is None:
+            with self.timer.stage('convert'):
+                img_screen_gray = cv2.cvtColor(img_screen_bgr, cv2.COLOR_BGR2GRAY)
+        
+        # 0. 화면 변화 감지 - 바뀐 게 없으면 직전 결과를 그대로 재사용
+        # (화면이 그대로면 캐릭터도 멈춰 있으므로 예측도 마지막 위치 그대로)
+        with self.timer.stage('gate'):
+            changed = self.frame_gate.is_changed(img_screen_gray)
+        if not changed:
+            last = self.last_result
+            result = {'timestamp': timestamp, 'skipped': True, 'slot': self.current_map_slot,
+                      'name': None if last is None else last[0],
+                      'relative': None if last is None else tuple(last[1:]),
+                      'predicted': None if last is None else tuple(last[1:])}
+        else:
+            # 새 프레임을 처리하므로 이전 결과는 무효 (성공 시 다시 채워짐)
+            self.last_result = None
+            try:
+                measurement = self.measure(img_screen_bgr, img_screen_gray)
+                now = timestamp + (time.perf_counter_ns() - start) / 1e9 if self.replay else None
+                with self.timer.stage('track'):
+                    result = self.track(measurement, timestamp, now)
+            except Exception as e:
+                result = {'timestamp': timestamp, 'slot': None, 'error': str(e)}
+            result['skipped'] = False
+        self.timer.add('total', time.perf_counter_ns() - start)
+        result['timings'] = self.timer.end_frame()
+        return result
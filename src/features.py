@@ -0,0 +1,268 @@
+import os
+import json
+import hashlib
+import cv2
+import numpy as np
+
+# FLANN 알고리즘 ID (cv2.flann 상수와 동일)
+FLANN_INDEX_KDTREE = 1
+FLANN_INDEX_LSH = 6
+
+# 특징점 엔진 조합: 검출기 -> 사용할 수 있는 매처 (첫 번째가 기본값)
+# - sift: float 디스크립터, KD-tree (제곱 L2 거리)
+# - orb / akaze: 이진 디스크립터, LSH 또는 전수 Hamming 매칭
+FEATURE_ENGINES = {
+    'sift': ('kdtree',),
+    'orb': ('lsh', 'bf'),
+    'akaze': ('lsh', 'bf'),
+}
+
+# 맵 특징점 캐시 폴더 (config.json과 같은 작업 폴더 기준)
+FEATURE_CACHE_DIR = "feature_cache"
+
+
+def keypoints_to_array(keypoints):
+    """
+    cv2.KeyPoint 리스트를 연속된 float32 (N, 2) 좌표 배열로 변환합니다.
+    파이썬 루프 대신 OpenCV 내부 변환을 사용하므로 특징점이 많아도 빠릅니다.
+    """
+    if not keypoints:
+        return np.empty((0, 2), dtype=np.float32)
+    pts = cv2.KeyPoint_convert(keypoints)
+    return np.ascontiguousarray(pts, dtype=np.float32).reshape(-1, 2)
+
+
+def build_index(descriptors, index_params):
+    """
+    맵 디스크립터로 FLANN 인덱스를 한 번 구축합니다.
+    인덱스는 descriptors 배열을 참조하므로 호출자가 배열을 함께 보관해야 합니다.
+    """
+    return cv2.flann_Index(descriptors, index_params)
+
+
+def knn_match(index, query_descriptors, k=2, search_params=None):
+    """
+    인덱스에 화면 디스크립터를 질의하여 (indices, dists) 배열을 반환합니다.
+    indices[i, j]는 i번째 질의의 j번째 최근접 맵 특징점 번호,
+    dists는 KD-tree 기준 '제곱' L2 거리입니다.
+    """
+    if search_params is None:
+        search_params = dict(checks=50)
+    indices, dists = index.knnSearch(query_descriptors, k, params=search_params)
+    return indices, dists
+
+
+def ratio_test(indices, dists, ratio=0.7, squared=True):
+    """
+    Lowe's ratio test를 NumPy로 한 번에 적용합니다.
+
+    Args:
+        indices (ndarray): knn_match가 반환한 (N, 2) 최근접 인덱스.
+        dists (ndarray): (N, 2) 거리. squared=True이면 제곱 거리로 간주합니다.
+        ratio (float): 1순위/2순위 거리 비율 임계값.
+        squared (bool): 거리가 제곱 거리인지 여부 (FLANN KD-tree는 제곱 거리).
+
+    Returns:
+        tuple: (query_idx, train_idx) 통과한 매칭의 화면/맵 특징점 번호 배열.
+    """
+    if indices is None or len(indices) == 0 or indices.shape[1] < 2:
+        empty = np.empty(0, dtype=np.int32)
+        return empty, empty
+
+    threshold = ratio * ratio if squared else ratio
+    # 후보가 부족하면 FLANN이 -1을 돌려주므로 제외
+    valid = (indices[:, 0] >= 0) & (indices[:, 1] >= 0)
+    good = valid & (dists[:, 0] < threshold * dists[:, 1])
+
+    query_idx = np.flatnonzero(good).astype(np.int32)
+    train_idx = indices[good, 0].astype(np.int32)
+    return query_idx, train_idx
+
+
+class FeatureEngine:
+    """
+    특징점 검출기 + 매처 조합을 묶은 엔진.
+
+    검출기(sift/orb/akaze)와 매처(kdtree/lsh/bf)를 설정으로 고를 수 있고,
+    맵마다 nfeatures를 다르게 줄 수 있습니다. 인덱스 구축과 매칭 결과는
+    어떤 조합이든 (query_idx, train_idx) 배열로 통일되어 트래커 코드가 바뀌지 않습니다.
+    """
+
+    def __init__(self, detector='sift', matcher=None, nfeatures=3000, ratio=0.7):
+        if detector not in FEATURE_ENGINES:
+            raise ValueError(f"Unknown feature detector: {detector}")
+        matcher = matcher or FEATURE_ENGINES[detector][0]
+        if matcher not in FEATURE_ENGINES[detector]:
+            raise ValueError(f"Matcher '{matcher}' cannot be used with {detector}")
+
+        self.detector_name = detector
+        self.matcher_name = matcher
+        self.nfeatures = nfeatures
+        self.ratio = ratio
+        self.search_params = dict(checks=50)
+        self._detectors = {}  # nfeatures -> 검출기 (맵별 nfeatures 지원)
+
+    @property
+    def binary(self):
+        return self.detector_name != 'sift'
+
+    @property
+    def name(self):
+        return f"{self.detector_name}/{self.matcher_name}"
+
+    def cache_params(self, nfeatures=None):
+        """특징점 캐시 키에 들어갈 검출기 설정 (매처는 디스크립터에 영향이 없으므로 제외)"""
+        return dict(detector=self.detector_name.upper(), nfeatures=nfeatures or self.nfeatures)
+
+    def _detector(self, nfeatures):
+        if nfeatures not in self._detectors:
+            if self.detector_name == 'sift':
+                self._detectors[nfeatures] = cv2.SIFT_create(nfeatures=nfeatures)
+            elif self.detector_name == 'orb':
+                self._detectors[nfeatures] = cv2.ORB_create(nfeatures=nfeatures)
+            else:
+                if not hasattr(cv2, 'AKAZE_create'):
+                    raise ValueError("AKAZE is not available in this OpenCV build")
+                self._detectors[nfeatures] = cv2.AKAZE_create()
+        return self._detectors[nfeatures]
+
+    def detect(self, gray, nfeatures=None):
+        """
+        특징점과 디스크립터를 계산합니다. 디스크립터는 매처가 요구하는 dtype으로 변환됩니다
+        (SIFT: float32, 이진: uint8). 특징점이 없으면 des는 None.
+        """
+        nfeatures = nfeatures or self.nfeatures
+        detector = self._detector(nfeatures)
+        if self.detector_name == 'akaze':
+            # AKAZE는 개수 제한 옵션이 없으므로 응답이 강한 순으로 nfeatures개만 남김
+            keypoints = sorted(detector.detect(gray, None), key=lambda k: -k.response)[:nfeatures]
+            keypoints, des = detector.compute(gray, keypoints)
+        else:
+            keypoints, des = detector.detectAndCompute(gray, None)
+        if des is None:
+            return keypoints, None
+        return keypoints, self.prepare_descriptors(des)
+
+    def prepare_descriptors(self, des):
+        return np.ascontiguousarray(des, dtype=np.uint8 if self.binary else np.float32)
+
+    def build_index(self, des):
+        """맵 디스크립터로 매칭 인덱스를 한 번 구축 (bf는 디스크립터 자체를 보관)"""
+        if self.matcher_name == 'kdtree':
+            return build_index(des, dict(algorithm=FLANN_INDEX_KDTREE, trees=5))
+        if self.matcher_name == 'lsh':
+            return build_index(des, dict(algorithm=FLANN_INDEX_LSH, table_number=6,
+                                         key_size=12, multi_probe_level=1))
+        return (cv2.BFMatcher(cv2.NORM_HAMMING), des)
+
+    def match(self, index, des_query):
+        """화면 디스크립터를 인덱스에 질의하고 ratio test를 통과한 (query_idx, train_idx)를 반환"""
+        if self.matcher_name == 'bf':
+            bf, des_train = index
+            pairs = bf.knnMatch(des_query, des_train, k=2)
+            indices = np.full((len(pairs), 2), -1, dtype=np.int32)
+            dists = np.zeros((len(pairs), 2), dtype=np.float32)
+            for i, pair in enumerate(pairs):
+                for j, m in enumerate(pair[:2]):
+                    indices[i, j] = m.trainIdx
+                    dists[i, j] = m.distance
+            return ratio_test(indices, dists, self.ratio, squared=False)
+
+        indices, dists = knn_match(index, des_query, 2, self.search_params)
+        # KD-tree는 제곱 L2 거리, LSH는 Hamming 거리
+        return ratio_test(indices, dists, self.ratio, squared=(self.matcher_name == 'kdtree'))
+
+
+def feature_cache_key(image_bytes, detector_params):
+    """
+    이미지 파일 내용 해시 + 검출기 파라미터 + OpenCV 버전으로 캐시 키를 만듭니다.
+    이미지가 바뀌거나 SIFT_create 설정이 바뀌면 키가 달라져 캐시가 자동으로 무효화됩니다.
+    """
+    h = hashlib.sha1()
+    h.update(bytes(image_bytes))
+    h.update(json.dumps(detector_params, sort_keys=True).encode('utf-8'))
+    h.update(cv2.__version__.encode('utf-8'))
+    return h.hexdigest()
+
+
+def feature_cache_path(key, cache_dir=FEATURE_CACHE_DIR):
+    return os.path.join(cache_dir, f"{key}.npz")
+
+
+def compact_descriptors(des):
+    """
+    저장용 디스크립터 압축. OpenCV SIFT 디스크립터는 float32지만 값이 0~255 정수라
+    uint8로 손실 없이 4배 줄일 수 있습니다 (이진 디스크립터는 원래 uint8).
+    정수가 아닌 float 디스크립터는 float16으로 저장합니다.
+    """
+    if des.dtype == np.uint8:
+        return des
+    if des.size and des.min() >= 0 and des.max() <= 255 and np.array_equal(des, np.round(des)):
+        return des.astype(np.uint8)
+    return des.astype(np.float16)
+
+
+def save_features(path, keypoints, descriptors):
+    """
+    특징점 좌표와 디스크립터를 .npz로 저장합니다 (임시 파일에 쓴 뒤 교체하여 깨진 캐시 방지).
+    keypoints는 cv2.KeyPoint 리스트 또는 (N, 2) 좌표 배열이며, 트래커는 좌표만 쓰므로 좌표만 저장합니다.
+    """
+    pts = keypoints if isinstance(keypoints, np.ndarray) else keypoints_to_array(keypoints)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, pts=np.asarray(pts, dtype=np.float32).reshape(-1, 2),
+                            des=compact_descriptors(descriptors))
+    os.replace(tmp_path, path)
+
+
+def load_features(path):
+    """
+    캐시된 특징점을 불러옵니다.
+
+    Returns:
+        tuple: (pts, descriptors). pts는 (N, 2) float32 좌표, 디스크립터는 저장된 dtype 그대로
+        (엔진의 prepare_descriptors로 변환해서 사용). 캐시가 없거나 손상되었으면 None.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as data:
+            pts = np.ascontiguousarray(data['pts'], dtype=np.float32).reshape(-1, 2)
+            descriptors = data['des']
+    except Exception:
+        return None
+    return pts, descriptors
+
+
+class DescriptorPCA:
+    """
+    맵 디스크립터를 PCA로 저차원 압축합니다 (SIFT 128차원 -> dims차원).
+
+    맵마다 주성분을 학습하여 맵 디스크립터를 투영해 두고, 매 프레임 화면 디스크립터도
+    같은 주성분으로 투영한 뒤 KD-tree에 질의합니다. 인덱스 메모리와 거리 계산량이
+    dims/128로 줄어드는 대신 구분력이 약간 떨어지므로 bench.py storage로 재현율을 확인하세요.
+    """
+
+    def __init__(self, mean, components):
+        self.mean = mean  # (D,) float32
+        self.components = components  # (dims, D) float32
+
+    @classmethod
+    def fit(cls, des, dims):
+        des = np.asarray(des, dtype=np.float32)
+        mean = des.mean(axis=0)
+        _, _, vt = np.linalg.svd(des - mean, full_matrices=False)
+        return cls(mean, np.ascontiguousarray(vt[:dims], dtype=np.float32))
+
+    @property
+    def dims(self):
+        return self.components.shape[0]
+
+    def project(self, des):
+        """(N, D) 디스크립터 -> (N, dims) 연속 float32 (KD-tree 질의에 바로 사용)"""
+        return np.ascontiguousarray((np.asarray(des, dtype=np.float32) - self.mean) @ self.components.T)
+
+    def reconstruct(self, des_pca):
+        """투영된 디스크립터를 원래 차원으로 근사 복원 (맵 검색 인덱스 학습용)"""
+        return des_pca @ self.components + self.mean
@@ -5,8 +5,11 @@ import pyperclip
 import pyautogui
 import keyboard
 import cv2
-import numpy as np
-import mss
+from src.template_match import TemplateMatcher
+from src.capture import create_grabber, set_frame_source
+from src.recording import ReplaySession
+from src.blob_detector import hsv_range_from_config
+from src.registration import REGISTRATION_MODELS
 from PyQt5.QtWidgets import (QWidget, QPushButton, QLabel, QVBoxLayout, QHBoxLayout,
                              QFileDialog, QApplication, QRubberBand, QMainWindow, 
                              QInputDialog, QCheckBox, QComboBox, QLineEdit, QSpinBox,
@@ -141,48 +144,33 @@ class DeliveryWorker(QThread):
     progress_signal = pyqtSignal(str)
     finished_signal = pyqtSignal(bool, str)
     
-    def __init__(self, config, run_data, sct):
+    def __init__(self, config, run_data):
         super().__init__()
         self.config = config
         self.run_data = run_data
-        self.sct = sct
+        self.grabber = create_grabber()  # mss는 첫 캡처 때 워커 스레드에서 생성
         self.is_running = True
         
     def find_image(self, img_path, timeout=30, threshold=0.7):
         """이미지 찾기 (타임아웃 지원)"""
         start_time = time.time()
         
-        # 템플릿 로드
-        try:
-            img_array = np.fromfile(img_path, np.uint8)
-            template = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-            if template is None:
-                return None
-        except:
+        # 템플릿 로드 (축소 그레이스케일로 후보 -> 원본 해상도 컬러로 정밀 매칭)
+        matcher = TemplateMatcher.from_file(img_path, grayscale=False)
+        if matcher is None:
             return None
-            
-        h, w = template.shape[:2]
         
         while time.time() - start_time < timeout:
             if not self.is_running: return None
             
             try:
-                # 스크린샷 캡처 (스레드 안전을 위해 매번 생성)
-                with mss.mss() as sct:
-                    monitor = sct.monitors[1]
-                    screenshot = sct.grab(monitor)
-                    img = np.array(screenshot)
-                
-                img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+                # 스크린샷 캡처 (mss는 이 워커 스레드에서 생성되어 재사용, BGR 버퍼도 재사용)
+                img = self.grabber.grab_bgr()
                 
-                # 매칭
-                res = cv2.matchTemplate(img, template, cv2.TM_CCOEFF_NORMED)
-                min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
-                
-                if max_val >= threshold:
-                    center_x = max_loc[0] + w // 2
-                    center_y = max_loc[1] + h // 2
-                    return (center_x, center_y)
+                # 매칭 (이미 BGR이라 매처에서 추가 변환 없음)
+                found = matcher.find(img, threshold)
+                if found:
+                    return found[:2]
             except:
                 pass
             
@@ -201,13 +189,8 @@ class DeliveryWorker(QThread):
             self.progress_signal.emit(f"'{name}' 못 찾음")
             # 디버깅용 이미지 저장
             try:
-                with mss.mss() as sct:
-                    monitor = sct.monitors[1]
-                    screenshot = sct.grab(monitor)
-                    img = np.array(screenshot)
-                
-                # mss raw is BGRA. cvtColor BGRA2BGR
-                img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+                # mss raw is BGRA -> BGR 한 번 변환
+                img = self.grabber.grab_bgr()
                 
                 # Windows cv2.imwrite 한글 경로 문제 회피
                 filename = f"debug_fail_{int(time.time())}.png"
@@ -330,6 +313,8 @@ class DeliveryWorker(QThread):
             
         except Exception as e:
             self.finished_signal.emit(False, f"에러 발생: {str(e)}")
+        finally:
+            self.grabber.close()
 
     def stop(self):
         self.is_running = False
@@ -344,7 +329,6 @@ class DeliveryWidget(QWidget):
             'delivery_pos': {'x': 0, 'y': 0}, 'receiver_pos': {'x': 0, 'y': 0},
             'charge1_pos': {'x': 0, 'y': 0}, 'charge2_pos': {'x': 0, 'y': 0}
         }
-        self.sct = None
         self.init_ui()
         
     def init_ui(self):
@@ -493,9 +477,6 @@ class DeliveryWidget(QWidget):
             self.lbl_status.setText("닉네임과 가격을 입력하세요")
             return
             
-        if self.sct is None:
-            self.sct = mss.mss()
-            
         run_data = {
             'nickname': nickname,
             'quantity': self.spin_qty.value(),
@@ -532,7 +513,7 @@ class DeliveryWidget(QWidget):
         
         # (연결 해제는 _on_dewy_arrived에서 처리됨)
         
-        self.worker = DeliveryWorker(self.config, run_data, self.sct)
+        self.worker = DeliveryWorker(self.config, run_data)
         self.worker.progress_signal.connect(self.update_status)
         self.worker.finished_signal.connect(self.on_finished)
         self.worker.start()
@@ -554,12 +535,12 @@ class DeliveryWidget(QWidget):
         
         try:
             self.lbl_status.setText("이미지 인식 테스트 중...")
-            with mss.mss() as sct:
-                monitor = sct.monitors[1]
-                screenshot = sct.grab(monitor)
-                img = np.array(screenshot)
-            
-            img_color = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+            # 모든 템플릿이 같은 컬러 화면을 쓰므로 BGRA에서 한 번만 변환
+            grabber = create_grabber()
+            try:
+                img_color = grabber.grab_bgr()
+            finally:
+                grabber.close()
             
             for key, status_lbl in self.img_status_labels.items():
                 path = self.config.get(key)
@@ -570,15 +551,13 @@ class DeliveryWidget(QWidget):
                     
                 try:
                     # 템플릿 로드
-                    img_array = np.fromfile(path, np.uint8)
-                    template = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-                    if template is None:
+                    matcher = TemplateMatcher.from_file(path, grayscale=False)
+                    if matcher is None:
                         status_lbl.setText("로드 실패")
                         continue
                         
-                    # 컬러 매칭
-                    res = cv2.matchTemplate(img_color, template, cv2.TM_CCOEFF_NORMED)
-                    _, max_val, _, _ = cv2.minMaxLoc(res)
+                    # coarse-to-fine 매칭 (점수는 컬러 매칭 기준)
+                    max_val, _ = matcher.match(img_color)
                     
                     if max_val >= 0.7:
                         status_lbl.setText(f"✅ {int(max_val*100)}%")
@@ -606,11 +585,11 @@ class PurchaseWorker(QThread):
     progress_signal = pyqtSignal(str)
     finished_signal = pyqtSignal(bool, str)
     
-    def __init__(self, config, qty, sct):
+    def __init__(self, config, qty):
         super().__init__()
         self.config = config
         self.qty = qty
-        self.sct = sct
+        self.grabber = create_grabber()  # mss는 첫 캡처 때 워커 스레드에서 생성
         self.is_running = True
         
     def press_key(self, key, duration=0.1):
@@ -620,26 +599,17 @@ class PurchaseWorker(QThread):
         
     def find_image(self, img_path, timeout=5, threshold=0.7):
         start_time = time.time()
-        try:
-            img_array = np.fromfile(img_path, np.uint8)
-            template = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-            if template is None: return None
-        except: return None
+        matcher = TemplateMatcher.from_file(img_path, grayscale=False)
+        if matcher is None: return None
         
         while time.time() - start_time < timeout:
             if not self.is_running: return None
             try:
-                with mss.mss() as sct:
-                    monitor = sct.monitors[1]
-                    img = np.array(sct.grab(monitor))
-                img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+                img = self.grabber.grab_bgr()
                 
-                res = cv2.matchTemplate(img, template, cv2.TM_CCOEFF_NORMED)
-                _, max_val, _, max_loc = cv2.minMaxLoc(res)
-                
-                if max_val >= threshold:
-                    h, w = template.shape[:2]
-                    return (max_loc[0] + w // 2, max_loc[1] + h // 2)
+                found = matcher.find(img, threshold)
+                if found:
+                    return found[:2]
             except: pass
             time.sleep(0.3)
         return None
@@ -683,6 +653,8 @@ class PurchaseWorker(QThread):
             
         except Exception as e:
             self.finished_signal.emit(False, f"에러: {e}")
+        finally:
+            self.grabber.close()
             
     def stop(self):
         self.is_running = False
@@ -696,7 +668,6 @@ class PurchaseWidget(QWidget):
             'purchase_pos': {'x': 0, 'y': 0},
             'confirm_img': ''
         }
-        self.sct = None
         self.init_ui()
         
     def init_ui(self):
@@ -799,8 +770,7 @@ class PurchaseWidget(QWidget):
     def _run_worker(self):
         # (기존 disconnect 제거됨 - _on_doran_arrived에서 처리)
         
-        if self.sct is None: self.sct = mss.mss()
-        self.worker = PurchaseWorker(self.config, self.spin_qty.value(), self.sct)
+        self.worker = PurchaseWorker(self.config, self.spin_qty.value())
         self.worker.progress_signal.connect(lambda m: self.lbl_status.setText(m))
         self.worker.finished_signal.connect(self.on_finished)
         self.worker.start()
@@ -931,6 +901,7 @@ class NavigationOverlay(QWidget):
     # 핫키에서 Qt 스레드로 안전하게 시그널 전달
     toggle_signal = pyqtSignal()
     movement_finished = pyqtSignal() # 이동 완료 시그널
+    moving_changed = pyqtSignal(bool) # 자동 이동 시작/중지 (트래커 처리 주기 조절용)
     delivery_requested = pyqtSignal(str, int, str) # 배송 요청 (닉네임, 수량, 가격)
     
     def __init__(self):
@@ -944,6 +915,7 @@ class NavigationOverlay(QWidget):
         self.current_map = None
         self.current_x = 0
         self.current_y = 0
+        self.predicted_x = None  # 트래커가 지연을 보정해 외삽한 '지금' X (없으면 current_x 사용)
         self.available_maps = []  # [{'name': str, 'path': str, 'portals': {target_map: x_coord}}]
         
         # NPC 데이터: {npc_name: {'image_path': str, 'map': str, 'x': int}}
@@ -963,9 +935,9 @@ class NavigationOverlay(QWidget):
         
         # NPC 이동 상태
         self.target_npc = None  # 현재 이동 중인 NPC 이름
-        self.npc_template = None  # NPC 이미지 템플릿 (cv2 형식)
+        self.npc_template = None  # NPC 이미지 템플릿 (TemplateMatcher)
         self.npc_detect_threshold = 0.7  # NPC 감지 임계값
-        self.sct = None  # mss 스크린샷 객체
+        self.grabber = None  # FrameGrabber 또는 녹화 재생 (NPC 감지용 화면 캡처)
         
         # 타이머 (이동 상태 체크용)
         self.move_timer = QTimer()
@@ -1215,6 +1187,8 @@ class NavigationOverlay(QWidget):
     def update_coords(self, name, x, y):
         """현재 좌표 업데이트"""
         prev_map = self.current_map
+        if prev_map != name:
+            self.predicted_x = None  # 다른 맵의 예측 좌표는 의미 없음
         self.current_map = name
         self.current_x = x
         self.current_y = y
@@ -1302,10 +1276,9 @@ class NavigationOverlay(QWidget):
             self.lbl_status.setText(f"{npc_name} 위치가 설정되지 않았습니다")
             return
         
-        # NPC 템플릿 이미지 로드
+        # NPC 템플릿 이미지 로드 (coarse-to-fine 매처, 정밀 매칭은 컬러)
         try:
-            img_array = np.fromfile(npc_info['image_path'], np.uint8)
-            self.npc_template = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+            self.npc_template = TemplateMatcher.from_file(npc_info['image_path'], grayscale=False)
             if self.npc_template is None:
                 self.lbl_status.setText(f"{npc_name} 이미지 로드 실패")
                 return
@@ -1313,9 +1286,9 @@ class NavigationOverlay(QWidget):
             self.lbl_status.setText(f"이미지 로드 오류: {str(e)}")
             return
         
-        # mss 초기화
-        if self.sct is None:
-            self.sct = mss.mss()
+        # 화면 캡처 초기화
+        if self.grabber is None:
+            self.grabber = create_grabber()
         
         self.target_npc = npc_name
         self.target_map = npc_info['map']
@@ -1336,6 +1309,7 @@ class NavigationOverlay(QWidget):
             self.map_change_timeout = 0
         
         self.is_moving = True
+        self.moving_changed.emit(True)
         self.btn_move.setEnabled(False)
         
         # NPC 버튼 스타일 변경
@@ -1365,26 +1339,17 @@ class NavigationOverlay(QWidget):
     
     def detect_npc(self):
         """화면에서 NPC 이미지 감지, 감지되면 위치 반환"""
-        if self.npc_template is None or self.sct is None:
+        if self.npc_template is None or self.grabber is None:
             return None
         
         try:
-            # 전체 화면 캡처
-            monitor = self.sct.monitors[1]
-            screenshot = self.sct.grab(monitor)
-            img_screen = np.array(screenshot)
-            img_screen_bgr = cv2.cvtColor(img_screen, cv2.COLOR_BGRA2BGR)
-            
-            # 템플릿 매칭
-            result = cv2.matchTemplate(img_screen_bgr, self.npc_template, cv2.TM_CCOEFF_NORMED)
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+            # 전체 화면 캡처 (BGRA -> BGR 재사용 버퍼)
+            img_screen = self.grabber.grab_bgr()
             
-            if max_val >= self.npc_detect_threshold:
-                # NPC 발견! 중심 좌표 계산
-                h, w = self.npc_template.shape[:2]
-                center_x = max_loc[0] + w // 2
-                center_y = max_loc[1] + h // 2
-                return (center_x, center_y, max_val)
+            # 템플릿 매칭 (NPC 발견 시 중심 좌표와 점수)
+            found = self.npc_template.find(img_screen, self.npc_detect_threshold)
+            if found:
+                return found
         except Exception as e:
             print(f"NPC 감지 오류: {e}")
         
@@ -1423,6 +1388,7 @@ class NavigationOverlay(QWidget):
             self.map_change_timeout = 0
         
         self.is_moving = True
+        self.moving_changed.emit(True)
         self.btn_move.setText("정지")
         self.btn_move.setStyleSheet("""
             QPushButton {
@@ -1452,6 +1418,7 @@ class NavigationOverlay(QWidget):
     def stop_movement(self):
         """자동 이동 중지"""
         self.is_moving = False
+        self.moving_changed.emit(False)
         self.move_phase = 'idle'
         self.move_timer.stop()
         self.portal_x = None
@@ -1590,13 +1557,20 @@ class NavigationOverlay(QWidget):
         self.stop_movement()
         self.movement_finished.emit()
     
+    def update_predicted(self, name, x, y):
+        """트래커의 지연 보정 예측 좌표 업데이트 (현재 맵일 때만)"""
+        if name == self.current_map:
+            self.predicted_x = x
+
     def _move_to_x(self, target_x, on_arrive=None):
         """특정 X 좌표로 이동"""
         # 현재 좌표가 없으면(미니맵 인식 실패 등) 대기
         if self.current_x == 0:
             return
-            
-        diff = target_x - self.current_x
+        
+        # 캡처~처리 지연 동안 이미 움직였으므로 예측 위치 기준으로 판단 (목표 지나침 방지)
+        pos_x = self.predicted_x if self.predicted_x is not None else self.current_x
+        diff = target_x - pos_x
         
         # 목적지에 도달했는지 확인 (±tolerance)
         if abs(diff) <= self.tolerance:
@@ -1868,6 +1842,10 @@ class MainWindow(QMainWindow):
         self.current_search_region = None
         self.current_search_region = None
         self.show_detection_overlay = True  # 미니맵 감지 오버레이 표시 여부
+        # 특징점 엔진 설정 {'detector': 'sift'|'orb'|'akaze', 'matcher': 'kdtree'|'lsh'|'bf', 'nfeatures': int}
+        self.feature_engine_config = {'detector': 'sift', 'matcher': 'kdtree', 'nfeatures': 3000}
+        # 녹화 재생 설정 {'path': 녹화 폴더 (비우면 화면 캡처), 'realtime': bool, 'speed': float}
+        self.replay_config = {'path': '', 'realtime': True, 'speed': 1.0}
         self.delivery_queue = [] # 대기열 목록
         self.pending_delivery = None # 현재 진행 중인 배송 작업
         
@@ -1905,7 +1883,7 @@ class MainWindow(QMainWindow):
         self.lbl_region = QLabel("Search Area: Full Screen")
         
         # Map Loading
-        self.btn_load_map = QPushButton("Add Minimap (Max 2)")
+        self.btn_load_map = QPushButton("Add Minimap")
         self.btn_clear_maps = QPushButton("Clear Maps")
         self.lbl_map = QLabel("Maps: None")
         
@@ -2016,6 +1994,27 @@ class MainWindow(QMainWindow):
         self.chk_detection_overlay = QCheckBox("미니맵 감지 영역 표시")
         self.chk_detection_overlay.setChecked(True)
         
+        # 미니맵 정합 모델 (미니맵은 축 정렬 균일 스케일이라 translation/similarity로도 충분한 경우가 많음)
+        registration_layout = QHBoxLayout()
+        registration_layout.addWidget(QLabel("정합 모델:"))
+        self.combo_registration = QComboBox()
+        self.combo_registration.addItems(REGISTRATION_MODELS)
+        self.combo_registration.setCurrentText(self.tracker.engine.registration_model)
+        registration_layout.addWidget(self.combo_registration)
+        
+        # 색 덩어리 빠른 경로 (캐릭터 마커 색이 뚜렷할 때 템플릿 매칭 대신 HSV 색 범위로 검출)
+        self.chk_color_blob = QCheckBox("캐릭터 색 마커 빠른 검출")
+        
+        # 키포인트 학습 (맵 모델 가지치기)
+        self.chk_keypoint_training = QCheckBox("키포인트 학습 모드")
+        self.btn_save_pruned = QPushButton("학습 결과 저장 (맵 경량화)")
+        
+        # 세션 녹화 (성능 문제 재현용: recordings/ 폴더에 감지 영역/전체 화면 프레임 저장)
+        self.chk_record_session = QCheckBox("세션 녹화")
+        
+        # 단계별 처리 시간 통계 (상태 표시줄에는 1초마다 fps / 단계별 ms 요약)
+        self.btn_save_stats = QPushButton("처리 시간 통계 저장 (CSV)")
+        
         # Controls
         self.btn_start = QPushButton("Start Tracking")
         self.btn_stop = QPushButton("Stop Tracking")
@@ -2029,6 +2028,7 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.btn_load_map)
         layout.addWidget(self.btn_clear_maps)
         layout.addWidget(self.lbl_map)
+        layout.addLayout(registration_layout)
         # Hidden Portal Settings
         hp_section = QLabel("── 히든 포탈 설정 ──")
         hp_section.setStyleSheet("font-weight: bold; color: #666;")
@@ -2068,6 +2068,7 @@ class MainWindow(QMainWindow):
         layout.addSpacing(10)
         layout.addWidget(self.btn_load_image)
         layout.addWidget(self.lbl_image_status)
+        layout.addWidget(self.chk_color_blob)
         layout.addSpacing(10)
         layout.addWidget(self.lbl_coords)
         layout.addSpacing(10)
@@ -2087,6 +2088,10 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.lbl_npc_info)
         layout.addSpacing(10)
         layout.addWidget(self.chk_detection_overlay)
+        layout.addWidget(self.chk_keypoint_training)
+        layout.addWidget(self.btn_save_pruned)
+        layout.addWidget(self.chk_record_session)
+        layout.addWidget(self.btn_save_stats)
         layout.addStretch()
         layout.addWidget(self.btn_start)
         layout.addWidget(self.btn_stop)
@@ -2112,13 +2117,24 @@ class MainWindow(QMainWindow):
         self.btn_start.clicked.connect(self.start_tracking)
         self.btn_stop.clicked.connect(self.stop_tracking)
         self.chk_detection_overlay.stateChanged.connect(self.toggle_detection_overlay)
+        self.combo_registration.currentTextChanged.connect(self.tracker.set_registration_model)
+        self.chk_color_blob.stateChanged.connect(self.toggle_color_blob)
+        self.chk_keypoint_training.stateChanged.connect(self.toggle_keypoint_training)
+        self.btn_save_pruned.clicked.connect(self.save_pruned_models)
+        self.chk_record_session.stateChanged.connect(self.toggle_recording)
+        self.btn_save_stats.clicked.connect(self.save_timing_stats)
         
         self.tracker.position_update.connect(self.update_coordinates)
+        self.tracker.predicted_position.connect(self.nav_overlay.update_predicted)
         self.tracker.status_update.connect(self.update_status)
+        self.tracker.pruned_models_saved.connect(self.on_pruned_models_saved)
+        self.tracker.stats_update.connect(self.update_timing_stats)
         # self.tracker.map_dimensions.connect(self.map_viz.set_map_dimensions)
         self.tracker.map_region_update.connect(self.detection_overlay.update_region)
         
         self.nav_overlay.movement_finished.connect(self.on_movement_finished)
+        # 이동 중에만 트래커를 최고 속도로, 대기 중에는 낮은 주기로
+        self.nav_overlay.moving_changed.connect(self.tracker.set_position_demand)
         self.nav_overlay.delivery_requested.connect(self.process_delivery_request)
         self.delivery_widget.task_finished.connect(self.on_delivery_task_finished)
         self.purchase_widget.task_finished.connect(self.on_purchase_task_finished)
@@ -2136,16 +2152,13 @@ class MainWindow(QMainWindow):
         self.lbl_region.setText(f"Area: {x}, {y} ({w}x{h})")
 
     def load_map(self):
-        if len(self.current_maps) >= 2:
-            self.statusBar().showMessage("Max 2 maps allowed.")
-            return
-
         path, _ = QFileDialog.getOpenFileName(self, "Select Minimap Image", "", "Images (*.png *.jpg *.bmp)")
         if path:
             name, ok = QInputDialog.getText(self, "Map Name", "Enter name for this map:")
             if ok and name:
                 slot = len(self.current_maps)
                 if self.tracker.set_map_source(slot, name, path):
+                    self.tracker.build_map_index()
                     self.current_maps.append({'name': name, 'path': path, 'portals': {}})
                     self.update_map_label()
                     self.update_portal_combos()
@@ -2313,7 +2326,7 @@ class MainWindow(QMainWindow):
                 self.check_ready()
 
     def check_ready(self):
-        if self.tracker.map_ready and self.tracker.template is not None:
+        if self.tracker.engine.ready:
             self.btn_start.setEnabled(True)
         else:
             self.btn_start.setEnabled(False)
@@ -2334,7 +2347,10 @@ class MainWindow(QMainWindow):
         self.btn_select_region.setEnabled(False)
 
     def stop_tracking(self):
-        self.tracker.stop()
+        self.tracker.stop()  # 녹화 중이면 녹화도 끝남
+        self.chk_record_session.blockSignals(True)
+        self.chk_record_session.setChecked(False)
+        self.chk_record_session.blockSignals(False)
         self.nav_overlay.stop_movement()  # 이동 중이면 중지
         self.nav_overlay.hide()
         self.detection_overlay.hide()
@@ -2345,6 +2361,56 @@ class MainWindow(QMainWindow):
         self.btn_load_image.setEnabled(True)
         self.btn_select_region.setEnabled(True)
 
+    def toggle_color_blob(self, state):
+        """캐릭터 마커를 색 범위로 먼저 찾고, 모호하면 템플릿 매칭 (HSV 범위는 config의 color_blob)"""
+        self.tracker.set_color_blob(state == Qt.Checked, self.tracker.engine.color_blob_hsv)
+
+    def toggle_keypoint_training(self, state):
+        """학습 모드에서는 트래킹하는 동안 맵 특징점별 inlier 횟수를 기록"""
+        self.tracker.set_training(state == Qt.Checked)
+
+    def save_pruned_models(self):
+        # 트래킹 중이면 트래커 스레드가 프레임 사이에 저장하고 pruned_models_saved로 결과를 알림
+        self.tracker.save_pruned_models()
+        self.chk_keypoint_training.blockSignals(True)
+        self.chk_keypoint_training.setChecked(False)
+        self.chk_keypoint_training.blockSignals(False)
+
+    def on_pruned_models_saved(self, saved):
+        if saved == 0:
+            self.update_status(f"저장할 학습 결과가 없습니다 (맵당 최소 {self.tracker.engine.prune_min_frames} 프레임 필요)")
+
+    def toggle_recording(self, state):
+        """트래킹하는 동안 캡처한 프레임을 녹화 (녹화 재생 중이나 파이프라인 모드가 아닐 때만)"""
+        if state == Qt.Checked:
+            if self.replay_config.get('path') or self.tracker.pipelined:
+                self.update_status("녹화 재생 중에는 녹화할 수 없습니다" if self.replay_config.get('path')
+                                   else "파이프라인 모드에서는 녹화할 수 없습니다")
+                self.chk_record_session.blockSignals(True)
+                self.chk_record_session.setChecked(False)
+                self.chk_record_session.blockSignals(False)
+                return
+            self.tracker.start_recording()
+        else:
+            self.tracker.stop_recording()
+
+    def update_timing_stats(self, stats):
+        """상태 표시줄 툴팁에 단계별 처리 시간 (최근 프레임 기준 p50 / p99 / 최대) 표시"""
+        lines = [f"{stats['fps']:.1f} fps ({stats['frames']} frames)"]
+        for stage, s in sorted(stats['stages'].items()):
+            lines.append(f"{stage}: {s['p50']:.1f} / {s['p99']:.1f} / {s['max']:.1f} ms")
+        self.statusBar().setToolTip("\n".join(lines))
+
+    def save_timing_stats(self):
+        """트래커 단계별 처리 시간 통계(최근 프레임 기준 백분위/히스토그램)를 CSV로 저장"""
+        path, _ = QFileDialog.getSaveFileName(self, "Save Timing Stats", time.strftime("timing-%Y%m%d-%H%M%S.csv"),
+                                              "CSV (*.csv)")
+        if path:
+            try:
+                self.tracker.dump_stats(path)
+            except OSError as e:
+                self.update_status(f"통계 저장 실패: {e}")
+
     def toggle_detection_overlay(self, state):
         self.show_detection_overlay = state == Qt.Checked
         if self.tracker.running:
@@ -2396,15 +2462,69 @@ class MainWindow(QMainWindow):
                 with open("config.json", "r", encoding='utf-8') as f:
                     config = json.load(f)
                     
+                # 특징점 엔진 설정 (맵보다 먼저 적용해야 맵 디스크립터가 같은 엔진으로 계산됨)
+                if 'feature_engine' in config and isinstance(config['feature_engine'], dict):
+                    self.feature_engine_config = config['feature_engine']
+                    try:
+                        self.tracker.set_feature_engine(**self.feature_engine_config)
+                    except (TypeError, ValueError) as e:
+                        print(f"Invalid feature_engine config: {e}")
+                
+                # 맵 디스크립터 PCA 압축 차원 (없거나 null이면 원본 디스크립터)
+                if config.get('descriptor_pca_dims'):
+                    self.tracker.engine.descriptor_pca_dims = int(config['descriptor_pca_dims'])
+                
+                # 미니맵 정합 모델 (translation / similarity / homography)
+                if config.get('registration_model') in REGISTRATION_MODELS:
+                    self.combo_registration.setCurrentText(config['registration_model'])
+                
+                # 병렬 매칭 스레드 수 (1이면 직렬)
+                if config.get('match_workers'):
+                    self.tracker.set_match_workers(config['match_workers'])
+                
+                # 파이프라인 모드 (캡처/검출 프로세스 분리)
+                if 'pipeline' in config and isinstance(config['pipeline'], dict):
+                    self.tracker.pipelined = bool(config['pipeline'].get('enabled', False))
+                    self.tracker.pipeline_detectors = int(config['pipeline'].get('detectors', 2))
+                
+                # 트래커 처리 주기 (이동 중 목표 fps / 대기 중 fps)
+                if 'tracker_fps' in config and isinstance(config['tracker_fps'], dict):
+                    self.tracker.engine.target_fps = float(config['tracker_fps'].get('target', self.tracker.engine.target_fps))
+                    self.tracker.engine.heartbeat_fps = float(config['tracker_fps'].get('idle', self.tracker.engine.heartbeat_fps))
+                # 색 덩어리 빠른 경로 (HSV 범위를 지정하지 않으면 캐릭터 이미지에서 추정)
+                if 'color_blob' in config and isinstance(config['color_blob'], dict):
+                    self.tracker.set_color_blob(bool(config['color_blob'].get('enabled', False)),
+                                                hsv_range_from_config(config['color_blob']))
+                    self.chk_color_blob.blockSignals(True)
+                    self.chk_color_blob.setChecked(self.tracker.engine.color_blob)
+                    self.chk_color_blob.blockSignals(False)
+                if 'motion_model' in config and isinstance(config['motion_model'], dict):
+                    self.tracker.engine.motion_model = bool(config['motion_model'].get('enabled', self.tracker.engine.motion_model))
+                    self.tracker.engine.prediction_lead = float(config['motion_model'].get('lead', self.tracker.engine.prediction_lead))
+                
+                # 녹화 재생: 화면 캡처 대신 녹화 폴더를 읽음 (트래커, 배달/구매 이미지 검색, NPC 감지)
+                if 'replay' in config and isinstance(config['replay'], dict):
+                    self.replay_config = dict(config['replay'])
+                    path = self.replay_config.get('path')
+                    if path:
+                        try:
+                            set_frame_source(ReplaySession(path, bool(self.replay_config.get('realtime', True)),
+                                                           float(self.replay_config.get('speed', 1.0))))
+                            self.update_status(f"녹화 재생: {path}")
+                        except Exception as e:
+                            self.update_status(f"녹화를 열 수 없습니다: {e}")
+                    
                 if 'maps' in config and isinstance(config['maps'], list):
                     for m in config['maps']:
-                         if len(self.current_maps) >= 2: break
                          if os.path.exists(m['path']):
                              slot = len(self.current_maps)
-                             if self.tracker.set_map_source(slot, m['name'], m['path']):
+                             if self.tracker.set_map_source(slot, m['name'], m['path'], m.get('nfeatures')):
                                  # 포탈 정보도 함께 로드
                                  map_data = {'name': m['name'], 'path': m['path'], 'portals': m.get('portals', {}), 'hidden_portal': m.get('hidden_portal', {})}
+                                 if m.get('nfeatures'):
+                                     map_data['nfeatures'] = m['nfeatures']  # 맵별 특징점 수
                                  self.current_maps.append(map_data)
+                    self.tracker.build_map_index()  # 맵을 다 불러온 뒤 검색 인덱스 한 번 구축
                     self.update_map_label()
                     self.update_portal_combos()
                     self.update_npc_map_combo()
@@ -2464,6 +2584,15 @@ class MainWindow(QMainWindow):
             'search_region': self.current_search_region,
             'show_detection_overlay': self.show_detection_overlay,
             'npc_data': self.npc_data,
+            'feature_engine': self.feature_engine_config,
+            'descriptor_pca_dims': self.tracker.engine.descriptor_pca_dims,
+            'registration_model': self.tracker.engine.registration_model,
+            'match_workers': self.tracker.engine.match_workers,
+            'pipeline': {'enabled': self.tracker.pipelined, 'detectors': self.tracker.pipeline_detectors},
+            'tracker_fps': {'target': self.tracker.engine.target_fps, 'idle': self.tracker.engine.heartbeat_fps},
+            'motion_model': {'enabled': self.tracker.engine.motion_model, 'lead': self.tracker.engine.prediction_lead},
+            'color_blob': dict(self.tracker.engine.color_blob_hsv or {}, enabled=self.tracker.engine.color_blob),
+            'replay': self.replay_config,
 
             'delivery_config': self.delivery_widget.get_config(),
             'purchase_config': self.purchase_widget.get_config()
@@ -0,0 +1,88 @@
+import numpy as np
+
+
+class ConstantVelocityKalman:
+    """
+    2D 등속 칼만 필터 (상태: x, y, vx, vy).
+
+    지수 평활은 걷는 동안 항상 실제 위치보다 뒤처지지만, 속도를 함께 추정하면
+    이동 중에도 지연 없이 노이즈만 줄일 수 있습니다. 측정마다 캡처 시각을 받아
+    프레임 간격이 고르지 않아도 정확히 예측하고, predict(t)로 캡처/처리 지연만큼
+    '지금' 위치를 외삽할 수 있습니다.
+
+    Args:
+        process_noise (float): 가속도 잡음 세기 (px^2/s^3). 클수록 방향 전환/정지에 빨리 반응.
+        measurement_noise (float): 측정 위치 분산 (px^2).
+        max_horizon (float): 예측 외삽 최대 시간 (초). 오래된 속도로 멀리 튀는 것을 방지.
+    """
+
+    def __init__(self, process_noise=500.0, measurement_noise=1.0, max_horizon=0.5):
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.max_horizon = max_horizon
+        self.H = np.array([[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0]])
+        self.reset()
+
+    def reset(self):
+        self.state = None  # [x, y, vx, vy]
+        self.P = None
+        self.timestamp = None
+
+    @property
+    def initialized(self):
+        return self.state is not None
+
+    @property
+    def position(self):
+        return None if self.state is None else (float(self.state[0]), float(self.state[1]))
+
+    @property
+    def velocity(self):
+        return None if self.state is None else (float(self.state[2]), float(self.state[3]))
+
+    def _transition(self, dt):
+        F = np.eye(4)
+        F[0, 2] = F[1, 3] = dt
+        q = self.process_noise
+        dt2, dt3 = dt * dt / 2.0, dt ** 3 / 3.0
+        Q = q * np.array([[dt3, 0, dt2, 0],
+                          [0, dt3, 0, dt2],
+                          [dt2, 0, dt, 0],
+                          [0, dt2, 0, dt]])
+        return F, Q
+
+    def update(self, measurement, timestamp, jump_threshold=None):
+        """
+        측정 위치 (x, y)와 캡처 시각(초)으로 상태를 갱신하고 필터링된 위치를 반환합니다.
+        예측 위치와 jump_threshold 이상 떨어지면(순간이동/포탈) 필터를 측정값으로 다시 시작합니다.
+        """
+        z = np.asarray(measurement, dtype=np.float64)
+        if self.state is None or (jump_threshold is not None
+                                  and np.linalg.norm(z - self.predict(timestamp, clamp=False)) >= jump_threshold):
+            self.state = np.array([z[0], z[1], 0.0, 0.0])
+            # 처음에는 속도를 모르므로 속도 분산을 크게 두어 다음 측정들로 빠르게 추정
+            self.P = np.diag([self.measurement_noise, self.measurement_noise, 1e4, 1e4])
+            self.timestamp = timestamp
+            return self.position
+
+        dt = max(0.0, timestamp - self.timestamp)
+        F, Q = self._transition(dt)
+        x = F @ self.state
+        P = F @ self.P @ F.T + Q
+
+        R = np.eye(2) * self.measurement_noise
+        S = self.H @ P @ self.H.T + R
+        K = P @ self.H.T @ np.linalg.inv(S)
+        self.state = x + K @ (z - self.H @ x)
+        self.P = (np.eye(4) - K @ self.H) @ P
+        self.timestamp = timestamp
+        return self.position
+
+    def predict(self, timestamp, clamp=True):
+        """상태를 바꾸지 않고 timestamp 시점의 위치를 외삽 (clamp면 최대 max_horizon초까지만)"""
+        if self.state is None:
+            return None
+        dt = max(0.0, timestamp - self.timestamp)
+        if clamp:
+            dt = min(dt, self.max_horizon)
+        return self.state[:2] + self.state[2:] * dt
@@ -0,0 +1,375 @@
+import time
+import queue
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+from src.features import FeatureEngine
+from src.capture import FrameGrabber
+from src.engine import TrackerEngine
+
+
+class SharedFrameRing:
+    """
+    프로세스 간 프레임 전달용 공유 메모리 링 버퍼 (쓰기 1개, 읽기 여러 개).
+
+    캡처 프로세스가 슬롯을 돌아가며 덮어쓰고, 검출 프로세스는 항상 '가장 최근' 프레임만
+    가져갑니다 (claim_latest). 처리 중에 쌓인 이전 프레임은 버려지므로 검출이 캡처보다 느려도
+    지연이 누적되지 않습니다. 여러 검출 프로세스가 같은 프레임을 중복 처리하지 않도록
+    가져간 순번(claimed)을 공유합니다.
+
+    슬롯마다 순번을 기록해 두고 복사 전/후로 비교하므로(seqlock), 읽는 도중 캡처가 같은
+    슬롯을 덮어쓴 경우는 찢어진 프레임 대신 None이 반환됩니다.
+
+    슬롯마다 소스의 캡처 시각(녹화 재생이면 녹화 시각)과 링에 쓴 벽시계 시각을 함께 기록합니다.
+    active는 가져갔지만 아직 결과를 내지 않은 프레임 수입니다 (소스가 끝난 뒤 남은 처리 확인용).
+    """
+
+    def __init__(self, shape, slots=4, ctx=None):
+        ctx = ctx or mp.get_context()
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.latest = ctx.Value('q', -1)  # 마지막으로 쓴 프레임 순번
+        self.claimed = ctx.Value('q', -1)  # 검출 프로세스가 마지막으로 가져간 순번
+        self.active = ctx.Value('i', 0)  # 처리 중인 프레임 수 (claim_latest에서 +1, release에서 -1)
+        self.shm = shared_memory.SharedMemory(create=True, size=self._nbytes())
+        self.owner = True
+        self._attach_views()
+        self.slot_seq[:] = -1
+
+    def _nbytes(self):
+        # 헤더 (슬롯 순번 int64 + 캡처 시각 float64 + 쓴 시각 float64) + 프레임 슬롯
+        return 24 * self.slots + self.slots * int(np.prod(self.shape))
+
+    def _attach_views(self):
+        buf = self.shm.buf
+        self.slot_seq = np.ndarray((self.slots,), np.int64, buf, 0)
+        self.slot_time = np.ndarray((self.slots,), np.float64, buf, 8 * self.slots)
+        self.slot_written = np.ndarray((self.slots,), np.float64, buf, 16 * self.slots)
+        self.frames = np.ndarray((self.slots,) + self.shape, np.uint8, buf, 24 * self.slots)
+
+    def __getstate__(self):
+        # 자식 프로세스에는 공유 메모리 이름만 넘기고, 그쪽에서 다시 연결
+        return self.shm.name, self.shape, self.slots, self.latest, self.claimed, self.active
+
+    def __setstate__(self, state):
+        name, self.shape, self.slots, self.latest, self.claimed, self.active = state
+        self.shm = shared_memory.SharedMemory(name=name)
+        self.owner = False
+        self._attach_views()
+
+    def write(self, frame, timestamp=None):
+        """
+        프레임을 다음 슬롯에 복사하고 최신 순번으로 공개합니다. 쓴 순번을 반환.
+        timestamp는 소스의 캡처 시각 (없으면 지금).
+        """
+        seq = self.latest.value + 1
+        i = seq % self.slots
+        self.slot_seq[i] = -1  # 쓰는 중 표시
+        np.copyto(self.frames[i], frame)
+        now = time.time()
+        self.slot_time[i] = now if timestamp is None else timestamp
+        self.slot_written[i] = now
+        self.slot_seq[i] = seq
+        with self.latest.get_lock():
+            self.latest.value = seq
+        return seq
+
+    def claim_latest(self):
+        """아직 아무도 가져가지 않은 최신 프레임 순번 (없으면 None). 처리가 끝나면 release를 불러야 함"""
+        with self.claimed.get_lock():
+            seq = self.latest.value
+            if seq < 0 or seq <= self.claimed.value:
+                return None
+            self.claimed.value = seq
+            with self.active.get_lock():
+                self.active.value += 1
+        return seq
+
+    def release(self):
+        """claim_latest로 가져간 프레임 하나의 처리를 마침"""
+        with self.active.get_lock():
+            self.active.value -= 1
+
+    @property
+    def drained(self):
+        """쓴 프레임이 모두 처리되었으면 True (남은 프레임은 가져갔고 처리 중인 것도 없음)"""
+        with self.claimed.get_lock():
+            return self.claimed.value >= self.latest.value and self.active.value == 0
+
+    def read(self, seq, out=None):
+        """
+        순번 seq 프레임을 복사해 (frame, timestamp, written_at)으로 반환합니다.
+        timestamp는 소스의 캡처 시각, written_at은 링에 쓴 시각 (time.time 기준).
+        이미 다른 프레임으로 덮어썼으면 None.
+        """
+        i = seq % self.slots
+        if self.slot_seq[i] != seq:
+            return None
+        if out is None:
+            out = np.empty(self.shape, np.uint8)
+        np.copyto(out, self.frames[i])
+        timestamp = float(self.slot_time[i])
+        written_at = float(self.slot_written[i])
+        if self.slot_seq[i] != seq:
+            return None
+        return out, timestamp, written_at
+
+    def close(self):
+        # numpy 뷰가 버퍼를 잡고 있으면 close가 실패하므로 먼저 해제
+        self.slot_seq = self.slot_time = self.slot_written = self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class MssSource:
+    """
+    mss 화면 캡처 소스 (캡처 프로세스 안에서 생성). grab()은 BGRA (h, w, 4) 배열,
+    timestamp는 마지막 grab의 캡처 시각.
+    """
+
+    def __init__(self, rect):
+        self.rect = rect
+        self.grabber = FrameGrabber()
+
+    def grab(self):
+        # mss 원시 버퍼를 복사 없이 감싸기 (링 버퍼에 쓸 때 한 번만 복사됨)
+        return self.grabber.grab(self.rect)
+
+    @property
+    def timestamp(self):
+        return self.grabber.timestamp
+
+    def close(self):
+        self.grabber.close()
+
+
+def capture_loop(ring, source_spec, stop_event, fps):
+    """
+    캡처 프로세스 본체: source_spec = (팩토리, kwargs)로 소스를 만들고 fps에 맞춰 링 버퍼에 씀.
+    fps는 공유 Value라 실행 중에도 바꿀 수 있음 (0이면 쉬지 않고 캡처).
+    소스에 timestamp가 있으면 프레임의 캡처 시각으로 함께 기록합니다 (녹화 재생이면 녹화 시각).
+    소스가 끝나면(grab이 None) 정상 종료하고, 캡처 중 예외가 나면 프로세스가 0이 아닌 코드로 끝납니다.
+    """
+    factory, kwargs = source_spec
+    source = factory(**kwargs)
+    try:
+        while not stop_event.is_set():
+            interval = 1.0 / fps.value if fps.value > 0 else 0.0
+            t0 = time.perf_counter()
+            frame = source.grab()
+            if frame is None:  # 소스 끝 (녹화 재생 등)
+                break
+            ring.write(frame, getattr(source, 'timestamp', None))
+            remaining = interval - (time.perf_counter() - t0)
+            if remaining > 0:
+                time.sleep(remaining)
+    finally:
+        if hasattr(source, 'close'):
+            source.close()
+        ring.close()
+
+
+def detect_loop(ring, processor_spec, results, stop_event, idle_sleep=0.002):
+    """
+    검출 프로세스 본체: 최신 프레임만 가져와 처리하고 (seq, 캡처 시각, 결과, 링에 쓴 시각)을
+    results 큐에 넣습니다.
+    processor_spec = (팩토리, kwargs)이며 팩토리가 만든 객체는 frame(BGRA) -> 결과 호출이 가능해야 합니다.
+    """
+    factory, kwargs = processor_spec
+    try:
+        processor = factory(**kwargs)
+    except Exception as e:
+        # 처리기를 만들지 못하면 (맵/캐릭터 로드 실패 등) 순번 None인 오류 결과를 보내고 종료
+        now = time.time()
+        results.put((None, now, {'error': f"Detector init failed: {e}"}, now))
+        ring.close()
+        return
+    frame = np.empty(ring.shape, np.uint8)
+    try:
+        while not stop_event.is_set():
+            seq = ring.claim_latest()
+            if seq is None:
+                time.sleep(idle_sleep)
+                continue
+            try:
+                got = ring.read(seq, frame)
+                if got is None:
+                    continue  # 읽는 중 덮어씀 -> 다음 최신 프레임으로
+                _, timestamp, written_at = got
+                try:
+                    result = processor(frame)
+                except Exception as e:
+                    result = {'error': str(e)}
+                results.put((seq, timestamp, result, written_at))
+            finally:
+                ring.release()
+    finally:
+        ring.close()
+
+
+class CapturePipeline:
+    """
+    캡처 프로세스 1개 + 검출 프로세스 N개 파이프라인.
+
+    캡처와 검출이 서로 다른 프로세스에서 겹쳐 실행되므로 처리량이 단계별 시간의 합이 아니라
+    가장 느린 단계에 의해 정해지고, GIL 경쟁 없이 여러 코어를 씁니다.
+    poll()은 큐에 쌓인 결과 중 가장 최신 프레임의 결과만 돌려줍니다 (최신 프레임 우선).
+    Windows에서도 동작하도록 spawn 방식으로 프로세스를 띄우므로 소스/처리기 팩토리는
+    모듈 최상위에 정의된(피클 가능한) 클래스나 함수여야 합니다.
+    """
+
+    def __init__(self, shape, source_spec, processor_spec, detectors=2, slots=4, capture_fps=60):
+        self.shape = tuple(shape)
+        self.source_spec = source_spec
+        self.processor_spec = processor_spec
+        self.detectors = max(1, detectors)
+        self.slots = slots
+        self.ctx = mp.get_context('spawn')
+        self.capture_fps = self.ctx.Value('d', capture_fps, lock=False)
+        self.ring = None
+        self.stop_event = None
+        self.results = None
+        self.processes = []
+        self.last_seq = -1
+
+    def start(self):
+        self.ring = SharedFrameRing(self.shape, self.slots, self.ctx)
+        self.stop_event = self.ctx.Event()
+        self.results = self.ctx.Queue()
+        self.last_seq = -1
+        self.processes = [self.ctx.Process(target=capture_loop, daemon=True, name="capture",
+                                           args=(self.ring, self.source_spec, self.stop_event, self.capture_fps))]
+        for i in range(self.detectors):
+            self.processes.append(self.ctx.Process(target=detect_loop, daemon=True, name=f"detect-{i}",
+                                                   args=(self.ring, self.processor_spec, self.results,
+                                                         self.stop_event)))
+        for p in self.processes:
+            p.start()
+
+    def set_capture_fps(self, fps):
+        """캡처 주기 변경 (캡처 프로세스가 다음 프레임부터 반영)"""
+        self.capture_fps.value = fps
+
+    @property
+    def alive(self):
+        """캡처 프로세스와 검출 프로세스가 모두 실행 중이면 True"""
+        return bool(self.processes) and all(p.is_alive() for p in self.processes)
+
+    @property
+    def source_ended(self):
+        """캡처 소스가 끝나서(녹화 재생 끝 등) 캡처 프로세스가 정상 종료했으면 True"""
+        return bool(self.processes) and self.processes[0].exitcode == 0
+
+    @property
+    def finished(self):
+        """소스가 끝났고 이미 캡처한 프레임의 처리도 모두 끝났으면 True"""
+        return self.source_ended and self.ring.drained
+
+    def poll(self, timeout=0.05):
+        """
+        새 결과를 기다렸다가 (seq, timestamp, result, written_at)을 반환합니다 (없으면 None).
+        timestamp는 소스의 캡처 시각, written_at은 캡처 프로세스가 링에 쓴 시각 (time.time 기준).
+        여러 검출 프로세스의 결과는 순서가 뒤섞일 수 있으므로 이미 반환한 것보다 오래된 결과는 버립니다.
+        검출 프로세스 초기화 실패는 seq가 None인 결과로 바로 반환됩니다.
+        """
+        newest = None
+        try:
+            newest = self.results.get(timeout=timeout) if timeout else self.results.get_nowait()
+            if newest[0] is None:
+                return newest
+            while True:
+                packet = self.results.get_nowait()
+                if packet[0] is None:
+                    return packet
+                if packet[0] > newest[0]:
+                    newest = packet
+        except queue.Empty:
+            pass
+        if newest is None or newest[0] <= self.last_seq:
+            return None
+        self.last_seq = newest[0]
+        return newest
+
+    def stop(self, timeout=2.0):
+        if self.stop_event is not None:
+            self.stop_event.set()
+        for p in self.processes:
+            p.join(timeout)
+            if p.is_alive():
+                p.terminate()
+        self.processes = []
+        if self.results is not None:
+            self.results.close()
+            self.results = None
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+
+class FrameProcessor:
+    """
+    검출 프로세스에서 쓰는 프레임 처리기: TrackerEngine.measure로 맵 인식 + 정합 + 캐릭터 검색.
+
+    프레임마다 다른 프로세스가 처리할 수 있으므로 Homography 잠금, 예측 ROI, 스케일 고정처럼
+    직전 프레임 상태에 기대는 단계는 끄고, 평활/예측은 결과를 순서대로 받는 TrackerWorker가 합니다.
+    맵 특징점은 GUI 프로세스가 만든 feature_cache를 그대로 읽습니다 (use_feature_cache일 때).
+    맵 모델/검색에 영향을 주는 설정(PCA, 가지치기 모델, 학습 모드, 색 덩어리, sticky)은 직렬 모드와
+    같게 TrackerEngine.pipeline_spec에서 받으며, 맵이나 캐릭터를 불러오지 못하면 ValueError를 냅니다.
+    """
+
+    def __init__(self, maps, template_path, engine=None, registration_model='homography',
+                 ransac_threshold=5.0, min_match_count=10, char_threshold=0.65,
+                 scales=(0.8, 0.9, 1.0, 1.1, 1.2), descriptor_pca_dims=None, color_blob=False, color_blob_hsv=None,
+                 use_feature_cache=True, use_pruned_models=True, training=False, sticky_map=True):
+        self.engine = TrackerEngine()
+        self.engine.feature_engine = FeatureEngine(**(engine or {}))
+        self.engine.descriptor_pca_dims = descriptor_pca_dims
+        self.engine.set_color_blob(color_blob, color_blob_hsv)
+        self.engine.use_feature_cache = use_feature_cache
+        self.engine.use_pruned_models = use_pruned_models
+        self.engine.training = training
+        self.engine.sticky_map = sticky_map
+        self.engine.registration_model = registration_model
+        self.engine.ransac_threshold = ransac_threshold
+        self.engine.min_match_count = min_match_count
+        self.engine.char_threshold = char_threshold
+        self.engine.template_scale_factors = tuple(scales)
+        self.engine.homography_lock = False
+        self.engine.roi_search = False
+        self.engine.scale_lock = False
+        self.engine.fast_engine = None
+        self.engine.match_workers = 1  # 검출 프로세스 여러 개가 이미 코어를 나눠 씀
+
+        # maps: [{'slot', 'name', 'path', 'nfeatures'}]
+        for m in maps:
+            if not self.engine.set_map_source(m['slot'], m['name'], m['path'], m.get('nfeatures')):
+                raise ValueError(f"Failed to load map {m['name']}: {m['path']}")
+        self.engine.build_retrieval()
+        if not self.engine.set_template(template_path):
+            raise ValueError(f"Failed to load character image: {template_path}")
+
+    @property
+    def maps(self):
+        return self.engine.maps
+
+    def __call__(self, frame_bgra):
+        return self.process(frame_bgra)
+
+    def process(self, frame_bgra):
+        """
+        BGRA 프레임 하나를 처리합니다.
+
+        Returns:
+            dict: TrackerEngine.measure 결과. 맵을 못 찾으면 slot이 None, 찾으면 slot/name/w/h/
+            corners(화면 좌표 4x2)/target(맵 좌표 또는 None)/conf/matches.
+            timings는 이 프레임의 단계별 ms (TrackerWorker가 자기 StageTimer에 합침).
+        """
+        timer = self.engine.timer
+        with timer.stage('convert'):
+            bgr = cv2.cvtColor(frame_bgra, cv2.COLOR_BGRA2BGR)
+            gray = cv2.cvtColor(frame_bgra, cv2.COLOR_BGRA2GRAY)
+        result = self.engine.measure(bgr, gray)
+        result['timings'] = timer.end_frame()
+        return result
@@ -0,0 +1,151 @@
+import csv
+import threading
+import time
+import numpy as np
+
+# 처리 시간 히스토그램 구간 경계 (ms). 마지막 구간은 500ms 이상
+HISTOGRAM_EDGES_MS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# 상태 표시줄 요약에 보여 줄 단계 (순서대로, 기록된 것만). 'match/맵 이름'처럼 '/'가 들어간
+# 세부 단계(맵별 매칭, 스케일별 템플릿)는 CSV/스냅샷에만 나옴
+SUMMARY_STAGES = ('grab', 'convert', 'record', 'gate', 'lock', 'fast', 'detect', 'match', 'homography',
+                  'template', 'track', 'total', 'latency')
+
+# 링 버퍼를 생성 시점에 미리 할당하는 고정 단계 (세부 단계는 맵/스케일마다 처음 기록할 때 한 번 할당)
+FIXED_STAGES = SUMMARY_STAGES + ('map', 'character')
+
+
+class _Stage:
+    """with 블록 하나의 시간을 재는 컨텍스트 (StageTimer.stage가 만듦)"""
+    __slots__ = ('timer', 'name', 'start')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter_ns() - self.start)
+        return False
+
+
+class StageTimer:
+    """
+    트래커 루프의 단계별 처리 시간 기록기.
+
+    고정 단계(FIXED_STAGES)마다 capacity개짜리 int64 링 버퍼(ns)를 미리 할당해 두고 perf_counter_ns
+    차이만 기록하므로 기록 비용은 배열 쓰기 한 번입니다. 'match/맵 이름', 'template/x배율' 같은 세부 단계는
+    이름을 미리 알 수 없으므로 처음 기록할 때 링을 한 번 할당하고 이후에는 재사용합니다.
+    통계(평균/백분위/히스토그램)는 snapshot을 부를 때만 링에 남은 최근 capacity개 표본으로 계산합니다
+    (이동 창 히스토그램).
+    맵별 매칭처럼 스레드 풀에서 기록하는 단계가 있으므로 기록은 잠금으로 보호합니다.
+
+    end_frame을 부를 때까지 기록한 단계는 프레임별 합계(ms)로도 모아 두며, 이 값이
+    처리 결과의 timings가 됩니다 (다른 프로세스의 결과는 add_frame으로 합침).
+    """
+
+    def __init__(self, capacity=512, enabled=True):
+        self.capacity = capacity
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._samples = {stage: np.zeros(self.capacity, np.int64) for stage in FIXED_STAGES}  # ns
+            self._counts = dict.fromkeys(FIXED_STAGES, 0)  # 지금까지 기록한 표본 수 (링 위치 = count % capacity)
+            self._frame_ns = {}  # 진행 중인 프레임의 단계별 합계 (ns)
+            self._frame_ends = np.zeros(self.capacity, np.int64)  # 프레임 완료 시각 (fps 계산용)
+            self.frames = 0
+
+    def stage(self, name):
+        """with timer.stage('detect'): ... 로 블록 시간을 기록"""
+        return _Stage(self, name)
+
+    def add(self, stage, ns):
+        """단계 하나의 소요 시간(ns)을 기록"""
+        if not self.enabled:
+            return
+        with self._lock:
+            ring = self._samples.get(stage)
+            if ring is None:
+                ring = self._samples[stage] = np.zeros(self.capacity, np.int64)
+                self._counts[stage] = 0
+            n = self._counts[stage]
+            ring[n % self.capacity] = ns
+            self._counts[stage] = n + 1
+            self._frame_ns[stage] = self._frame_ns.get(stage, 0) + ns
+
+    def current_ms(self):
+        """진행 중인 프레임에서 지금까지 기록한 단계별 합계 (ms)"""
+        with self._lock:
+            return {stage: ns / 1e6 for stage, ns in self._frame_ns.items()}
+
+    def end_frame(self):
+        """프레임 하나를 마치고 (fps 계산에 반영) 이 프레임의 단계별 합계(ms)를 반환"""
+        with self._lock:
+            timings = {stage: ns / 1e6 for stage, ns in self._frame_ns.items()}
+            self._frame_ns = {}
+            if self.enabled:
+                self._frame_ends[self.frames % self.capacity] = time.perf_counter_ns()
+                self.frames += 1
+        return timings
+
+    def add_frame(self, timings):
+        """다른 곳(검출 프로세스)에서 잰 프레임 하나의 단계별 ms를 기록하고 프레임을 마침"""
+        for stage, ms in timings.items():
+            self.add(stage, int(ms * 1e6))
+        self.end_frame()
+
+    def fps(self):
+        """최근 프레임들의 완료 간격으로 계산한 처리 속도 (프레임이 2개 미만이면 0)"""
+        with self._lock:
+            n = min(self.frames, self.capacity)
+            if n < 2:
+                return 0.0
+            last = self._frame_ends[(self.frames - 1) % self.capacity]
+            first = self._frame_ends[(self.frames - n) % self.capacity]
+        return (n - 1) * 1e9 / max(1, last - first)
+
+    def snapshot(self):
+        """
+        현재 통계. {'fps', 'frames', 'stages': {단계: {'count', 'mean', 'p50', 'p90', 'p99', 'max', 'histogram'}}}
+        시간 값은 ms이고, count는 누적 표본 수, 나머지는 최근 capacity개 표본 기준입니다.
+        histogram은 HISTOGRAM_EDGES_MS 구간별 표본 수 (길이 = 구간 경계 수 + 1).
+        """
+        with self._lock:
+            samples = {stage: (self._counts[stage], ring[:min(self._counts[stage], self.capacity)].copy())
+                       for stage, ring in self._samples.items() if self._counts[stage]}
+            frames = self.frames
+        stages = {}
+        for stage, (count, ring) in samples.items():
+            ms = ring / 1e6
+            p50, p90, p99 = np.percentile(ms, (50, 90, 99))
+            histogram = np.bincount(np.searchsorted(HISTOGRAM_EDGES_MS, ms, side='right'),
+                                    minlength=len(HISTOGRAM_EDGES_MS) + 1)
+            stages[stage] = {'count': count, 'mean': float(ms.mean()), 'p50': float(p50), 'p90': float(p90),
+                             'p99': float(p99), 'max': float(ms.max()), 'histogram': histogram.tolist()}
+        return {'fps': self.fps(), 'frames': frames, 'stages': stages}
+
+    def summary(self, snapshot=None):
+        """한 줄 요약: '28.5 fps | grab 1.2 | detect 6.3 | ... ms' (단계별 최근 중앙값)"""
+        snapshot = snapshot or self.snapshot()
+        stages = snapshot['stages']
+        parts = [f"{stage} {stages[stage]['p50']:.1f}" for stage in SUMMARY_STAGES if stage in stages]
+        if not parts:
+            return f"{snapshot['fps']:.1f} fps"
+        return f"{snapshot['fps']:.1f} fps | " + ' | '.join(parts) + " ms"
+
+    def write_csv(self, path, snapshot=None):
+        """스냅샷을 CSV로 저장 (단계별 한 줄, 히스토그램 구간은 열로)"""
+        snapshot = snapshot or self.snapshot()
+        bins = [f"<{edge}ms" for edge in HISTOGRAM_EDGES_MS] + [f">={HISTOGRAM_EDGES_MS[-1]}ms"]
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['stage', 'count', 'mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'] + bins)
+            for stage, s in sorted(snapshot['stages'].items()):
+                writer.writerow([stage, s['count']] + [f"{s[k]:.3f}" for k in ('mean', 'p50', 'p90', 'p99', 'max')]
+                                + s['histogram'])
@@ -0,0 +1,76 @@
+import os
+import numpy as np
+from src.features import FEATURE_CACHE_DIR, keypoints_to_array
+from src.registration import estimate_transform
+
+
+def pruned_model_path(key, cache_dir=FEATURE_CACHE_DIR):
+    """가지치기된 맵 모델 경로 (특징점 캐시와 같은 키: 이미지 해시 + 검출기 설정)"""
+    return os.path.join(cache_dir, f"{key}.pruned.npz")
+
+
+class KeypointUsage:
+    """
+    맵 특징점별로 RANSAC inlier가 된 횟수를 셉니다.
+
+    맵 스크린샷의 특징점 중 상당수(UI 테두리, 압축 잡음, 캐릭터 스프라이트 등)는
+    실제 미니맵 프레임과 한 번도 맞지 않습니다. 학습 모드에서 프레임마다 inlier를 기록해 두면
+    자주 맞는 특징점만 남긴 작은 모델을 만들 수 있고, 이후 매칭/인덱스 검색이 그만큼 빨라집니다.
+    """
+
+    def __init__(self, n_keypoints):
+        self.hits = np.zeros(n_keypoints, dtype=np.int32)
+        self.frames = 0  # 정합에 성공하여 기록된 프레임 수
+
+    def record(self, train_idx, inlier_mask=None):
+        """한 프레임의 매칭 결과 기록 (train_idx: 맵 특징점 번호, inlier_mask: RANSAC (N, 1) 마스크)"""
+        train_idx = np.asarray(train_idx, dtype=np.int64)
+        if inlier_mask is not None:
+            train_idx = train_idx[np.asarray(inlier_mask).ravel().astype(bool)]
+        # 한 프레임에서 같은 특징점이 여러 번 잡혀도 1회로 계산
+        np.add.at(self.hits, np.unique(train_idx), 1)
+        self.frames += 1
+
+    def select(self, min_hits=2, min_hit_ratio=0.05, min_keep=100):
+        """
+        남길 특징점 번호 (오름차순).
+        min_hits와 기록 프레임의 min_hit_ratio 중 큰 값 이상 inlier가 된 특징점을 남기되,
+        너무 적으면 많이 맞은 순으로 min_keep개까지 채웁니다.
+        """
+        threshold = max(min_hits, int(np.ceil(self.frames * min_hit_ratio)))
+        keep = np.flatnonzero(self.hits >= threshold)
+        if len(keep) < min_keep:
+            # 안정 정렬이라 동점이면 원래 순서(검출 응답 순)를 유지
+            order = np.argsort(-self.hits, kind='stable')
+            keep = order[:min(min_keep, len(order))]
+        return np.sort(keep)
+
+
+def train_keypoint_usage(engine, pts_m, index, frames, min_matches=10, model='homography',
+                         reproj_threshold=5.0):
+    """
+    녹화 프레임들로 맵 특징점 사용 횟수를 학습합니다 (오프라인 학습용, Qt 불필요).
+
+    Args:
+        engine (FeatureEngine): 맵 모델을 만든 엔진.
+        pts_m (ndarray): 맵 특징점 (N, 2) 좌표.
+        index: engine.build_index로 만든 맵 인덱스.
+        frames (list): 그레이스케일 미니맵 프레임들.
+
+    Returns:
+        KeypointUsage
+    """
+    usage = KeypointUsage(len(pts_m))
+    for gray in frames:
+        kp_s, des_s = engine.detect(gray)
+        if des_s is None or len(kp_s) < 4:
+            continue
+        query_idx, train_idx = engine.match(index, des_s)
+        if len(query_idx) < min_matches:
+            continue
+        H, mask = estimate_transform(model, pts_m[train_idx].reshape(-1, 1, 2),
+                                     keypoints_to_array(kp_s)[query_idx].reshape(-1, 1, 2),
+                                     reproj_threshold)
+        if H is not None:
+            usage.record(train_idx, mask)
+    return usage
@@ -0,0 +1,330 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from src.capture import FrameGrabber
+
+# 녹화 폴더 기본 위치 (config.json과 같은 작업 폴더 기준)
+RECORDINGS_DIR = "recordings"
+INDEX_FILE = "index.json"
+
+
+def rect_tuple(rect):
+    """mss 영역 dict -> (left, top, width, height)"""
+    return (int(rect['left']), int(rect['top']), int(rect['width']), int(rect['height']))
+
+
+def rect_dict(rect):
+    left, top, width, height = (int(v) for v in rect)
+    return {'left': left, 'top': top, 'width': width, 'height': height}
+
+
+class SessionRecorder:
+    """
+    캡처 세션 녹화기: 스트림별('region' = 감지 영역, 'monitor' = 전체 모니터)로
+    (시각, BGRA 프레임, 캡처 영역)을 chunk_size개씩 묶어 압축 .npz 청크로 저장하고,
+    청크 목록은 index.json에 기록합니다.
+
+    압축/저장은 백그라운드 스레드 하나에서 하므로 캡처 루프는 프레임 복사만 합니다.
+    청크를 저장할 때마다 인덱스를 갱신하므로 비정상 종료되어도 저장된 청크까지는 재생할 수 있습니다.
+    크기가 다른 프레임(감지 영역 변경)은 새 청크에서 시작합니다. 여러 스레드에서 write해도 안전합니다.
+
+    메모리 상한: 청크는 chunk_size개 또는 chunk_bytes 중 먼저 닿는 크기로 자르고 (전체 모니터
+    프레임은 몇 장이면 청크가 됨), 청크 배열을 미리 할당해 프레임을 바로 복사하므로 저장 때 다시
+    쌓는(np.stack) 사본이 없습니다. 저장 대기 청크가 max_pending_chunks개면 write가 저장을 기다립니다.
+    """
+
+    def __init__(self, path, monitor=None, chunk_size=64, chunk_bytes=32 * 1024 * 1024, max_pending_chunks=4):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.chunk_bytes = chunk_bytes
+        os.makedirs(path, exist_ok=True)
+        self.index = {'version': 1, 'created': time.time(),
+                      'monitor': rect_tuple(monitor) if monitor else None, 'streams': {}}
+        self._pending = {}  # stream -> [frames (미리 할당한 청크 배열), 채운 수, timestamps, rects]
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recorder")
+        self._slots = threading.BoundedSemaphore(max_pending_chunks)  # 저장 대기 청크 수 제한
+        self.closed = False
+        self.frame_count = 0
+
+    def chunk_frames(self, frame):
+        """이 크기 프레임으로 만드는 청크 하나의 프레임 수"""
+        return max(1, min(self.chunk_size, self.chunk_bytes // max(1, frame.nbytes)))
+
+    def write(self, stream, frame, timestamp, rect):
+        """프레임 하나 추가 (복사해서 보관하므로 호출 후 frame 버퍼를 재사용해도 됨)"""
+        with self._lock:
+            if self.closed:
+                return
+            if stream == 'monitor' and self.index['monitor'] is None:
+                self.index['monitor'] = rect_tuple(rect)
+            pending = self._pending.get(stream)
+            if pending is not None and pending[0].shape[1:] != frame.shape:
+                self._flush(stream)
+                pending = None
+            if pending is None:
+                frames = np.empty((self.chunk_frames(frame),) + frame.shape, np.uint8)
+                pending = self._pending[stream] = [frames, 0, [], []]
+            frames, n, timestamps, rects = pending
+            frames[n] = frame
+            pending[1] = n + 1
+            timestamps.append(float(timestamp))
+            rects.append(rect_tuple(rect))
+            self.frame_count += 1
+            if pending[1] >= len(frames):
+                self._flush(stream)
+
+    def _flush(self, stream):
+        """대기 중인 프레임을 청크 하나로 넘김 (_lock을 잡은 상태에서 호출)"""
+        pending = self._pending.pop(stream, None)
+        if pending is None or pending[1] == 0:
+            return
+        frames, n, timestamps, rects = pending
+        chunks = self.index['streams'].setdefault(stream, [])
+        entry = {'file': f"{stream}-{len(chunks):05d}.npz", 'count': n,
+                 't0': timestamps[0], 't1': timestamps[-1], 'shape': list(frames.shape[1:])}
+        chunks.append(entry)
+        index = json.loads(json.dumps(self.index))  # 저장 스레드용 스냅샷
+        self._slots.acquire()  # 저장이 밀리면 메모리를 더 쓰지 않고 기다림
+        self._writer.submit(self._save_chunk, entry['file'], frames[:n],
+                            np.array(timestamps, np.float64), np.array(rects, np.int32), index)
+
+    def _save_chunk(self, name, frames, timestamps, rects, index):
+        try:
+            chunk_path = os.path.join(self.path, name)
+            with open(chunk_path + ".tmp", "wb") as f:
+                np.savez_compressed(f, frames=frames, timestamps=timestamps, rects=rects)
+            os.replace(chunk_path + ".tmp", chunk_path)
+            # 청크가 실제로 저장된 뒤에 인덱스 갱신 (임시 파일에 쓴 뒤 교체)
+            index_path = os.path.join(self.path, INDEX_FILE)
+            with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(index, f, indent=1)
+            os.replace(index_path + ".tmp", index_path)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """남은 프레임을 저장하고 저장이 끝날 때까지 기다림"""
+        with self._lock:
+            if self.closed:
+                return
+            for stream in list(self._pending):
+                self._flush(stream)
+            self.closed = True
+        self._writer.shutdown(wait=True)
+
+
+class SessionReader:
+    """SessionRecorder가 만든 녹화 폴더를 읽습니다. 청크는 필요할 때 읽고 스트림마다 하나만 캐시합니다."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE), "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        self.chunks = self.index['streams']
+        self._starts = {}  # stream -> 청크별 시작 프레임 번호
+        self._timestamps = {}
+        self._cache = {}  # stream -> (청크 번호, frames, rects)
+        for stream, chunks in self.chunks.items():
+            self._starts[stream] = np.cumsum([0] + [c['count'] for c in chunks])
+            parts = []
+            for c in chunks:
+                with np.load(os.path.join(path, c['file'])) as data:
+                    parts.append(data['timestamps'])
+            self._timestamps[stream] = np.concatenate(parts) if parts else np.empty(0, np.float64)
+
+    @property
+    def streams(self):
+        return list(self.chunks)
+
+    @property
+    def monitor(self):
+        monitor = self.index.get('monitor')
+        return rect_dict(monitor) if monitor else None
+
+    def count(self, stream):
+        return len(self._timestamps.get(stream, ()))
+
+    def timestamps(self, stream):
+        return self._timestamps.get(stream, np.empty(0, np.float64))
+
+    @property
+    def start_time(self):
+        firsts = [ts[0] for ts in self._timestamps.values() if len(ts)]
+        return min(firsts) if firsts else 0.0
+
+    def index_at(self, stream, timestamp):
+        """timestamp 이전(포함)의 마지막 프레임 번호 (없으면 -1)"""
+        return int(np.searchsorted(self.timestamps(stream), timestamp, side='right')) - 1
+
+    def frame(self, stream, i):
+        """i번째 프레임의 (시각, BGRA 프레임, 캡처 영역 dict)"""
+        chunk = int(np.searchsorted(self._starts[stream], i, side='right')) - 1
+        cached = self._cache.get(stream)
+        if cached is None or cached[0] != chunk:
+            with np.load(os.path.join(self.path, self.chunks[stream][chunk]['file'])) as data:
+                cached = (chunk, data['frames'], data['rects'])
+            self._cache[stream] = cached
+        j = i - int(self._starts[stream][chunk])
+        return float(self._timestamps[stream][i]), cached[1][j], rect_dict(cached[2][j])
+
+    def frames(self, stream):
+        """스트림의 (시각, 프레임, 영역)을 순서대로"""
+        for i in range(self.count(stream)):
+            yield self.frame(stream, i)
+
+
+class ReplaySession:
+    """
+    녹화 재생 시계. 같은 세션에서 만든 ReplayGrabber들(트래커, find_image, detect_npc)이
+    하나의 재생 시각을 공유합니다.
+
+    realtime=True면 재생 시각이 벽시계를 따라 흐르고 (speed배), 처리가 느리면 실제 캡처처럼
+    중간 프레임을 건너뜁니다. False면 감지 영역 프레임을 하나도 빠짐없이 최대 속도로 읽고,
+    재생 시각은 마지막으로 읽은 프레임 시각이 됩니다 (결정적인 벤치마크용).
+    """
+
+    def __init__(self, path, realtime=True, speed=1.0):
+        self.path = path
+        self.reader = SessionReader(path)
+        self.realtime = realtime
+        self.speed = speed
+        self.clock = self.reader.start_time
+        self._wall_start = None
+        self._lock = threading.Lock()
+
+    def now(self):
+        """현재 재생 시각 (녹화 시각 기준 초). realtime이면 첫 호출부터 시계가 흐름"""
+        with self._lock:
+            if not self.realtime:
+                return self.clock
+            if self._wall_start is None:
+                self._wall_start = time.perf_counter()
+            return self.reader.start_time + (time.perf_counter() - self._wall_start) * self.speed
+
+    def advance(self, timestamp):
+        with self._lock:
+            self.clock = max(self.clock, timestamp)
+
+    def wait_until(self, timestamp):
+        """realtime 재생에서 재생 시각이 timestamp가 될 때까지 대기"""
+        delay = (timestamp - self.now()) / self.speed
+        if delay > 0:
+            time.sleep(delay)
+
+    def grabber(self):
+        return ReplayGrabber(self)
+
+    def spec(self):
+        """다른 프로세스에서 같은 녹화를 여는 인자 (피클 가능)"""
+        return {'path': self.path, 'realtime': self.realtime, 'speed': self.speed}
+
+
+class ReplayGrabber(FrameGrabber):
+    """
+    FrameGrabber와 같은 인터페이스로 녹화를 읽는 프레임 소스.
+
+    녹화된 감지 영역과 크기가 같은 영역을 요청하면 'region' 스트림을 순서대로 읽고,
+    그 밖의 영역(전체 화면 등)은 재생 시각의 'monitor' 프레임에서 잘라 냅니다.
+    감지 영역 스트림이 끝나면 grab은 None을 반환합니다.
+    """
+
+    replay = True
+
+    def __init__(self, session):
+        super().__init__()
+        self.session = session
+        self.reader = session.reader
+        self._next = 0  # 다음에 읽을 region 프레임 번호
+        self._region_size = None
+        if self.reader.count('region'):
+            _, frame, _ = self.reader.frame('region', 0)
+            self._region_size = frame.shape[:2]
+
+    @property
+    def monitor(self):
+        monitor = self.reader.monitor
+        if monitor is None and self.reader.count('monitor'):
+            monitor = self.reader.frame('monitor', 0)[2]
+        return monitor
+
+    def grab(self, rect=None):
+        rect = rect or self.monitor
+        if self._region_size is not None and rect is not None \
+                and (int(rect['height']), int(rect['width'])) == self._region_size:
+            return self._grab_region()
+        return self._grab_monitor(rect)
+
+    def _grab_region(self):
+        count = self.reader.count('region')
+        if self.session.realtime:
+            timestamps = self.reader.timestamps('region')
+            if self._next >= count:
+                return None
+            # 아직 나오지 않은 다음 프레임까지 기다린 뒤, 그 사이 쌓인 프레임 중 최신 것 사용
+            self.session.wait_until(timestamps[self._next])
+            i = max(self._next, min(self.reader.index_at('region', self.session.now()), count - 1))
+        else:
+            if self._next >= count:
+                return None
+            i = self._next
+        self._next = i + 1
+        timestamp, frame, _ = self.reader.frame('region', i)
+        self.session.advance(timestamp)
+        self.timestamp = timestamp
+        self.last_frame = frame
+        return frame
+
+    def _grab_monitor(self, rect):
+        """
+        재생 시각의 모니터 프레임에서 rect를 잘라 냄. 결과는 항상 rect 크기이며, 녹화된 모니터를
+        벗어난 부분은 검은색(0)으로 채웁니다. rect가 녹화 영역과 전혀 겹치지 않으면 None.
+        """
+        if not self.reader.count('monitor'):
+            return None
+        i = max(0, self.reader.index_at('monitor', self.session.now()))
+        timestamp, frame, monitor_rect = self.reader.frame('monitor', i)
+        if rect is not None:
+            x0, y0 = int(rect['left']) - monitor_rect['left'], int(rect['top']) - monitor_rect['top']
+            w, h = int(rect['width']), int(rect['height'])
+            # 요청 영역과 녹화된 모니터 프레임의 교집합 (모니터 프레임 좌표)
+            ix0, iy0 = max(0, x0), max(0, y0)
+            ix1, iy1 = min(frame.shape[1], x0 + w), min(frame.shape[0], y0 + h)
+            if ix1 <= ix0 or iy1 <= iy0:
+                return None
+            if (ix0, iy0, ix1, iy1) == (x0, y0, x0 + w, y0 + h):
+                frame = frame[y0:y0 + h, x0:x0 + w]
+            else:
+                padded = np.zeros((h, w) + frame.shape[2:], frame.dtype)
+                padded[iy0 - y0:iy1 - y0, ix0 - x0:ix1 - x0] = frame[iy0:iy1, ix0:ix1]
+                frame = padded
+        self.timestamp = timestamp
+        self.last_frame = frame
+        return frame
+
+    def close(self):
+        self.last_frame = None
+
+
+class ReplaySource:
+    """파이프라인 캡처 프로세스용 녹화 소스 (MssSource와 같은 인터페이스)"""
+
+    def __init__(self, path, rect, realtime=True, speed=1.0):
+        self.rect = rect
+        self.grabber = ReplaySession(path, realtime, speed).grabber()
+
+    def grab(self):
+        frame = self.grabber.grab(self.rect)
+        # 모니터 프레임에서 잘라 낸 영역은 연속 배열이 아니므로 링 버퍼에 쓰기 전에 정리
+        return None if frame is None else np.ascontiguousarray(frame)
+
+    @property
+    def timestamp(self):
+        """마지막 grab 프레임의 녹화 시각"""
+        return self.grabber.timestamp
+
+    def close(self):
+        self.grabber.close()
@@ -0,0 +1,97 @@
+import cv2
+import numpy as np
+
+# 미니맵 -> 화면 정합 모델
+# - translation: 축 정렬 균일 스케일 + 평행이동 (회전 없음, 3 자유도). 대응점 1개면 스케일 1로 평행이동만
+# - similarity: 균일 스케일 + 회전 + 평행이동 (4 자유도), estimateAffinePartial2D
+# - homography: 기존 8 자유도 투영 변환, findHomography
+REGISTRATION_MODELS = ('translation', 'similarity', 'homography')
+MIN_CORRESPONDENCES = {'translation': 1, 'similarity': 2, 'homography': 4}
+
+
+def fit_scale_translation(src, dst):
+    """src -> dst 최소제곱 균일 스케일 s와 평행이동 t (점이 한 곳에 모여 있으면 s = 1)"""
+    src_mean, dst_mean = src.mean(axis=0), dst.mean(axis=0)
+    src_c = src - src_mean
+    spread = float((src_c ** 2).sum())
+    scale = float((src_c * (dst - dst_mean)).sum()) / spread if spread > 1e-6 else 1.0
+    return scale, dst_mean - scale * src_mean
+
+
+def estimate_translation(src_pts, dst_pts, reproj_threshold=5.0, hypotheses=32, min_pair_distance=8.0):
+    """
+    축 정렬 미니맵용 정합: 균일 스케일 + 평행이동 (회전 없음).
+
+    가설은 (1) 이동량 중앙값 (스케일 1) 과 (2) 대응점 쌍 hypotheses개에서 구한 스케일/이동이며
+    (쌍은 고정 시드로 골라 결과가 결정적), inlier가 가장 많은 가설의 inlier로 스케일과 이동을
+    최소제곱으로 다시 맞춥니다. 모든 가설을 한 번에 행렬로 평가하므로 RANSAC 반복보다 가볍습니다.
+    """
+    src = np.asarray(src_pts, dtype=np.float32).reshape(-1, 2)
+    dst = np.asarray(dst_pts, dtype=np.float32).reshape(-1, 2)
+    if len(src) == 0:
+        return None, None
+
+    scales = [1.0]
+    shifts = [np.median(dst - src, axis=0)]
+    if len(src) >= 2:
+        rng = np.random.default_rng(0)
+        i = rng.integers(0, len(src), hypotheses)
+        j = rng.integers(0, len(src), hypotheses)
+        d_src = np.linalg.norm(src[i] - src[j], axis=1)
+        ok = d_src >= min_pair_distance
+        if np.any(ok):
+            i, j = i[ok], j[ok]
+            pair_scales = np.linalg.norm(dst[i] - dst[j], axis=1) / d_src[ok]
+            scales.extend(pair_scales.tolist())
+            shifts.extend(((dst[i] + dst[j]) - pair_scales[:, None] * (src[i] + src[j])) / 2.0)
+    scales = np.asarray(scales, np.float32)
+    shifts = np.asarray(shifts, np.float32)
+
+    # (가설 수, 대응점 수) 재투영 오차 제곱 (x/y를 따로 계산해 3차원 배열과 norm을 피함)
+    ex = scales[:, None] * src[None, :, 0] + shifts[:, 0:1] - dst[None, :, 0]
+    ey = scales[:, None] * src[None, :, 1] + shifts[:, 1:2] - dst[None, :, 1]
+    within = ex * ex + ey * ey <= reproj_threshold ** 2
+    inliers = within[int(np.argmax(within.sum(axis=1)))]
+    if not np.any(inliers):
+        return None, None
+    scale, (tx, ty) = fit_scale_translation(src[inliers], dst[inliers])
+    if scale <= 0:
+        return None, None
+    inliers = np.linalg.norm(scale * src + (tx, ty) - dst, axis=1) <= reproj_threshold
+    if not np.any(inliers):
+        return None, None
+
+    H = np.array([[scale, 0.0, tx], [0.0, scale, ty], [0.0, 0.0, 1.0]])
+    return H, inliers.astype(np.uint8).reshape(-1, 1)
+
+
+def estimate_transform(model, src_pts, dst_pts, reproj_threshold=5.0):
+    """
+    선택한 모델로 맵 -> 화면 변환을 추정합니다.
+
+    Args:
+        model (str): REGISTRATION_MODELS 중 하나.
+        src_pts (ndarray): 맵 좌표 (N, 1, 2) 또는 (N, 2) float32.
+        dst_pts (ndarray): 화면 좌표 (N, 1, 2) 또는 (N, 2) float32.
+        reproj_threshold (float): inlier 판정 거리 (px).
+
+    Returns:
+        tuple: (H, mask). H는 모델과 관계없이 3x3 행렬이라 perspectiveTransform에 그대로 쓸 수 있고,
+        mask는 (N, 1) inlier 표시입니다. 실패하면 (None, None).
+    """
+    if model not in MIN_CORRESPONDENCES:
+        raise ValueError(f"Unknown registration model: {model}")
+    if len(src_pts) < MIN_CORRESPONDENCES[model]:
+        return None, None
+
+    if model == 'translation':
+        return estimate_translation(src_pts, dst_pts, reproj_threshold)
+
+    if model == 'similarity':
+        A, mask = cv2.estimateAffinePartial2D(src_pts, dst_pts, method=cv2.RANSAC,
+                                              ransacReprojThreshold=reproj_threshold)
+        if A is None:
+            return None, None
+        return np.vstack([A, [0.0, 0.0, 1.0]]), mask
+
+    return cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, reproj_threshold)
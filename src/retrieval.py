@@ -0,0 +1,131 @@
+import cv2
+import numpy as np
+from src.features import FLANN_INDEX_KDTREE, build_index
+
+
+class MapRetrievalIndex:
+    """
+    Bag-of-Visual-Words 기반 맵 검색 인덱스.
+
+    모든 맵의 디스크립터로 시각 단어(vocabulary)를 k-means로 학습하고,
+    맵마다 TF-IDF 히스토그램을 만들어 둡니다. 화면 디스크립터를 같은 단어로
+    양자화한 뒤 코사인 유사도로 후보 맵 top-k만 골라내므로, 비싼 FLANN 매칭과
+    호모그래피는 후보 맵에 대해서만 수행하면 됩니다.
+    단어 검색은 KD-tree(log V)이고 맵 점수 계산은 (맵 수 x 단어 수) 행렬곱 한 번이라
+    맵이 수십 개로 늘어나도 지연 시간이 거의 늘지 않습니다.
+
+    이진 디스크립터(ORB/AKAZE, uint8)는 비트열이라 L2 거리에 의미가 없으므로 Hamming 거리로
+    k-majority 군집화(중심 = 군집 안 비트별 다수결)를 하고, 단어 검색도 Hamming 최근접으로 합니다.
+    """
+
+    def __init__(self, vocab_size=256, max_train_descriptors=20000, seed=0, binary_iterations=10):
+        self.vocab_size = vocab_size
+        self.max_train_descriptors = max_train_descriptors
+        self.seed = seed
+        self.binary_iterations = binary_iterations
+        self.index_params = dict(algorithm=FLANN_INDEX_KDTREE, trees=4)
+        self.search_params = dict(checks=32)
+
+        self.vocabulary = None  # (V, D) 단어 중심 (float32, 이진이면 uint8 비트열)
+        self.binary = False
+        self.vocab_index = None
+        self.idf = None
+        self.slots = []  # map_vectors 행 순서에 대응하는 슬롯 번호
+        self.map_vectors = None  # (맵 수, V) L2 정규화된 TF-IDF
+
+    @property
+    def ready(self):
+        return self.map_vectors is not None
+
+    def build(self, descriptors_by_slot):
+        """
+        맵 디스크립터로 인덱스를 구축합니다.
+
+        Args:
+            descriptors_by_slot (dict): {slot: (N, D) 디스크립터} (float32, 또는 이진이면 uint8)
+        """
+        self.slots = list(descriptors_by_slot.keys())
+        all_des = [d for d in descriptors_by_slot.values() if d is not None and len(d)]
+        if not all_des:
+            self.map_vectors = None
+            return
+        self.binary = all_des[0].dtype == np.uint8
+        dtype = np.uint8 if self.binary else np.float32
+        all_des = [np.asarray(d, dtype=dtype) for d in all_des]
+
+        # 학습용 디스크립터 샘플링 (k-means 시간을 맵 수와 무관하게 제한)
+        stacked = np.vstack(all_des)
+        rng = np.random.default_rng(self.seed)
+        if len(stacked) > self.max_train_descriptors:
+            stacked = stacked[rng.choice(len(stacked), self.max_train_descriptors, replace=False)]
+
+        k = max(1, min(self.vocab_size, len(stacked)))
+        if self.binary:
+            self.vocabulary = self._k_majority(stacked, k, rng)
+            self.vocab_index = None
+        else:
+            criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 1.0)
+            cv2.setRNGSeed(self.seed)
+            _, _, centers = cv2.kmeans(stacked, k, None, criteria, 1, cv2.KMEANS_PP_CENTERS)
+            self.vocabulary = np.ascontiguousarray(centers, dtype=np.float32)
+            self.vocab_index = build_index(self.vocabulary, self.index_params)
+
+        # 맵별 단어 히스토그램 -> IDF -> TF-IDF 벡터
+        hists = np.vstack([self._histogram(descriptors_by_slot[slot]) for slot in self.slots])
+        df = np.count_nonzero(hists, axis=0)
+        n_maps = len(self.slots)
+        self.idf = (np.log((1.0 + n_maps) / (1.0 + df)) + 1.0).astype(np.float32)
+        self.map_vectors = self._normalize(hists * self.idf)
+
+    def shortlist(self, descriptors, top_k):
+        """화면 디스크립터와 가장 유사한 맵 슬롯을 점수 순으로 최대 top_k개 반환"""
+        if not self.ready or descriptors is None or len(descriptors) == 0:
+            return list(self.slots)
+        query = self._normalize(self._histogram(descriptors)[None, :] * self.idf)[0]
+        scores = self.map_vectors @ query
+        # 동점이면 슬롯 순서대로 (안정 정렬)
+        order = np.argsort(-scores, kind='stable')[:top_k]
+        return [self.slots[i] for i in order]
+
+    def _k_majority(self, stacked, k, rng):
+        """이진 디스크립터 k-majority: Hamming 최근접 중심에 배정하고 중심은 비트별 다수결로 갱신"""
+        centers = stacked[rng.choice(len(stacked), k, replace=False)].copy()
+        bits = np.unpackbits(stacked, axis=1)
+        labels = None
+        for _ in range(self.binary_iterations):
+            new_labels = self._nearest_binary(stacked, centers)
+            if labels is not None and np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+            # 군집별 비트 합 (라벨 순 정렬 후 구간 합)
+            order = np.argsort(labels, kind='stable')
+            counts = np.bincount(labels, minlength=k)
+            used = np.nonzero(counts)[0]
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[used]
+            sums = np.add.reduceat(bits[order], starts, axis=0, dtype=np.int32)
+            # 빈 군집은 이전 중심 유지, 동률 비트는 1
+            centers[used] = np.packbits(sums * 2 >= counts[used, None], axis=1)
+        return np.ascontiguousarray(centers)
+
+    @staticmethod
+    def _nearest_binary(descriptors, centers):
+        _, idx = cv2.batchDistance(descriptors, centers, cv2.CV_32S, normType=cv2.NORM_HAMMING, K=1)
+        return idx.ravel().astype(np.int64)
+
+    def _histogram(self, descriptors):
+        if descriptors is None or len(descriptors) == 0:
+            return np.zeros(len(self.vocabulary), dtype=np.float32)
+        if self.binary:
+            words = self._nearest_binary(np.asarray(descriptors, dtype=np.uint8), self.vocabulary)
+        else:
+            words, _ = self.vocab_index.knnSearch(np.asarray(descriptors, dtype=np.float32), 1,
+                                                  params=self.search_params)
+        words = words.ravel()
+        words = words[words >= 0]
+        return np.bincount(words, minlength=len(self.vocabulary)).astype(np.float32)
+
+    @staticmethod
+    def _normalize(vectors):
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32)
@@ -0,0 +1,137 @@
+import os
+import json
+import cv2
+import numpy as np
+from src.recording import SessionRecorder
+
+
+def default_sprite():
+    """캐릭터 이미지가 없을 때 쓰는 합성 마커 (노란 테두리의 빨간 사각형, 9x9 BGR)"""
+    sprite = np.zeros((9, 9, 3), np.uint8)
+    sprite[:] = (0, 220, 255)
+    sprite[2:7, 2:7] = (0, 0, 255)
+    return sprite
+
+
+def textured_map(seed=0, shape=(160, 480)):
+    """맵 이미지가 없을 때 쓰는 합성 무늬 맵 (블러 처리한 노이즈 + 사각형 발판, 그레이스케일)"""
+    rng = np.random.default_rng(seed)
+    img = cv2.GaussianBlur(rng.integers(0, 255, shape, dtype=np.uint8), (5, 5), 0)
+    for _ in range(12):
+        x, y = int(rng.integers(0, shape[1] - 40)), int(rng.integers(0, shape[0] - 10))
+        cv2.rectangle(img, (x, y), (x + int(rng.integers(20, 80)), y + 4), int(rng.integers(0, 255)), -1)
+    return img
+
+
+def walk_positions(map_w, map_h, count, rng, fps=30.0, speed=60.0, margin=8, turn_prob=0.02, jump_prob=0.0):
+    """
+    맵 좌표에서 캐릭터가 발판 위를 좌우로 걷는 경로 (count개, (N, 2) float64).
+    speed px/s로 움직이며 가장자리에서 되돌아오고 turn_prob 확률로 방향을 바꿉니다.
+    jump_prob 확률로 임의의 위치로 순간이동합니다 (포탈/재정합 복구 시험용).
+    """
+    x = float(rng.uniform(margin, map_w - margin))
+    y = float(rng.uniform(margin, map_h - margin))
+    direction = 1.0 if rng.random() < 0.5 else -1.0
+    step = speed / fps
+    positions = np.empty((count, 2), np.float64)
+    for i in range(count):
+        if rng.random() < jump_prob:
+            x = float(rng.uniform(margin, map_w - margin))
+            y = float(rng.uniform(margin, map_h - margin))
+        elif rng.random() < turn_prob:
+            direction = -direction
+        x += direction * step
+        if x < margin or x > map_w - margin:
+            direction = -direction
+            x = min(max(x, margin), map_w - margin)
+        positions[i] = (x, y)
+    return positions
+
+
+def paste_sprite(frame, sprite, center):
+    """sprite를 center(실수 좌표) 중심에 붙임 (BGRA 스프라이트는 알파 합성, 프레임 밖은 잘라냄)"""
+    sh, sw = sprite.shape[:2]
+    x0, y0 = int(round(center[0] - sw / 2.0)), int(round(center[1] - sh / 2.0))
+    fx0, fy0 = max(0, x0), max(0, y0)
+    fx1, fy1 = min(frame.shape[1], x0 + sw), min(frame.shape[0], y0 + sh)
+    if fx1 <= fx0 or fy1 <= fy0:
+        return
+    part = sprite[fy0 - y0:fy1 - y0, fx0 - x0:fx1 - x0]
+    if part.shape[2] == 4:
+        alpha = part[:, :, 3:4].astype(np.float32) / 255.0
+        region = frame[fy0:fy1, fx0:fx1].astype(np.float32)
+        frame[fy0:fy1, fx0:fx1] = (part[:, :, :3] * alpha + region * (1 - alpha)).astype(np.uint8)
+    else:
+        frame[fy0:fy1, fx0:fx1] = part
+
+
+def render_frame(map_bgr, sprite, position, scale=1.0, offset=(15, 10), noise=0.0, rng=None,
+                 frame_size=None, sprite_scale=None):
+    """
+    맵을 scale배로 offset 위치에 그리고 맵 좌표 position에 캐릭터를 올린 미니맵 프레임.
+
+    Args:
+        frame_size (tuple): (w, h) 프레임 크기 (없으면 맵 + 여백).
+        sprite_scale (float): 캐릭터 배율 (없으면 scale과 같음).
+
+    Returns:
+        tuple: (frame BGR, H 맵 -> 프레임 3x3 변환)
+    """
+    h, w = map_bgr.shape[:2]
+    H = np.array([[scale, 0, offset[0]], [0, scale, offset[1]], [0, 0, 1]], dtype=np.float64)
+    if frame_size is None:
+        frame_size = (int(w * scale + offset[0] + 20), int(h * scale + offset[1] + 20))
+    frame = cv2.warpAffine(map_bgr, H[:2], frame_size, flags=cv2.INTER_LINEAR, borderValue=(0, 0, 0))
+
+    sprite_scale = scale if sprite_scale is None else sprite_scale
+    if sprite_scale != 1.0:
+        size = (max(1, int(round(sprite.shape[1] * sprite_scale))), max(1, int(round(sprite.shape[0] * sprite_scale))))
+        sprite = cv2.resize(sprite, size, interpolation=cv2.INTER_LINEAR)
+    paste_sprite(frame, sprite, (position[0] * scale + offset[0], position[1] * scale + offset[1]))
+
+    if noise > 0:
+        rng = rng or np.random.default_rng()
+        frame = np.clip(frame + rng.normal(0, noise, frame.shape), 0, 255).astype(np.uint8)
+    return frame, H
+
+
+def generate_sequence(map_bgr, sprite, count=120, scale=1.0, offset=(15, 10), noise=2.0, fps=30.0,
+                      speed=60.0, jump_prob=0.0, seed=0, sprite_scale=None):
+    """
+    걷는 캐릭터의 합성 미니맵 프레임 시퀀스와 정답.
+
+    Returns:
+        tuple: (frames, truth) frames는 BGR 프레임 목록, truth는 프레임별
+        {'timestamp', 'position' (맵 좌표), 'scale', 'offset'} 목록.
+    """
+    rng = np.random.default_rng(seed)
+    h, w = map_bgr.shape[:2]
+    margin = max(sprite.shape[:2]) // 2 + 2
+    positions = walk_positions(w, h, count, rng, fps, speed, margin=margin, jump_prob=jump_prob)
+    frames, truth = [], []
+    for i, position in enumerate(positions):
+        frame, _ = render_frame(map_bgr, sprite, position, scale, offset, noise, rng, sprite_scale=sprite_scale)
+        frames.append(frame)
+        truth.append({'timestamp': i / fps, 'position': [float(position[0]), float(position[1])],
+                      'scale': scale, 'offset': [float(offset[0]), float(offset[1])]})
+    return frames, truth
+
+
+def write_sequence(path, frames, truth, map_size=None):
+    """
+    프레임을 세션 녹화 형식('region' 스트림)으로, 정답을 ground_truth.json으로 저장합니다.
+    녹화 형식이라 tracker_cli.py나 녹화 재생(replay)으로 그대로 돌려볼 수 있습니다.
+    """
+    recorder = SessionRecorder(path)
+    for frame, t in zip(frames, truth):
+        h, w = frame.shape[:2]
+        recorder.write('region', cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA), t['timestamp'],
+                       {'left': 0, 'top': 0, 'width': w, 'height': h})
+    recorder.close()
+    with open(os.path.join(path, "ground_truth.json"), "w", encoding="utf-8") as f:
+        json.dump({'map_size': list(map_size) if map_size else None, 'frames': truth}, f, indent=1)
+
+
+def load_ground_truth(path):
+    with open(os.path.join(path, "ground_truth.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
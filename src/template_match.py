@@ -0,0 +1,146 @@
+import cv2
+import numpy as np
+
+
+def load_template(image_path, flags=cv2.IMREAD_COLOR):
+    """한글 경로도 읽을 수 있도록 np.fromfile + imdecode로 이미지를 읽습니다. 실패하면 None."""
+    try:
+        return cv2.imdecode(np.fromfile(image_path, np.uint8), flags)
+    except Exception:
+        return None
+
+
+def to_gray(image):
+    """GRAY/BGR/BGRA 이미지를 그레이스케일로 (이미 그레이면 그대로)"""
+    if image.ndim == 2:
+        return image
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def to_bgr(image):
+    """BGRA/GRAY 이미지를 BGR로 (이미 BGR이면 그대로)"""
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+    return image
+
+
+class TemplateMatcher:
+    """
+    Coarse-to-fine 템플릿 매칭 엔진 (TM_CCOEFF_NORMED).
+
+    1) 이미지와 템플릿을 2^L배 축소한 그레이스케일에서 먼저 매칭하고
+    2) 점수가 높은 후보 몇 개 주변만 원본 해상도에서 다시 매칭하여 정확한 위치/점수를 구합니다.
+    축소 단계 수 L은 템플릿이 min_template_size보다 작아지지 않도록 자동으로 정해지므로,
+    작은 템플릿(미니맵 캐릭터 등)은 축소 없이 바로 원본 해상도에서 매칭됩니다.
+    1440p 전체 화면처럼 큰 이미지에서 버튼/NPC를 찾을 때 특히 빠릅니다.
+
+    grayscale=False면 후보 찾기(축소 단계)만 그레이스케일로 하고 원본 해상도 정밀 매칭은 컬러(BGR)로
+    하므로, 반환 점수는 전체 화면 컬러 matchTemplate 점수와 같습니다 (색만 다른 UI 요소를 구분하고
+    컬러 기준으로 정한 임계값을 그대로 쓸 수 있음).
+    """
+
+    def __init__(self, template, mask=None, grayscale=True, max_levels=3,
+                 min_template_size=12, candidates=3, refine_margin=4):
+        self.grayscale = grayscale
+        self.max_levels = max_levels
+        self.min_template_size = min_template_size
+        self.candidates = candidates
+        self.refine_margin = refine_margin
+
+        self.template = to_gray(template) if grayscale else to_bgr(template)
+        self.mask = mask
+        self.h, self.w = self.template.shape[:2]
+
+        # 축소 단계 수: 템플릿 짧은 변이 min_template_size 이상 유지되는 범위에서 최대 max_levels
+        self.levels = 0
+        while (self.levels < self.max_levels
+               and min(self.h, self.w) / float(2 ** (self.levels + 1)) >= self.min_template_size):
+            self.levels += 1
+
+        self.coarse_template = None
+        self.coarse_mask = None
+        if self.levels > 0:
+            f = 1.0 / (2 ** self.levels)
+            self.coarse_template = cv2.resize(to_gray(self.template), None, fx=f, fy=f,
+                                              interpolation=cv2.INTER_AREA)
+            if mask is not None:
+                self.coarse_mask = cv2.resize(mask, None, fx=f, fy=f, interpolation=cv2.INTER_NEAREST)
+
+    @classmethod
+    def from_file(cls, image_path, **kwargs):
+        """이미지 파일로 매처 생성 (로드 실패 시 None)"""
+        template = load_template(image_path)
+        if template is None:
+            return None
+        return cls(template, **kwargs)
+
+    @property
+    def size(self):
+        return self.w, self.h
+
+    def prepare(self, image):
+        """매칭에 쓸 형식(그레이/BGR)으로 변환. 같은 화면에 여러 템플릿을 쓸 때 한 번만 변환해 두면 됨"""
+        return to_gray(image) if self.grayscale else to_bgr(image)
+
+    def _match(self, image, template, mask):
+        res = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED, mask=mask)
+        # 마스크 사용 시 분모가 0인 위치에서 inf/nan이 나올 수 있음
+        if mask is not None:
+            res[~np.isfinite(res)] = -1
+        return res
+
+    def match(self, image):
+        """
+        이미지에서 템플릿을 찾습니다.
+
+        Returns:
+            tuple: (max_val, (x, y)) 원본 해상도 기준 최고 점수와 좌상단 좌표.
+            템플릿이 이미지보다 크면 (0, None).
+        """
+        img = self.prepare(image)
+        ih, iw = img.shape[:2]
+        if self.h > ih or self.w > iw:
+            return 0, None
+
+        scale = 2 ** self.levels
+        if self.levels == 0 or ih // scale < self.coarse_template.shape[0] + 1 \
+                or iw // scale < self.coarse_template.shape[1] + 1:
+            res = self._match(img, self.template, self.mask)
+            _, max_val, _, max_loc = cv2.minMaxLoc(res)
+            return max_val, max_loc
+
+        # 1) 축소 그레이스케일 이미지에서 후보 찾기
+        coarse = cv2.resize(to_gray(img), (iw // scale, ih // scale), interpolation=cv2.INTER_AREA)
+        res = self._match(coarse, self.coarse_template, self.coarse_mask)
+        ch, cw = self.coarse_template.shape[:2]
+
+        best_val, best_loc = -1.0, None
+        for _ in range(self.candidates):
+            _, val, _, loc = cv2.minMaxLoc(res)
+            if val <= -1:
+                break
+            # 같은 봉우리를 다시 고르지 않도록 주변 억제
+            cx, cy = loc
+            res[max(0, cy - ch // 2):cy + ch // 2 + 1, max(0, cx - cw // 2):cx + cw // 2 + 1] = -1
+
+            # 2) 원본 해상도(grayscale=False면 컬러)에서 후보 주변만 정밀 매칭
+            pad = scale + self.refine_margin
+            x0, y0 = max(0, cx * scale - pad), max(0, cy * scale - pad)
+            x1, y1 = min(iw, cx * scale + self.w + pad), min(ih, cy * scale + self.h + pad)
+            fine = self._match(img[y0:y1, x0:x1], self.template, self.mask)
+            _, fval, _, floc = cv2.minMaxLoc(fine)
+            if fval > best_val:
+                best_val, best_loc = fval, (x0 + floc[0], y0 + floc[1])
+
+        return best_val, best_loc
+
+    def find(self, image, threshold):
+        """임계값 이상이면 템플릿 중심 좌표 (x, y, score), 아니면 None"""
+        val, loc = self.match(image)
+        if loc is None or val < threshold:
+            return None
+        return loc[0] + self.w // 2, loc[1] + self.h // 2, val
@@ -1,319 +1,408 @@
-import cv2
-import numpy as np
-import mss
+import os
+import queue
+import threading
 import time
 from PyQt5.QtCore import QThread, pyqtSignal
-from src.utils import calculate_relative_coordinates
+from src.engine import TrackerEngine
+from src.pipeline import CapturePipeline, MssSource, FrameProcessor
+from src.capture import create_grabber
+from src.recording import RECORDINGS_DIR, SessionRecorder, ReplaySource
 
 class TrackerWorker(QThread):
+    """
+    TrackerEngine을 Qt 스레드로 감싼 어댑터: 화면 캡처, 처리 주기 조절, 시그널 전송만 담당합니다.
+    맵 인식/정합/캐릭터 검색 설정과 상태는 모두 self.engine에 있습니다.
+    """
     position_update = pyqtSignal(str, int, int) # name, x, y
     status_update = pyqtSignal(str)
     map_dimensions = pyqtSignal(int, int) # w, h
     map_region_update = pyqtSignal(object) # list of (x,y) tuples
-    
-    
+    predicted_position = pyqtSignal(str, int, int) # name, x, y (캡처/처리 지연을 보정한 '지금' 위치)
+    stats_update = pyqtSignal(object) # StageTimer.snapshot() dict (stats_interval초마다)
+    pruned_models_saved = pyqtSignal(int) # 저장한 가지치기 모델 수
+
+
     def __init__(self):
         super().__init__()
         self.running = False
-        self.template = None # Character template
-        self.template_scales = []  # 다중 스케일 템플릿
-        self.sct = None
-        
-        # SIFT 특징점 검출기 사용 (ORB보다 정확함)
-        self.sift = cv2.SIFT_create(nfeatures=3000)
-        
-        # FLANN 기반 매칭 (더 빠르고 정확)
-        FLANN_INDEX_KDTREE = 1
-        index_params = dict(algorithm=FLANN_INDEX_KDTREE, trees=5)
-        search_params = dict(checks=50)
-        self.flann = cv2.FlannBasedMatcher(index_params, search_params)
-        
-        # Maps storage: { slot_index: {'name': str, 'img': gray, 'kp': kp, 'des': des, 'w': w, 'h': h} }
-        self.maps = {}
-        
-        # Char matching threshold
-        self.char_threshold = 0.65  # 낮춘 임계값 (다중 스케일로 보완)
-        # Map matching params
-        self.min_match_count = 10  # SIFT는 더 정확하므로 임계값 상향
-        
+        self.engine = TrackerEngine(on_status=self.status_update.emit)
+        self.grabber = None  # FrameGrabber 또는 녹화 재생 ReplayGrabber (run 스레드에서 생성)
         self.search_region = None
-        self.current_map_slot = None
         
-        # 위치 안정화를 위한 변수
-        self.last_position = None
-        self.position_smoothing = 0.7  # 0~1, 높을수록 이전 위치에 가중치
+        # 세션 녹화 (직렬 모드): 감지 영역은 매 프레임, 전체 모니터는 record_monitor_interval초마다 기록
+        self.recorder = None
+        self.record_monitor_interval = 1.0
+        self._last_monitor_record = None
+
+        # 파이프라인 모드: 캡처 프로세스가 공유 메모리 링 버퍼에 쓰고 검출 프로세스들이 최신 프레임만 처리
+        # (캡처와 검출이 겹쳐 실행되고 GIL 경쟁 없이 여러 코어 사용). 끄면 기존 단일 스레드 처리
+        self.pipelined = False
+        self.pipeline_detectors = 2
+
+        # 적응형 처리 주기: 목표/대기 fps와 위치 수요는 engine에 있고, 여기서는 주기 사이 대기만 담당
+        self._wake = threading.Event()  # 수요가 생기면 대기 중인 루프를 즉시 깨움
+
+        # 엔진 상태를 바꾸는 명령(학습 모드 전환, 가지치기 모델 저장)은 트래킹 중이면 큐에 넣어
+        # 트래커 스레드가 프레임 사이에 실행 (처리 중인 프레임과 겹치지 않고, 맵 재로드도 UI를 멈추지 않음)
+        self._commands = queue.Queue()
+        self._command_lock = threading.Lock()
+        self._accepting_commands = False
+
+        # 단계별 처리 시간: 프레임마다 상태 문자열을 보내는 대신 현재 상태(status_text)만 갱신하고,
+        # stats_interval초마다 "상태 | fps | 단계별 ms" 한 줄과 통계 스냅샷(stats_update)을 전송
+        self.stats_interval = 1.0
+        self.status_text = ""
+        self.last_stats = None
+        self._last_stats_time = None
 
     @property
     def map_ready(self):
-        return len(self.maps) > 0
+        return self.engine.map_ready
 
     def set_search_region(self, x, y, w, h):
         self.search_region = {'top': int(y), 'left': int(x), 'width': int(w), 'height': int(h)}
 
-    def set_map_source(self, slot, name, image_path):
-        # Use numpy fromfile to handle unicode paths (e.g. Korean) correctly
-        try:
-            img_array = np.fromfile(image_path, np.uint8)
-            img_bgr = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-        except Exception:
-            img_bgr = None
+    def set_feature_engine(self, detector='sift', matcher=None, nfeatures=3000):
+        self.engine.set_feature_engine(detector, matcher, nfeatures)
 
-        if img_bgr is None:
-            self.status_update.emit(f"Failed to load map {name}")
-            return False
-            
-        # Convert to gray for features
-        img_gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
-        
-        # SIFT 특징점 계산
-        kp, des = self.sift.detectAndCompute(img_gray, None)
-        
-        if des is None or len(kp) < self.min_match_count:
-            self.status_update.emit(f"Not enough features in map {name} ({len(kp) if kp else 0})")
+    def set_map_source(self, slot, name, image_path, nfeatures=None):
+        if not self.engine.set_map_source(slot, name, image_path, nfeatures):
             return False
-            
-        h, w = img_gray.shape[:2]
-        self.maps[slot] = {
-            'name': name,
-            'img': img_gray,
-            'kp': kp,
-            'des': des.astype(np.float32),  # FLANN은 float32 필요
-            'w': w,
-            'h': h
-        }
-        
-        self.status_update.emit(f"Map loaded: {name} ({len(kp)} features)")
         # Emit dim if this is the first map
-        if len(self.maps) == 1:
-             self.map_dimensions.emit(w, h)
+        if len(self.engine.maps) == 1:
+            m = self.engine.maps[slot]
+            self.map_dimensions.emit(m['w'], m['h'])
         return True
 
     def set_template(self, image_path):
-        # Use numpy fromfile to handle unicode paths correctly
-        try:
-            img_array = np.fromfile(image_path, np.uint8)
-            img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-        except Exception:
-            img = None
+        return self.engine.set_template(image_path)
 
-        if img is None:
-            self.status_update.emit("Failed to load character image")
-            return False
-        
-        self.template = img
-        
-        # 다중 스케일 템플릿 생성 (0.8 ~ 1.2 배율)
-        self.template_scales = []
-        for scale in [0.8, 0.9, 1.0, 1.1, 1.2]:
-            h, w = img.shape[:2]
-            new_w = int(w * scale)
-            new_h = int(h * scale)
-            if new_w > 0 and new_h > 0:
-                scaled = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
-                self.template_scales.append((scale, scaled))
-        
-        self.status_update.emit(f"Character loaded ({len(self.template_scales)} scales)")
-        return True
+    def build_map_index(self):
+        """맵을 모두 불러온 뒤 맵 검색 인덱스 구축 (트래킹 중이면 프레임 사이에 실행)"""
+        self.run_command(self.engine.build_retrieval)
+
+    def run_command(self, fn, *args):
+        """트래킹 중이면 fn(*args)를 다음 프레임 전에 트래커 스레드에서 실행하도록 예약, 아니면 바로 실행"""
+        with self._command_lock:
+            if self._accepting_commands:
+                self._commands.put((fn, args))
+                self._wake.set()
+                return
+        fn(*args)
+
+    def apply_commands(self):
+        """예약된 명령을 모두 실행 (트래커 스레드에서 프레임 사이에 호출)"""
+        while True:
+            try:
+                fn, args = self._commands.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                fn(*args)
+            except Exception as e:
+                self.status_update.emit(f"Command failed: {e}")
+
+    def set_training(self, enabled):
+        self.run_command(self.engine.set_training, enabled)
+
+    def save_pruned_models(self):
+        """학습 결과 저장 (트래킹 중이면 프레임 사이에 실행). 저장한 맵 수는 pruned_models_saved로 전달"""
+        self.run_command(self._save_pruned_models)
+
+    def _save_pruned_models(self):
+        self.pruned_models_saved.emit(self.engine.save_pruned_models())
+
+    def set_registration_model(self, model):
+        """정합 모델 변경 (트래킹 중이면 프레임 사이에 적용)"""
+        self.run_command(self.engine.set_registration_model, model)
+
+    def set_color_blob(self, enabled, hsv_range=None):
+        """색 덩어리 빠른 경로 켜기/끄기 (트래킹 중이면 프레임 사이에 적용)"""
+        self.run_command(self.engine.set_color_blob, enabled, hsv_range)
+
+    def set_match_workers(self, workers):
+        self.engine.set_match_workers(workers)
 
     def clear_maps(self):
-        self.maps.clear()
-        self.current_map_slot = None
-        self.last_position = None
-        self.status_update.emit("All maps cleared")
+        self.engine.clear_maps()
+
+    def start_recording(self, path=None):
+        """
+        세션 녹화 시작 (기본: recordings/날짜-시각 폴더). 녹화 폴더 경로를 반환.
+        파이프라인 모드에서는 프레임이 캡처 프로세스에만 있어 녹화할 수 없으므로 None을 반환합니다.
+        """
+        if self.pipelined:
+            self.status_update.emit("Session recording is not available in pipeline mode")
+            return None
+        self.stop_recording()
+        path = path or os.path.join(RECORDINGS_DIR, time.strftime("%Y%m%d-%H%M%S"))
+        self._last_monitor_record = None
+        self.recorder = SessionRecorder(path)
+        self.status_update.emit(f"Recording to {path}")
+        return path
+
+    def stop_recording(self):
+        """녹화를 멈추고 남은 프레임 저장이 끝날 때까지 기다림"""
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            recorder.close()
+            self.status_update.emit(f"Recording saved ({recorder.frame_count} frames): {recorder.path}")
+
+    def record_frame(self, rect, monitor, timestamp):
+        """방금 캡처한 감지 영역 프레임을 녹화하고, 주기가 되면 전체 모니터도 한 장 캡처해서 녹화"""
+        recorder = self.recorder
+        if recorder is None:
+            return
+        recorder.write('region', self.grabber.last_frame, timestamp, rect)
+        if monitor is None or (self._last_monitor_record is not None
+                               and timestamp - self._last_monitor_record < self.record_monitor_interval):
+            return
+        self._last_monitor_record = timestamp
+        full = self.grabber.grab(monitor)
+        if full is not None:
+            recorder.write('monitor', full, self.grabber.timestamp, monitor)
+
+    def report_stats(self, force=False):
+        """stats_interval초마다 (force면 즉시) 통계 스냅샷과 한 줄 상태/처리 시간 요약을 전송"""
+        now = time.perf_counter()
+        if not force and self._last_stats_time is not None and now - self._last_stats_time < self.stats_interval:
+            return
+        self._last_stats_time = now
+        timer = self.engine.timer
+        self.last_stats = timer.snapshot()
+        self.stats_update.emit(self.last_stats)
+        summary = timer.summary(self.last_stats)
+        self.status_update.emit(f"{self.status_text} | {summary}" if self.status_text else summary)
+
+    def dump_stats(self, path):
+        """현재 단계별 처리 시간 통계를 CSV로 저장"""
+        self.engine.timer.write_csv(path)
+        self.status_update.emit(f"Timing stats saved: {path}")
+
+    def publish(self, result, rect, latency=None):
+        """
+        엔진 결과 하나를 시그널로 전송합니다.
+        rect는 감지 영역 (맵 코너를 화면 절대 좌표로 옮길 때 사용), latency는 캡처부터 지금까지 초 (파이프라인 모드).
+        프레임별 상태는 status_text에만 기록하고 report_stats가 주기적으로 처리 시간과 함께 보냅니다.
+        """
+        self.update_status_text(result, latency)
+        self.report_stats()
+        if result.get('skipped'):
+            if result['relative'] is not None:
+                self.position_update.emit(result['name'], *result['relative'])
+                self.predicted_position.emit(result['name'], *result['predicted'])
+            return
+        if 'error' in result or result['slot'] is None:
+            self.map_region_update.emit([])
+            return
+
+        name = result['name']
+        if result['map_changed']:
+            self.map_dimensions.emit(result['w'], result['h'])
+        # 맵 영역 시각화 (Homography로 변환된 4개 코너)
+        self.map_region_update.emit([(int(x + rect['left']), int(y + rect['top'])) for x, y in result['corners']])
+
+        if result['relative'] is None:
+            return
+        self.position_update.emit(name, *result['relative'])
+        self.predicted_position.emit(name, *result['predicted'])
+
+    def update_status_text(self, result, latency=None):
+        """결과 하나로 현재 상태 문자열(status_text) 갱신"""
+        if result.get('skipped'):
+            self.status_text = f"Idle (skipped {self.engine.frame_gate.skipped_total} frames)"
+        elif 'error' in result:
+            self.status_text = f"Error: {result['error']}"
+        elif result['slot'] is None:
+            self.status_text = f"Scanning... Best: {result['matches']} matches"
+        elif result['relative'] is None:
+            self.status_text = f"{result['name']} found, Char missing (Conf: {result['conf']:.2f})"
+        else:
+            matches_info = "Locked" if result['tier'] == 'track' else f"Matches: {result['matches']}"
+            if latency is not None:
+                detail = f"Latency: {latency * 1000:.0f}ms"
+            else:
+                tiers = self.engine.tier_counts
+                detail = f"T/F/S: {tiers['track']}/{tiers['fast']}/{tiers['full']}"
+            self.status_text = f"{result['name']} | {matches_info} | Conf: {result['conf']:.2f} | {detail}"
+
+    def run_pipelined(self, monitor):
+        """
+        파이프라인 모드: 캡처 프로세스 + 검출 프로세스 pipeline_detectors개가 공유 메모리 링 버퍼로
+        프레임을 주고받고, 이 스레드는 최신 결과만 받아 스무딩/시그널 전송을 담당합니다.
+        맵/캐릭터 설정은 시작 시점 기준이므로 바꾼 뒤에는 트래킹을 다시 시작해야 합니다.
+        """
+        while self.running and not self.engine.ready:
+            self.apply_commands()
+            self.idle_wait()
+        if not self.running:
+            return
+
+        rect = dict(self.search_region if self.search_region else monitor)
+        if self.grabber.replay:
+            source = (ReplaySource, dict(self.grabber.session.spec(), rect=rect))
+        else:
+            source = (MssSource, {'rect': rect})
+        pipeline = CapturePipeline((rect['height'], rect['width'], 4), source,
+                                   (FrameProcessor, self.engine.pipeline_spec()),
+                                   detectors=self.pipeline_detectors, capture_fps=self.current_fps())
+        try:
+            pipeline.start()
+        except Exception as e:
+            self.status_update.emit(f"Pipeline start failed: {e}")
+            return
+        self.status_update.emit(f"Pipeline started ({self.pipeline_detectors} detectors)")
+
+        draining = False
+        try:
+            while self.running:
+                self.apply_commands()
+                # 이동 중/대기 중에 따라 캡처 프로세스 주기 조절
+                pipeline.set_capture_fps(self.current_fps())
+                packet = pipeline.poll(timeout=0.05)
+                if packet is None:
+                    if pipeline.finished:
+                        # 소스가 끝났고 남은 프레임도 처리됨: 큐로 오는 중인 마지막 결과를 한 번 더 기다린 뒤 종료
+                        if draining:
+                            self.status_update.emit("Replay finished" if self.grabber.replay
+                                                    else "Capture source ended")
+                            break
+                        draining = True
+                    elif not pipeline.source_ended and not pipeline.alive:
+                        self.status_update.emit("Pipeline stopped unexpectedly")
+                        break
+                    continue
+                seq, captured_at, result, written_at = packet
+                if seq is None:
+                    self.status_update.emit(result['error'])
+                    break
+                self.handle_pipeline_result(result, rect, captured_at, written_at)
+        finally:
+            pipeline.stop()
+
+    def handle_pipeline_result(self, result, rect, captured_at, written_at):
+        """
+        검출 프로세스 결과 하나를 시그널로 전송.
+        captured_at은 프레임 캡처 시각 (녹화 재생이면 녹화 시각), written_at은 링 버퍼에 쓴 시각 (time.time 기준).
+        """
+        timer = self.engine.timer
+        # 검출 프로세스에서 잰 단계별 시간 + 캡처부터 결과 수신까지의 지연을 이 스레드의 통계에 합침
+        latency = time.time() - written_at
+        timings = dict(result.get('timings', {}), latency=latency * 1000)
+        if 'error' in result:
+            timer.add_frame(timings)
+            self.publish(dict(result, skipped=False), rect)
+            return
+        # 평활/예측은 프레임 순서대로 결과를 받는 이 스레드의 엔진에서 적용
+        # (맵 변경 여부도 검출 프로세스 각자의 상태가 아니라 이 엔진의 현재 맵 기준으로 판단)
+        # 녹화 재생이면 직렬 모드처럼 예측 기준 시각도 녹화 시각 + 지연
+        now = captured_at + latency if self.engine.replay else None
+        with timer.stage('track'):
+            result = dict(self.engine.track(dict(result, map_changed=False), captured_at, now), skipped=False)
+        timer.add_frame(timings)
+        self.publish(result, rect, latency=latency)
 
     def run(self):
         self.running = True
-        self.sct = mss.mss()
+        with self._command_lock:
+            self._accepting_commands = True
+        self.grabber = create_grabber()
+        self.grabber.timer = self.engine.timer  # 캡처/색 변환 시간도 같은 통계에 기록
         self.status_update.emit("Tracking started")
-        self.last_position = None
-        
-        monitor = self.sct.monitors[1] # Primary monitor
-        
+        self.engine.reset()
+        self.engine.build_retrieval()  # 맵 로드 후 만들지 않았으면 첫 프레임 전에 구축
+        self.status_text = ""
+        self._last_stats_time = None
+        # 녹화 재생이면 예측 기준 시각도 녹화 시각 (벽시계와 무관하게 결정적)
+        self.engine.replay = self.grabber.replay
+
+        monitor = self.grabber.monitor # Primary monitor
+
+        if self.pipelined and self.engine.training:
+            # 키포인트 사용 기록은 이 프로세스의 엔진에 모여야 하므로 학습 중에는 직렬 모드로 실행
+            self.status_update.emit("Keypoint training runs in serial mode")
+            self.run_serial(monitor)
+        elif self.pipelined:
+            self.run_pipelined(monitor)
+        else:
+            self.run_serial(monitor)
+
+        self.grabber.close()
+        self.running = False  # 녹화 재생이 끝나서 멈춘 경우
+        # 이후 명령은 호출한 스레드에서 바로 실행하고, 남은 명령은 여기서 처리
+        with self._command_lock:
+            self._accepting_commands = False
+        self.apply_commands()
+        self.report_stats(force=True)  # 세션 전체 통계는 stop 이후에도 last_stats/dump_stats로 확인 가능
+        self.status_update.emit("Tracking stopped")
+        self.map_region_update.emit([])
+        self.engine.last_position = None
+
+    def set_position_demand(self, active):
+        """위치가 필요한 동안(내비게이션 이동 중) True: engine.target_fps로, 아니면 engine.heartbeat_fps로 처리"""
+        self.engine.set_position_demand(active)
+        if self.engine.position_demand:
+            self._wake.set()
+
+    @property
+    def max_speed_replay(self):
+        """realtime=False 녹화 재생 중이면 True (처리 주기 조절 없이 최대 속도로 읽음)"""
+        grabber = self.grabber
+        return grabber is not None and grabber.replay and not grabber.session.realtime
+
+    def current_fps(self):
+        """목표 처리 fps (0이면 쉬지 않음)"""
+        return self.engine.frame_rate(self.max_speed_replay)
+
+    def idle_wait(self):
+        """맵/캐릭터가 준비되지 않았을 때 heartbeat 주기로 대기 (수요가 생기면 즉시 깨어남)"""
+        self._wake.wait(1.0 / self.engine.heartbeat_fps)
+        self._wake.clear()
+
+    def pace(self, frame_start):
+        """
+        현재 목표 fps의 한 주기에서 이번 프레임 처리 시간을 뺀 만큼만 쉽니다.
+        처리가 주기보다 오래 걸렸거나 최대 속도 녹화 재생이면 쉬지 않고 바로 다음 프레임을 처리합니다.
+        """
+        delay = self.engine.frame_delay(time.perf_counter() - frame_start, self.max_speed_replay)
+        if delay > 0:
+            self._wake.wait(delay)
+        self._wake.clear()
+
+    def run_serial(self, monitor):
+        """기본 모드: 이 스레드에서 캡처 후 엔진으로 한 프레임씩 처리"""
         while self.running:
-            if not self.map_ready or self.template is None:
-                time.sleep(0.1)
+            self.apply_commands()
+            if not self.engine.ready:
+                self.idle_wait()
                 continue
-                
-            try:
-                # Capture screen (Full or Region)
-                rect = self.search_region if self.search_region else monitor
-                
-                try:
-                    screenshot = self.sct.grab(rect)
-                except Exception as e:
-                    self.status_update.emit(f"Grab failed: {e}")
-                    time.sleep(1)
-                    continue
 
-                img_screen_bgra = np.array(screenshot)
-                img_screen_bgr = cv2.cvtColor(img_screen_bgra, cv2.COLOR_BGRA2BGR)
-                img_screen_gray = cv2.cvtColor(img_screen_bgr, cv2.COLOR_BGR2GRAY)
-                
-                # 1. SIFT 특징점 검출 (화면)
-                kp_s, des_s = self.sift.detectAndCompute(img_screen_gray, None)
-                
-                if des_s is None or len(kp_s) < 4:
-                     self.status_update.emit("No features detected on screen")
-                     self.map_region_update.emit([])
-                     time.sleep(0.1)
-                     continue
-                
-                des_s = des_s.astype(np.float32)
-                
-                # 2. 모든 맵과 매칭하여 최적 맵 찾기
-                best_map = None
-                best_matches = []
-                max_good_matches = 0
-                new_slot = None
-                
-                for slot, map_data in self.maps.items():
-                    try:
-                        # FLANN 매칭
-                        matches = self.flann.knnMatch(map_data['des'], des_s, k=2)
-                        
-                        # Lowe's ratio test (더 엄격한 0.7 사용)
-                        good_matches = []
-                        for match_pair in matches:
-                            if len(match_pair) == 2:
-                                m, n = match_pair
-                                if m.distance < 0.7 * n.distance:
-                                    good_matches.append(m)
-                                
-                        if len(good_matches) > max_good_matches:
-                            max_good_matches = len(good_matches)
-                            best_map = map_data
-                            best_matches = good_matches
-                            new_slot = slot
-                    except Exception:
-                        continue
-
-                # 최소 매칭 수 확인
-                if best_map is None or max_good_matches < self.min_match_count:
-                    self.status_update.emit(f"Scanning... Best: {max_good_matches} matches (Screen: {len(kp_s)})")
-                    self.map_region_update.emit([])
-                    time.sleep(0.1)
-                    continue
-                
-                # 맵 변경 감지
-                if self.current_map_slot != new_slot:
-                    self.current_map_slot = new_slot
-                    self.last_position = None  # 맵 변경 시 위치 초기화
-                    self.map_dimensions.emit(best_map['w'], best_map['h'])
-                    self.status_update.emit(f"Detected: {best_map['name']}")
-
-                # 3. Homography 추정 (Affine보다 더 정확)
-                src_pts = np.float32([best_map['kp'][m.queryIdx].pt for m in best_matches]).reshape(-1, 1, 2)
-                dst_pts = np.float32([kp_s[m.trainIdx].pt for m in best_matches]).reshape(-1, 1, 2)
-                
-                # RANSAC으로 outlier 제거
-                H, mask = cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, 5.0)
-                
-                if H is None:
-                    self.status_update.emit(f"Homography failed ({best_map['name']})")
-                    self.map_region_update.emit([])
-                    time.sleep(0.1)
-                    continue
-                
-                # 4. 맵 영역 시각화 (Homography로 변환된 4개 코너)
-                h, w = best_map['h'], best_map['w']
-                pts = np.float32([[0, 0], [0, h-1], [w-1, h-1], [w-1, 0]]).reshape(-1, 1, 2)
-                
-                try:
-                    dst = cv2.perspectiveTransform(pts, H)
-                    
-                    offset_x = rect['left']
-                    offset_y = rect['top']
-                    
-                    # 변환된 영역의 바운딩 박스 계산
-                    dst_squeezed = dst.reshape(-1, 2)
-                    x_coords = dst_squeezed[:, 0]
-                    y_coords = dst_squeezed[:, 1]
-                    
-                    min_x, max_x = int(np.min(x_coords)), int(np.max(x_coords))
-                    min_y, max_y = int(np.min(y_coords)), int(np.max(y_coords))
-                    
-                    # 오버레이용 폴리곤 포인트
-                    final_points = []
-                    for pt in dst_squeezed:
-                        final_points.append((int(pt[0] + offset_x), int(pt[1] + offset_y)))
-                    self.map_region_update.emit(final_points)
-                    
-                    # 5. 전체 감지 영역에서 캐릭터 검색 (미니맵 밖에서도 찾을 수 있도록)
-                    search_area = img_screen_bgr
-                    
-                    # 6. 다중 스케일 템플릿 매칭
-                    best_val = 0
-                    best_loc = None
-                    best_scale_template = None
-                    
-                    for scale, scaled_template in self.template_scales:
-                        th, tw = scaled_template.shape[:2]
-                        
-                        # 템플릿이 검색 영역보다 크면 스킵
-                        if th > search_area.shape[0] or tw > search_area.shape[1]:
-                            continue
-                        
-                        res = cv2.matchTemplate(search_area, scaled_template, cv2.TM_CCOEFF_NORMED)
-                        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
-                        
-                        if max_val > best_val:
-                            best_val = max_val
-                            best_loc = max_loc
-                            best_scale_template = scaled_template
-                    
-                    if best_val >= self.char_threshold and best_loc is not None:
-                        th, tw = best_scale_template.shape[:2]
-                        
-                        # 화면 좌표 (전체 감지 영역 내 좌표)
-                        screen_center_x = best_loc[0] + tw / 2
-                        screen_center_y = best_loc[1] + th / 2
-                        
-                        # Homography 역변환으로 맵 좌표 계산
-                        H_inv = np.linalg.inv(H)
-                        screen_pt = np.array([[[screen_center_x, screen_center_y]]], dtype=np.float32)
-                        map_pt = cv2.perspectiveTransform(screen_pt, H_inv)
-                        
-                        target_x = map_pt[0][0][0]
-                        target_y = map_pt[0][0][1]
-                        
-                        # 7. 위치 스무딩 (急激한 변화 방지)
-                        if self.last_position is not None:
-                            last_x, last_y = self.last_position
-                            # 급격한 이동 감지 (맵 크기의 10% 이상 이동)
-                            jump_threshold = max(w, h) * 0.1
-                            distance = np.sqrt((target_x - last_x)**2 + (target_y - last_y)**2)
-                            
-                            if distance < jump_threshold:
-                                # 스무딩 적용
-                                target_x = self.position_smoothing * last_x + (1 - self.position_smoothing) * target_x
-                                target_y = self.position_smoothing * last_y + (1 - self.position_smoothing) * target_y
-                            # 급격한 이동은 새 위치 그대로 사용 (순간이동 등)
-                        
-                        self.last_position = (target_x, target_y)
-                        
-                        rel_x, rel_y = calculate_relative_coordinates(w, h, target_x, target_y)
-                        self.position_update.emit(best_map['name'], rel_x, rel_y)
-                        
-                        # Debug info
-                        self.status_update.emit(f"{best_map['name']} | Matches: {max_good_matches} | Conf: {best_val:.2f}")
-                    else:
-                        self.status_update.emit(f"{best_map['name']} found, Char missing (Conf: {best_val:.2f})")
-                        
-                except Exception as e:
-                     self.status_update.emit(f"Calc Error: {str(e)}")
-                     self.map_region_update.emit([])
-
-                time.sleep(0.05)
-                
+            frame_start = time.perf_counter()
+            # Capture screen (Full or Region)
+            rect = self.search_region if self.search_region else monitor
+
+            try:
+                # mss 버퍼를 복사 없이 감싸 BGRA에서 BGR/GRAY 재사용 버퍼로 바로 변환
+                frames = self.grabber.grab_bgr_gray(rect)
             except Exception as e:
-                self.status_update.emit(f"Error: {str(e)}")
-                self.map_region_update.emit([])
+                self.status_update.emit(f"Grab failed: {e}")
                 time.sleep(1)
-        
-        self.status_update.emit("Tracking stopped")
-        self.map_region_update.emit([])
-        self.last_position = None
+                continue
+            if frames is None:
+                self.status_update.emit("Replay finished")
+                break
+            img_screen_bgr, img_screen_gray = frames
+            captured_at = self.grabber.timestamp
+            if self.recorder is not None:
+                with self.engine.timer.stage('record'):
+                    self.record_frame(rect, monitor, captured_at)
+
+            self.publish(self.engine.process(img_screen_bgr, img_screen_gray, captured_at), rect)
+            self.pace(frame_start)
 
     def stop(self):
         self.running = False
+        self._wake.set()
         self.wait()
+        self.engine.close()
+        self.stop_recording()
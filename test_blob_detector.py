@@ -0,0 +1,60 @@
+import unittest
+import cv2
+import numpy as np
+from src.blob_detector import ColorBlobDetector, hsv_range_from_config
+
+def _minimap_with_dots(dots, size=(120, 400)):
+    # 어두운 회색 배경에 색 점 찍기 [(x, y, bgr)]
+    img = np.full(size + (3,), 60, dtype=np.uint8)
+    for x, y, color in dots:
+        cv2.circle(img, (x, y), 3, color, -1)
+    return img
+
+class TestColorBlobDetector(unittest.TestCase):
+    def setUp(self):
+        # 노란 마커 템플릿 (9x9, 가운데 원)
+        self.template = np.full((9, 9, 3), 60, dtype=np.uint8)
+        cv2.circle(self.template, (4, 4), 3, (0, 220, 255), -1)
+
+    def test_finds_single_marker(self):
+        detector = ColorBlobDetector.from_template(self.template)
+        img = _minimap_with_dots([(200, 50, (0, 220, 255)), (80, 30, (0, 0, 255))])
+        x, y = detector.detect(img)
+        self.assertAlmostEqual(x, 200.5, delta=1.0)
+        self.assertAlmostEqual(y, 50.5, delta=1.0)
+
+    def test_ambiguous_returns_none(self):
+        detector = ColorBlobDetector.from_template(self.template)
+        img = _minimap_with_dots([(200, 50, (0, 220, 255)), (300, 70, (0, 220, 255))])
+        self.assertIsNone(detector.detect(img))
+
+    def test_red_hue_wraps_around(self):
+        template = np.full((9, 9, 3), 60, dtype=np.uint8)
+        cv2.circle(template, (4, 4), 3, (0, 0, 230), -1)
+        detector = ColorBlobDetector.from_template(template)
+        self.assertEqual(len(detector.hue_ranges), 2)
+        self.assertIsNotNone(detector.detect(_minimap_with_dots([(150, 60, (0, 0, 230))])))
+
+    def test_explicit_hsv_range(self):
+        # 노란 테두리 + 빨간 중심 마커에서 빨간색만 마커로 지정
+        template = np.zeros((9, 9, 3), np.uint8)
+        template[:] = (0, 220, 255)
+        template[2:7, 2:7] = (0, 0, 255)
+        hsv_range = hsv_range_from_config({'hue': [[0, 5], [175, 179]], 'saturation': [100, 255]})
+        self.assertEqual(hsv_range, {'hue': [(0, 5), (175, 179)], 'saturation': (100, 255)})
+        detector = ColorBlobDetector.from_template(template, hsv_range=hsv_range)
+        self.assertEqual(detector.hue_ranges, [(0, 5), (175, 179)])
+        self.assertEqual(detector.marker_area, 25)
+        img = _minimap_with_dots([(80, 30, (0, 220, 255))])
+        img[48:53, 198:203] = (0, 0, 255)
+        x, y = detector.detect(img)
+        self.assertAlmostEqual(x, 200.5, delta=1.0)
+        self.assertAlmostEqual(y, 50.5, delta=1.0)
+        self.assertIsNone(hsv_range_from_config({'enabled': True}))
+
+    def test_colourless_template(self):
+        gray = np.full((9, 9, 3), 128, dtype=np.uint8)
+        self.assertIsNone(ColorBlobDetector.from_template(gray))
+
+if __name__ == '__main__':
+    unittest.main()
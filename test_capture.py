@@ -0,0 +1,51 @@
+import unittest
+import cv2
+import numpy as np
+from src.capture import FrameGrabber
+
+class FakeShot:
+    def __init__(self, bgra):
+        self.height, self.width = bgra.shape[:2]
+        self.raw = bytearray(bgra.tobytes())
+
+class FakeSct:
+    """mss 대신 정해진 BGRA 프레임을 돌려주는 테스트용 캡처 객체"""
+    monitors = [None, {'top': 0, 'left': 0, 'width': 8, 'height': 6}]
+
+    def __init__(self):
+        self.rng = np.random.default_rng(0)
+        self.last = None
+
+    def grab(self, rect):
+        self.last = self.rng.integers(0, 255, (rect['height'], rect['width'], 4), dtype=np.uint8)
+        return FakeShot(self.last)
+
+    def close(self):
+        pass
+
+class TestFrameGrabber(unittest.TestCase):
+    def setUp(self):
+        self.sct = FakeSct()
+        self.grabber = FrameGrabber(self.sct)
+
+    def test_conversions_match_cvtcolor(self):
+        bgr, gray = self.grabber.grab_bgr_gray()
+        np.testing.assert_array_equal(bgr, cv2.cvtColor(self.sct.last, cv2.COLOR_BGRA2BGR))
+        np.testing.assert_array_equal(gray, cv2.cvtColor(self.sct.last, cv2.COLOR_BGRA2GRAY))
+
+    def test_buffers_are_reused(self):
+        bgr1, gray1 = self.grabber.grab_bgr_gray()
+        bgr2, gray2 = self.grabber.grab_bgr_gray()
+        self.assertIs(bgr1, bgr2)
+        self.assertIs(gray1, gray2)
+        self.assertIs(self.grabber.grab_gray(), gray2)
+        # 크기가 바뀌면 새 버퍼
+        self.assertEqual(self.grabber.grab_gray({'top': 0, 'left': 0, 'width': 4, 'height': 3}).shape, (3, 4))
+
+    def test_bgra_view_wraps_raw_buffer(self):
+        bgra = self.grabber.grab()
+        self.assertFalse(bgra.flags['OWNDATA'])
+        np.testing.assert_array_equal(bgra, self.sct.last)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+from src.change_detector import FrameChangeDetector
+
+class TestFrameChangeDetector(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.frame = rng.integers(0, 255, (120, 400), dtype=np.uint8)
+
+    def test_identical_frames_are_skipped(self):
+        gate = FrameChangeDetector()
+        self.assertTrue(gate.is_changed(self.frame))  # 첫 프레임은 항상 처리
+        self.assertFalse(gate.is_changed(self.frame.copy()))
+        self.assertFalse(gate.is_changed(self.frame.copy()))
+        self.assertEqual(gate.skipped_total, 2)
+
+    def test_changed_frame_is_processed(self):
+        gate = FrameChangeDetector()
+        gate.is_changed(self.frame)
+        moved = np.roll(self.frame, 40, axis=1)
+        self.assertTrue(gate.is_changed(moved))
+        self.assertEqual(gate.skipped_total, 0)
+
+    def test_small_marker_move_is_processed(self):
+        # 전체 평균은 거의 그대로지만 9x9 마커가 2px 움직인 프레임
+        gate = FrameChangeDetector()
+        frame = np.full((120, 400), 90, np.uint8)
+        frame[50:59, 100:109] = 220
+        gate.is_changed(frame)
+        noisy = np.clip(frame + np.random.default_rng(1).normal(0, 2, frame.shape), 0, 255).astype(np.uint8)
+        self.assertFalse(gate.is_changed(noisy))  # 잡음만 있는 프레임은 스킵
+        moved = np.full((120, 400), 90, np.uint8)
+        moved[50:59, 102:111] = 220
+        self.assertTrue(gate.is_changed(moved))
+
+    def test_bypass_processes_every_frame(self):
+        gate = FrameChangeDetector()
+        gate.bypass = True
+        self.assertTrue(gate.is_changed(self.frame))
+        self.assertTrue(gate.is_changed(self.frame))
+        self.assertEqual(gate.skipped_total, 0)
+
+    def test_max_skip_forces_processing(self):
+        gate = FrameChangeDetector(max_skip=2)
+        gate.is_changed(self.frame)
+        self.assertFalse(gate.is_changed(self.frame))
+        self.assertFalse(gate.is_changed(self.frame))
+        self.assertTrue(gate.is_changed(self.frame))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,251 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import cv2
+import numpy as np
+from src.engine import TrackerEngine
+from src.synthetic import default_sprite, render_frame
+from src.utils import calculate_relative_coordinates
+
+class TestTrackerEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        gray = cv2.GaussianBlur(rng.integers(0, 255, (120, 240), dtype=np.uint8), (5, 5), 0)
+        cls.map_bgr = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+        cls.map_path = os.path.join(cls.tmp, "map.png")
+        cls.marker_path = os.path.join(cls.tmp, "marker.png")
+        cv2.imwrite(cls.map_path, cls.map_bgr)
+        cv2.imwrite(cls.marker_path, default_sprite())
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp)
+
+    def setUp(self):
+        self.messages = []
+        self.engine = TrackerEngine(on_status=self.messages.append)
+        self.engine.use_feature_cache = False
+        self.engine.use_pruned_models = False
+        self.assertTrue(self.engine.set_map_source(0, "Test", self.map_path))
+        self.assertTrue(self.engine.set_template(self.marker_path))
+
+    def tearDown(self):
+        self.engine.close()
+
+    def frame_at(self, map_x, map_y, offset=(15, 10)):
+        """맵을 offset에 그리고 맵 좌표 (map_x, map_y)에 마커를 올린 화면 프레임"""
+        h, w = self.map_bgr.shape[:2]
+        return render_frame(self.map_bgr, default_sprite(), (map_x, map_y), 1.0, offset, frame_size=(w + 40, h + 30))[0]
+
+    def test_process_locates_character(self):
+        result = self.engine.process(self.frame_at(100, 60), timestamp=0.0)
+        self.assertFalse(result['skipped'])
+        self.assertEqual(result['name'], "Test")
+        self.assertTrue(result['map_changed'])
+        self.assertEqual(result['tier'], 'full')
+        np.testing.assert_allclose(result['target'], (100, 60), atol=1.5)
+        self.assertEqual(result['relative'], calculate_relative_coordinates(240, 120, *result['position']))
+        self.assertIn('total', result['timings'])
+        self.assertIn("Detected: Test", self.messages)
+
+    def test_unchanged_frame_reuses_last_result(self):
+        frame = self.frame_at(100, 60)
+        first = self.engine.process(frame, timestamp=0.0)
+        second = self.engine.process(frame.copy(), timestamp=0.1)
+        self.assertTrue(second['skipped'])
+        self.assertEqual(second['relative'], first['relative'])
+
+    def test_follows_moving_character(self):
+        # 화면 변화 감지를 켠 채로: 마커만 움직인 프레임도 스킵되지 않아야 함
+        for i, x in enumerate(range(60, 140, 8)):
+            result = self.engine.process(self.frame_at(x, 60), timestamp=i / 30.0)
+            self.assertFalse(result['skipped'])
+            self.assertIsNotNone(result['target'])
+        # 두 번째 프레임부터는 맵이 바뀌지 않고, 추정 위치는 마지막 측정을 따라감
+        self.assertFalse(result['map_changed'])
+        self.assertAlmostEqual(result['position'][0], 132, delta=3)
+
+    def add_other_map(self):
+        other = cv2.cvtColor(cv2.GaussianBlur(np.random.default_rng(7).integers(0, 255, (120, 240), dtype=np.uint8),
+                                              (5, 5), 0), cv2.COLOR_GRAY2BGR)
+        other_path = os.path.join(self.tmp, "other.png")
+        cv2.imwrite(other_path, other)
+        self.assertTrue(self.engine.set_map_source(1, "Other", other_path))
+
+    def test_translation_model_on_scaled_minimap(self):
+        # 미니맵이 맵 스크린샷의 0.8배: 축 정렬 스케일 + 평행이동 모델로 위치를 찾아야 함
+        self.engine.set_registration_model('translation')
+        frame = render_frame(self.map_bgr, default_sprite(), (100, 60), 0.8)[0]
+        result = self.engine.process(frame, timestamp=0.0)
+        self.assertEqual(result['name'], "Test")
+        np.testing.assert_allclose(result['target'], (100, 60), atol=2.0)
+        with self.assertRaises(ValueError):
+            self.engine.set_registration_model('affine')
+
+    def test_color_blob_setting(self):
+        self.engine.set_color_blob(True)
+        self.assertIsNotNone(self.engine.blob_detector)
+        result = self.engine.process(self.frame_at(100, 60), timestamp=0.0)
+        self.assertEqual(result['conf'], 1.0)  # 색 덩어리 경로로 찾음
+        np.testing.assert_allclose(result['target'], (100, 60), atol=1.5)
+        # 마커에 없는 색 범위를 지정하면 검출기가 없어지고 템플릿 매칭으로 대체
+        self.engine.set_color_blob(True, {'hue': [(100, 110)]})
+        self.assertIsNone(self.engine.blob_detector)
+
+    def test_current_map_kept_when_shortlist_drops_it(self):
+        # 검색 인덱스가 현재 맵을 후보에서 빼도, 이미 매칭한 현재 맵 결과가 비교에 들어가야 함
+        self.add_other_map()
+        self.engine.current_map_slot = 0
+        self.engine.sticky_margin = 1000  # 현재 맵만으로 확정하지 않고 전체 검사까지 진행
+        self.engine.candidate_slots = lambda des_s: [1]
+        _, des_s = self.engine.feature_engine.detect(cv2.cvtColor(self.frame_at(100, 60), cv2.COLOR_BGR2GRAY))
+        slot, query_idx, _ = self.engine.find_best_map(des_s)
+        self.assertEqual(slot, 0)
+        self.assertGreater(len(query_idx), self.engine.min_match_count)
+
+    def test_map_verify_runs_while_locked(self):
+        # 잠금/빠른 단계가 계속 성공해도 map_verify_interval마다 전체 검색으로 맵을 재확인
+        self.add_other_map()
+        self.engine.map_verify_interval = 5
+        self.engine.frame_gate.enabled = False
+        for i in range(24):
+            result = self.engine.process(self.frame_at(100 + (i % 2), 60), timestamp=i / 30.0)
+            self.assertEqual(result['name'], "Test")
+        tiers = self.engine.tier_counts
+        self.assertGreater(tiers['track'] + tiers['fast'], 0)
+        self.assertGreaterEqual(tiers['full'], 4)
+
+    def test_homography_lock_holds_and_releases(self):
+        # lock_after_frames 프레임 연속 안정되면 잠금 -> 특징점 없이 잠금된 변환으로 추적
+        # 다른 맵은 밝기 분포가 다른 (어두운 왼쪽, 밝은 오른쪽) 무늬 맵
+        rng = np.random.default_rng(7)
+        gray = cv2.GaussianBlur(rng.integers(0, 128, (120, 240), dtype=np.uint8), (5, 5), 0)
+        other = cv2.cvtColor(gray + np.linspace(0, 127, 240).astype(np.uint8), cv2.COLOR_GRAY2BGR)
+        other_path = os.path.join(self.tmp, "gradient.png")
+        cv2.imwrite(other_path, other)
+        self.assertTrue(self.engine.set_map_source(1, "Other", other_path))
+        self.engine.frame_gate.enabled = False
+        self.engine.map_verify_interval = 0
+        self.engine.lock_verify_interval = 0
+        for i in range(self.engine.lock_after_frames):
+            self.engine.process(self.frame_at(100 + (i % 2), 60), timestamp=i / 30.0)
+        self.assertTrue(self.engine.locked)
+        self.assertIn("Homography locked (Test)", self.messages)
+        result = self.engine.process(self.frame_at(110, 60), timestamp=1.0)
+        self.assertEqual(result['tier'], 'track')
+        np.testing.assert_allclose(result['target'], (110, 60), atol=1.5)
+        # 캐릭터를 lock_miss_limit번 연속 못 찾으면 해제
+        for i in range(self.engine.lock_miss_limit):
+            self.assertTrue(self.engine.locked)
+            self.engine.process(self.frame_at(-100, -100), timestamp=2.0 + i)
+        self.assertFalse(self.engine.locked)
+        # 다시 잠근 뒤 다른 맵 화면이 오면 썸네일 비교로 해제하고 전체 검색으로 새 맵을 찾음
+        for i in range(self.engine.lock_after_frames):
+            self.engine.process(self.frame_at(100 + (i % 2), 60), timestamp=3.0 + i / 30.0)
+        self.assertTrue(self.engine.locked)
+        frame = render_frame(other, default_sprite(), (100, 60), frame_size=(280, 150))[0]
+        result = self.engine.process(frame, timestamp=4.0)
+        self.assertEqual(result['tier'], 'full')
+        self.assertEqual(result['name'], "Other")
+        self.assertNotEqual(self.engine.lock_slot, 0)
+
+    def test_predicted_roi_falls_back_to_full_search(self):
+        self.engine.frame_gate.enabled = False
+        self.engine.process(self.frame_at(40, 60), timestamp=0.0)
+        # 직전 위치(화면 55, 70) 주변 창만 검색
+        x0, y0, x1, y1 = self.engine.predicted_roi((150, 280), self.engine.lock_H)
+        self.assertTrue(x0 < 55 < x1 and y0 < 70 < y1)
+        self.assertLess(x1 - x0, 280)
+        # 캐릭터가 창 밖으로 순간이동: roi_miss_limit번 실패한 뒤 전체 영역 검색으로 다시 찾음
+        for i in range(self.engine.roi_miss_limit):
+            result = self.engine.process(self.frame_at(200, 60), timestamp=(i + 1) / 30.0)
+            self.assertIsNone(result['target'])
+        self.assertIsNone(self.engine.predicted_roi((150, 280), self.engine.lock_H))
+        result = self.engine.process(self.frame_at(200, 60), timestamp=1.0)
+        np.testing.assert_allclose(result['target'], (200, 60), atol=1.5)
+        self.assertEqual(self.engine.roi_misses, 0)
+
+    def test_scale_lock_engages_and_resets(self):
+        self.engine.frame_gate.enabled = False
+        unit = self.engine.template_scale_factors.index(1.0)
+        for i in range(self.engine.scale_lock_after):
+            self.assertIsNone(self.engine.locked_scale_idx)
+            self.engine.process(self.frame_at(100 + (i % 2), 60), timestamp=i / 30.0)
+        # 같은 스케일(1.0배)이 연속으로 이기면 그 스케일과 이웃 스케일만 시도
+        self.assertEqual(self.engine.locked_scale_idx, unit)
+        self.assertEqual(list(self.engine.active_scale_indices()), [unit - 1, unit, unit + 1])
+        # 캐릭터를 못 찾으면 전체 스케일 탐색 재개
+        self.engine.process(self.frame_at(-100, -100), timestamp=1.0)
+        self.assertIsNone(self.engine.locked_scale_idx)
+        self.assertEqual(len(self.engine.active_scale_indices()), len(self.engine.template_scales))
+        # 템플릿을 바꿔도 초기화
+        self.engine.locked_scale_idx = unit
+        self.assertTrue(self.engine.set_template(self.marker_path))
+        self.assertIsNone(self.engine.locked_scale_idx)
+
+    def test_parallel_matching_tie_break_matches_serial(self):
+        # 매칭 수가 같은 맵 세 개: 늦게 끝나는 맵이 앞 슬롯이어도 스레드 수와 관계없이 앞 슬롯이 이겨야 함
+        for slot in (1, 2):
+            self.engine.maps[slot] = dict(self.engine.maps[0], name=f"Copy{slot}")
+        same = (np.arange(40, dtype=np.int32), np.arange(40, dtype=np.int32))
+        def match_map(map_data, des_s):
+            time.sleep(0.03 if map_data['name'] == "Test" else 0.0)
+            return same
+        self.engine.match_map = match_map
+        picks = []
+        for workers in (1, 4, 4, 1):
+            self.engine.set_match_workers(workers)
+            self.engine.current_map_slot = None
+            picks.append(self.engine.find_best_map(None)[0])
+        self.assertEqual(picks, [0, 0, 0, 0])
+        # 스케일별 템플릿 매칭도 동점이면 작은 스케일 번호가 이김
+        self.engine.template_scales = [self.engine.template_scales[2]] * 3
+        self.engine.parallel_template_min_area = 0
+        search_area = self.frame_at(100, 60)
+        for workers in (1, 4):
+            self.engine.set_match_workers(workers)
+            self.engine.reset_scale_lock()
+            center, _ = self.engine.match_character_template(search_area)
+            np.testing.assert_allclose(center, (115, 70), atol=1.0)
+            self.assertEqual(self.engine.scale_streak_idx, 0)
+
+    def test_demand_driven_pacing(self):
+        # 대기 중에는 heartbeat 주기, 이동 중(위치 수요)에는 target 주기에서 처리 시간을 뺀 만큼만 쉼
+        self.engine.target_fps, self.engine.heartbeat_fps = 20, 2
+        self.assertEqual(self.engine.frame_rate(), 2)
+        self.assertAlmostEqual(self.engine.frame_delay(0.1), 0.4)
+        self.engine.set_position_demand(True)
+        self.assertEqual(self.engine.frame_rate(), 20)
+        self.assertAlmostEqual(self.engine.frame_delay(0.01), 0.04)
+        self.assertEqual(self.engine.frame_delay(0.08), 0.0)  # 주기보다 오래 걸리면 바로 다음 프레임
+        self.assertEqual(self.engine.frame_rate(max_speed=True), 0)
+        self.assertEqual(self.engine.frame_delay(0.0, max_speed=True), 0.0)
+        # 이동 중에는 화면이 그대로여도 매 프레임 새로 측정
+        frame = self.frame_at(100, 60)
+        self.engine.process(frame, timestamp=0.0)
+        self.assertFalse(self.engine.process(frame.copy(), timestamp=0.1)['skipped'])
+        self.engine.set_position_demand(False)
+        self.assertTrue(self.engine.process(frame.copy(), timestamp=0.2)['skipped'])
+        self.assertAlmostEqual(self.engine.frame_delay(0.01), 0.49)
+
+    def test_orb_engine_skips_extra_fast_model(self):
+        self.engine.set_feature_engine('orb', 'lsh', nfeatures=1000)
+        self.assertTrue(self.engine.set_map_source(0, "Test", self.map_path))
+        self.assertIsNone(self.engine.maps[0]['fast'])
+        self.engine.set_feature_engine('sift')
+        self.assertTrue(self.engine.set_map_source(0, "Test", self.map_path))
+        self.assertIsNotNone(self.engine.maps[0]['fast'])
+
+    def test_measure_without_map(self):
+        blank = np.zeros((150, 280, 3), np.uint8)
+        result = self.engine.process(blank, timestamp=0.0)
+        self.assertIsNone(result['slot'])
+        self.assertIsNone(result['relative'])
+        self.assertEqual(self.engine.tier_counts['miss'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+import cv2
+import numpy as np
+from src.features import (ratio_test, feature_cache_key, save_features, load_features, FeatureEngine,
+                          compact_descriptors, DescriptorPCA)
+
+class TestRatioTest(unittest.TestCase):
+    def test_filters_ambiguous_matches(self):
+        # 질의 0: 1순위가 확실히 가까움 -> 통과
+        # 질의 1: 1순위와 2순위가 비슷함 -> 탈락
+        indices = np.array([[5, 7], [2, 3]], dtype=np.int32)
+        dists = np.array([[1.0, 10.0], [9.0, 10.0]], dtype=np.float32)
+        query_idx, train_idx = ratio_test(indices, dists, ratio=0.7)
+        self.assertEqual(query_idx.tolist(), [0])
+        self.assertEqual(train_idx.tolist(), [5])
+
+    def test_squared_distance_threshold(self):
+        # 제곱 거리 0.45 < 0.49 이므로 통과, 비제곱 기준(0.7)에서는 0.45 < 0.7 도 통과
+        # 제곱 거리 0.6은 제곱 기준(0.49)에서 탈락, 비제곱 기준(0.7)에서는 통과
+        indices = np.array([[0, 1], [2, 3]], dtype=np.int32)
+        dists = np.array([[0.45, 1.0], [0.6, 1.0]], dtype=np.float32)
+        self.assertEqual(ratio_test(indices, dists, 0.7, squared=True)[0].tolist(), [0])
+        self.assertEqual(ratio_test(indices, dists, 0.7, squared=False)[0].tolist(), [0, 1])
+
+    def test_invalid_neighbours_are_ignored(self):
+        indices = np.array([[4, -1]], dtype=np.int32)
+        dists = np.array([[0.0, 0.0]], dtype=np.float32)
+        query_idx, train_idx = ratio_test(indices, dists)
+        self.assertEqual(len(query_idx), 0)
+        self.assertEqual(len(train_idx), 0)
+
+class TestFeatureCache(unittest.TestCase):
+    def test_key_depends_on_image_and_params(self):
+        img = np.arange(16, dtype=np.uint8)
+        key = feature_cache_key(img, {'nfeatures': 3000})
+        self.assertEqual(key, feature_cache_key(img.copy(), {'nfeatures': 3000}))
+        self.assertNotEqual(key, feature_cache_key(img, {'nfeatures': 2000}))
+        self.assertNotEqual(key, feature_cache_key(img[::-1].copy(), {'nfeatures': 3000}))
+
+    def test_round_trip(self):
+        kp = [cv2.KeyPoint(1.5, 2.5, 3.0, 45.0, 0.1, 2, -1), cv2.KeyPoint(10, 20, 4.0)]
+        des = (np.arange(2 * 128, dtype=np.float32) % 256).reshape(2, 128)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cache', 'k.npz')
+            save_features(path, kp, des)
+            loaded_pts, loaded_des = load_features(path)
+        np.testing.assert_array_equal(loaded_pts, [[1.5, 2.5], [10, 20]])
+        # SIFT처럼 0~255 정수 값은 uint8로 손실 없이 저장
+        self.assertEqual(loaded_des.dtype, np.uint8)
+        np.testing.assert_array_equal(loaded_des.astype(np.float32), des)
+
+    def test_missing_cache(self):
+        self.assertIsNone(load_features(os.path.join(tempfile.gettempdir(), 'no_such_cache.npz')))
+
+class TestCompactDescriptors(unittest.TestCase):
+    def test_non_integer_descriptors_use_float16(self):
+        des = np.float32([[0.5, 300.25]])
+        self.assertEqual(compact_descriptors(des).dtype, np.float16)
+
+    def test_pca_preserves_nearest_neighbour(self):
+        rng = np.random.default_rng(0)
+        # 저차원 구조가 있는 디스크립터: 8차원 잠재 변수를 128차원으로 투영
+        des = (rng.normal(size=(300, 8)) @ rng.normal(size=(8, 128))).astype(np.float32)
+        pca = DescriptorPCA.fit(des, 16)
+        reduced = pca.project(des)
+        self.assertEqual(reduced.shape, (300, 16))
+        query = pca.project(des[:10] + rng.normal(0, 0.01, (10, 128)))
+        nearest = np.argmin(((query[:, None, :] - reduced[None]) ** 2).sum(-1), axis=1)
+        self.assertEqual(nearest.tolist(), list(range(10)))
+        np.testing.assert_allclose(pca.reconstruct(reduced), des, atol=1e-3)
+
+class TestFeatureEngine(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.map = cv2.GaussianBlur(rng.integers(0, 255, (200, 600), dtype=np.uint8), (5, 5), 0)
+        self.screen = self.map[30:170, 100:500].copy()
+
+    def _check_engine(self, detector, matcher):
+        engine = FeatureEngine(detector, matcher, nfeatures=1000)
+        kp_m, des_m = engine.detect(self.map)
+        kp_s, des_s = engine.detect(self.screen)
+        query_idx, train_idx = engine.match(engine.build_index(des_m), des_s)
+        self.assertGreater(len(query_idx), 20)
+        # 잘라낸 위치만큼 이동한 특징점과 대응되어야 함
+        shift = np.float32([kp_s[q].pt for q in query_idx]) - np.float32([kp_m[t].pt for t in train_idx])
+        np.testing.assert_allclose(np.median(shift, axis=0), [-100, -30], atol=1.0)
+
+    def test_sift_kdtree(self):
+        self._check_engine('sift', 'kdtree')
+
+    def test_orb_lsh(self):
+        self._check_engine('orb', 'lsh')
+
+    def test_orb_bruteforce_hamming(self):
+        self._check_engine('orb', 'bf')
+
+    def test_invalid_combination(self):
+        with self.assertRaises(ValueError):
+            FeatureEngine('sift', 'lsh')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import numpy as np
+from src.motion import ConstantVelocityKalman
+
+class TestConstantVelocityKalman(unittest.TestCase):
+    def test_estimates_velocity_of_steady_walk(self):
+        kf = ConstantVelocityKalman()
+        for i in range(30):
+            t = i / 30.0
+            kf.update((100 + 60 * t, 50), t)
+        vx, vy = kf.velocity
+        self.assertAlmostEqual(vx, 60, delta=1.0)
+        self.assertAlmostEqual(vy, 0, delta=1.0)
+
+    def test_predict_extrapolates_and_clamps(self):
+        kf = ConstantVelocityKalman(max_horizon=0.5)
+        for i in range(30):
+            t = i / 30.0
+            kf.update((100 + 60 * t, 50), t)
+        x0, _ = kf.position
+        x_pred, _ = kf.predict(kf.timestamp + 0.1)
+        self.assertAlmostEqual(x_pred - x0, 6, delta=0.5)
+        # max_horizon 이후로는 더 외삽하지 않음
+        np.testing.assert_allclose(kf.predict(kf.timestamp + 5), kf.predict(kf.timestamp + 0.5))
+        # 상태는 바뀌지 않음
+        self.assertEqual(kf.position[0], x0)
+
+    def test_jump_restarts_at_measurement(self):
+        kf = ConstantVelocityKalman()
+        for i in range(10):
+            kf.update((100 + i, 50), i / 30.0)
+        self.assertEqual(kf.update((400, 80), 10 / 30.0, jump_threshold=20), (400.0, 80.0))
+        self.assertEqual(kf.velocity, (0.0, 0.0))
+
+    def test_reduces_noise_when_stationary(self):
+        rng = np.random.default_rng(0)
+        kf = ConstantVelocityKalman()
+        raw, filtered = [], []
+        for i in range(120):
+            z = np.array([200.0, 100.0]) + rng.normal(0, 1.0, 2)
+            est = kf.update(z, i / 30.0)
+            if i >= 30:
+                raw.append(np.linalg.norm(z - (200, 100)))
+                filtered.append(np.linalg.norm(np.subtract(est, (200, 100))))
+        self.assertLess(np.mean(filtered), np.mean(raw))
+
+if __name__ == '__main__':
+    unittest.main()
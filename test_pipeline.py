@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import cv2
+import numpy as np
+from src.engine import TrackerEngine
+from src.pipeline import SharedFrameRing, CapturePipeline, FrameProcessor
+from src.synthetic import textured_map, default_sprite
+
+class CounterSource:
+    """테스트용 캡처 소스: 프레임 전체를 순번 값으로 채움 (255 프레임 후 종료, 캡처 시각 = 순번 / 10)"""
+    def __init__(self, shape):
+        self.shape = shape
+        self.count = 0
+
+    @property
+    def timestamp(self):
+        return self.count / 10.0
+
+    def grab(self):
+        if self.count >= 255:
+            return None
+        self.count += 1
+        return np.full(self.shape, self.count, dtype=np.uint8)
+
+class MeanProcessor:
+    def __call__(self, frame):
+        return int(frame[0, 0, 0])
+
+class FailingProcessor:
+    def __init__(self):
+        raise ValueError("no maps")
+
+class TestSharedFrameRing(unittest.TestCase):
+    def setUp(self):
+        self.ring = SharedFrameRing((4, 6, 4), slots=3)
+
+    def tearDown(self):
+        self.ring.close()
+
+    def test_latest_frame_wins(self):
+        for value in (1, 2, 3):
+            self.ring.write(np.full((4, 6, 4), value, np.uint8), timestamp=float(value))
+        # 쌓인 프레임 중 최신(3)만 가져가고, 같은 프레임은 두 번 가져갈 수 없음
+        seq = self.ring.claim_latest()
+        self.assertEqual(seq, 2)
+        self.assertIsNone(self.ring.claim_latest())
+        frame, timestamp, written_at = self.ring.read(seq)
+        self.assertTrue(np.all(frame == 3))
+        self.assertEqual(timestamp, 3.0)
+        self.assertGreater(written_at, 3.0)  # 링에 쓴 벽시계 시각은 따로 기록
+        # 가져간 프레임을 처리 완료할 때까지는 남은 처리가 있음
+        self.assertFalse(self.ring.drained)
+        self.ring.release()
+        self.assertTrue(self.ring.drained)
+
+    def test_overwritten_slot_is_rejected(self):
+        for value in range(5):
+            self.ring.write(np.full((4, 6, 4), value, np.uint8))
+        # 슬롯 3개를 돌아가며 쓰므로 순번 0은 순번 3에 덮어써짐
+        self.assertIsNone(self.ring.read(0))
+        self.assertIsNotNone(self.ring.read(4))
+
+class TestCapturePipeline(unittest.TestCase):
+    def test_results_arrive_in_order(self):
+        shape = (8, 8, 4)
+        pipeline = CapturePipeline(shape, (CounterSource, {'shape': shape}), (MeanProcessor, {}),
+                                   detectors=2, capture_fps=200)
+        pipeline.start()
+        results = []
+        try:
+            deadline = time.time() + 20
+            while time.time() < deadline and (not results or results[-1][2] < 255):
+                packet = pipeline.poll(timeout=0.1)
+                if packet is not None:
+                    results.append(packet)
+            # 소스가 끝나면 캡처 프로세스가 정상 종료하고 남은 처리가 없음
+            while time.time() < deadline and not pipeline.finished:
+                time.sleep(0.01)
+            self.assertTrue(pipeline.source_ended)
+            self.assertTrue(pipeline.finished)
+            self.assertFalse(pipeline.alive)
+        finally:
+            pipeline.stop()
+        self.assertTrue(results)
+        seqs = [seq for seq, _, _, _ in results]
+        self.assertEqual(seqs, sorted(set(seqs)))
+        # 결과 값은 해당 순번 프레임 내용과 일치 (순번 0 -> 값 1), 시각은 소스의 캡처 시각
+        self.assertTrue(all(value == seq + 1 for seq, _, value, _ in results))
+        self.assertTrue(all(timestamp == (seq + 1) / 10.0 for seq, timestamp, _, _ in results))
+
+    def test_detector_init_failure_is_reported(self):
+        shape = (8, 8, 4)
+        pipeline = CapturePipeline(shape, (CounterSource, {'shape': shape}), (FailingProcessor, {}),
+                                   detectors=1, capture_fps=200)
+        pipeline.start()
+        try:
+            packet = None
+            deadline = time.time() + 20
+            while packet is None and time.time() < deadline:
+                packet = pipeline.poll(timeout=0.1)
+        finally:
+            pipeline.stop()
+        self.assertIsNone(packet[0])
+        self.assertIn("no maps", packet[2]['error'])
+
+class TestFrameProcessor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.map_path = os.path.join(self.tmp, "map.png")
+        self.sprite_path = os.path.join(self.tmp, "sprite.png")
+        cv2.imwrite(self.map_path, textured_map())
+        cv2.imwrite(self.sprite_path, default_sprite())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_spec_carries_engine_settings(self):
+        engine = TrackerEngine()
+        engine.use_feature_cache = False
+        engine.descriptor_pca_dims = 32
+        engine.sticky_map = False
+        self.assertTrue(engine.set_map_source(0, "Map", self.map_path))
+        self.assertTrue(engine.set_template(self.sprite_path))
+        processor = FrameProcessor(**engine.pipeline_spec())
+        self.assertEqual(processor.maps[0]['pca'].dims, 32)
+        self.assertFalse(processor.engine.sticky_map)
+        self.assertFalse(processor.engine.use_feature_cache)
+
+    def test_missing_map_raises(self):
+        maps = [{'slot': 0, 'name': "Missing", 'path': os.path.join(self.tmp, "missing.png")}]
+        with self.assertRaises(ValueError):
+            FrameProcessor(maps, self.sprite_path, use_feature_cache=False)
+
+if __name__ == '__main__':
+    unittest.main()
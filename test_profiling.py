@@ -0,0 +1,55 @@
+import csv
+import os
+import tempfile
+import unittest
+from src.profiling import StageTimer, HISTOGRAM_EDGES_MS
+
+class TestStageTimer(unittest.TestCase):
+    def test_ring_keeps_recent_samples(self):
+        timer = StageTimer(capacity=4)
+        for ms in (100, 100, 1, 2, 3, 4):
+            timer.add('detect', ms * 1000000)
+        stats = timer.snapshot()['stages']['detect']
+        self.assertEqual(stats['count'], 6)
+        # 링에는 최근 4개만 남음 (100ms 표본은 밀려남)
+        self.assertEqual(stats['max'], 4.0)
+        self.assertAlmostEqual(stats['mean'], 2.5)
+        self.assertEqual(sum(stats['histogram']), 4)
+        self.assertEqual(len(stats['histogram']), len(HISTOGRAM_EDGES_MS) + 1)
+
+    def test_frame_timings_accumulate_and_reset(self):
+        timer = StageTimer()
+        timer.add('match/A', 2000000)
+        timer.add('match/B', 3000000)
+        with timer.stage('template'):
+            pass
+        self.assertAlmostEqual(timer.current_ms()['match/A'], 2.0)
+        timings = timer.end_frame()
+        self.assertEqual(set(timings), {'match/A', 'match/B', 'template'})
+        self.assertEqual(timer.current_ms(), {})
+        timer.add_frame({'detect': 5.0, 'total': 7.5})
+        self.assertEqual(timer.frames, 2)
+        self.assertAlmostEqual(timer.snapshot()['stages']['total']['p50'], 7.5)
+
+    def test_summary_and_csv(self):
+        timer = StageTimer()
+        self.assertEqual(timer.summary(), "0.0 fps")
+        timer.add('detect', 6000000)
+        timer.add('match/A', 1000000)
+        timer.add('grab', 1000000)
+        summary = timer.summary()
+        # 세부 단계('/')는 요약에서 빠지고 SUMMARY_STAGES 순서를 따름
+        self.assertTrue(summary.endswith("| grab 1.0 | detect 6.0 ms"))
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        try:
+            timer.write_csv(path)
+            with open(path, newline='', encoding='utf-8') as f:
+                rows = list(csv.reader(f))
+            self.assertEqual(rows[0][:3], ['stage', 'count', 'mean_ms'])
+            self.assertEqual([r[0] for r in rows[1:]], ['detect', 'grab', 'match/A'])
+        finally:
+            os.remove(path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import cv2
+import numpy as np
+from src.features import FeatureEngine, keypoints_to_array
+from src.pruning import KeypointUsage, train_keypoint_usage
+
+class TestKeypointUsage(unittest.TestCase):
+    def test_counts_inliers_once_per_frame(self):
+        usage = KeypointUsage(5)
+        # 특징점 1은 같은 프레임에서 두 번 잡혀도 1회, 특징점 3은 outlier
+        usage.record(np.array([1, 1, 2, 3]), np.array([[1], [1], [1], [0]], dtype=np.uint8))
+        usage.record(np.array([1, 4]))
+        self.assertEqual(usage.hits.tolist(), [0, 2, 1, 0, 1])
+        self.assertEqual(usage.frames, 2)
+
+    def test_select_keeps_frequent_keypoints(self):
+        usage = KeypointUsage(6)
+        usage.hits[:] = [0, 5, 1, 3, 0, 2]
+        usage.frames = 10
+        self.assertEqual(usage.select(min_hits=2, min_hit_ratio=0.0, min_keep=0).tolist(), [1, 3, 5])
+        # 비율 기준이 더 엄격하면 비율 기준 사용 (10프레임의 30% -> 3회)
+        self.assertEqual(usage.select(min_hits=2, min_hit_ratio=0.3, min_keep=0).tolist(), [1, 3])
+
+    def test_select_fills_up_to_min_keep(self):
+        usage = KeypointUsage(4)
+        usage.hits[:] = [1, 0, 4, 2]
+        usage.frames = 4
+        self.assertEqual(usage.select(min_hits=4, min_hit_ratio=0.0, min_keep=3).tolist(), [0, 2, 3])
+
+class TestTrainKeypointUsage(unittest.TestCase):
+    def test_frames_from_map_record_hits(self):
+        rng = np.random.default_rng(0)
+        map_gray = cv2.GaussianBlur(rng.integers(0, 255, (120, 240), dtype=np.uint8), (5, 5), 0)
+        engine = FeatureEngine('orb', 'bf', nfeatures=500)
+        kp, des = engine.detect(map_gray)
+        pts = keypoints_to_array(kp)
+        index = engine.build_index(des)
+
+        frames = [cv2.warpAffine(map_gray, np.float32([[1, 0, dx], [0, 1, dy]]), (260, 140))
+                  for dx, dy in [(5, 3), (10, 8), (2, 12)]]
+        usage = train_keypoint_usage(engine, pts, index, frames)
+        self.assertEqual(usage.frames, 3)
+        self.assertGreater(int(np.count_nonzero(usage.hits)), 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from src.capture import FrameGrabber, create_grabber, set_frame_source
+from src.recording import SessionRecorder, SessionReader, ReplaySession, ReplayGrabber
+
+REGION = {'left': 10, 'top': 20, 'width': 6, 'height': 4}
+MONITOR = {'left': 0, 'top': 0, 'width': 32, 'height': 24}
+
+def region_frame(value):
+    return np.full((4, 6, 4), value, np.uint8)
+
+def monitor_frame(value):
+    frame = np.zeros((24, 32, 4), np.uint8)
+    frame[20:24, 10:16] = value
+    return frame
+
+class TestSessionRecording(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        recorder = SessionRecorder(self.path, chunk_size=4)
+        # 감지 영역 10프레임 (0.1초 간격), 전체 화면은 0.5초마다
+        for i in range(10):
+            recorder.write('region', region_frame(i + 1), 100.0 + i * 0.1, REGION)
+            if i % 5 == 0:
+                recorder.write('monitor', monitor_frame(i + 1), 100.0 + i * 0.1, MONITOR)
+        recorder.close()
+
+    def tearDown(self):
+        set_frame_source(None)
+        shutil.rmtree(self.path)
+
+    def test_round_trip_across_chunks(self):
+        reader = SessionReader(self.path)
+        self.assertEqual(reader.count('region'), 10)
+        self.assertEqual(len(reader.chunks['region']), 3)
+        self.assertEqual(reader.monitor, MONITOR)
+        values = [int(frame[0, 0, 0]) for _, frame, _ in reader.frames('region')]
+        self.assertEqual(values, list(range(1, 11)))
+        timestamp, _, rect = reader.frame('region', 5)
+        self.assertAlmostEqual(timestamp, 100.5)
+        self.assertEqual(rect, REGION)
+        self.assertEqual(reader.index_at('monitor', 100.45), 0)
+        self.assertEqual(reader.index_at('monitor', 99.0), -1)
+
+    def test_large_frames_use_small_chunks(self):
+        # 한 장이 chunk_bytes의 절반 정도인 프레임은 2장씩 청크로 저장
+        path = tempfile.mkdtemp()
+        try:
+            recorder = SessionRecorder(path, chunk_size=64, chunk_bytes=monitor_frame(0).nbytes * 2)
+            for i in range(5):
+                recorder.write('monitor', monitor_frame(i + 1), float(i), MONITOR)
+            recorder.close()
+            reader = SessionReader(path)
+            self.assertEqual([c['count'] for c in reader.chunks['monitor']], [2, 2, 1])
+            self.assertEqual([int(f[21, 11, 0]) for _, f, _ in reader.frames('monitor')], [1, 2, 3, 4, 5])
+        finally:
+            shutil.rmtree(path)
+
+    def test_max_speed_replay_reads_every_frame(self):
+        grabber = ReplaySession(self.path, realtime=False).grabber()
+        self.assertTrue(grabber.replay)
+        values = []
+        while True:
+            frames = grabber.grab_bgr_gray(REGION)
+            if frames is None:
+                break
+            values.append(int(frames[1][0, 0]))
+        self.assertEqual(values, list(range(1, 11)))
+        self.assertAlmostEqual(grabber.timestamp, 100.9)
+
+    def test_monitor_follows_replay_clock(self):
+        session = ReplaySession(self.path, realtime=False)
+        tracker = session.grabber()
+        screen = session.grabber()
+        for _ in range(7):
+            tracker.grab(REGION)
+        # 재생 시각 100.6 -> 100.5에 찍은 전체 화면, 다른 영역은 잘라서 반환
+        self.assertEqual(int(screen.grab()[21, 11, 0]), 6)
+        self.assertEqual(int(screen.grab({'left': 10, 'top': 20, 'width': 3, 'height': 2})[0, 0, 0]), 6)
+        self.assertEqual(screen.grab_gray({'left': 0, 'top': 0, 'width': 8, 'height': 8}).shape, (8, 8))
+
+    def test_monitor_crop_outside_recording_keeps_shape(self):
+        screen = ReplaySession(self.path, realtime=False).grabber()
+        # 왼쪽 위로 벗어난 영역: 요청 크기 그대로, 벗어난 부분은 0
+        frame = screen.grab({'left': -2, 'top': 18, 'width': 16, 'height': 4})
+        self.assertEqual(frame.shape, (4, 16, 4))
+        self.assertEqual(int(frame[2, 12, 0]), 1)  # 모니터 (10, 20)
+        self.assertEqual(int(frame[2, 11, 0]), 0)  # 모니터 (9, 20)
+        # 오른쪽 아래로 벗어난 영역
+        frame = screen.grab({'left': 28, 'top': 22, 'width': 8, 'height': 6})
+        self.assertEqual(frame.shape, (6, 8, 4))
+        self.assertFalse(frame[2:, 4:].any())
+        # 녹화 영역과 겹치지 않으면 None
+        self.assertIsNone(screen.grab({'left': 40, 'top': 0, 'width': 8, 'height': 8}))
+
+    def test_realtime_replay_skips_to_latest(self):
+        grabber = ReplaySession(self.path, realtime=True, speed=20.0).grabber()
+        values = []
+        while True:
+            frame = grabber.grab(REGION)
+            if frame is None:
+                break
+            values.append(int(frame[0, 0, 0]))
+        self.assertEqual(values, sorted(set(values)))
+        self.assertEqual(values[-1], 10)
+
+    def test_frame_source_switch(self):
+        self.assertIsInstance(create_grabber(), FrameGrabber)
+        set_frame_source(ReplaySession(self.path, realtime=False))
+        self.assertIsInstance(create_grabber(), ReplayGrabber)
+
+if __name__ == '__main__':
+    unittest.main()
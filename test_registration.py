@@ -0,0 +1,55 @@
+import unittest
+import cv2
+import numpy as np
+from src.registration import REGISTRATION_MODELS, estimate_transform
+
+def correspondences(H, count=80, outliers=0.25, seed=0):
+    """맵 좌표 점들과 H로 옮긴 화면 좌표 (일부는 엉뚱한 위치로 바꾼 오매칭)"""
+    rng = np.random.default_rng(seed)
+    src = rng.uniform(0, 400, (count, 2)).astype(np.float32)
+    dst = cv2.perspectiveTransform(src.reshape(-1, 1, 2), H).reshape(-1, 2)
+    dst += rng.normal(0, 0.3, dst.shape).astype(np.float32)
+    bad = rng.random(count) < outliers
+    dst[bad] = rng.uniform(0, 400, (int(bad.sum()), 2))
+    return src.reshape(-1, 1, 2), dst.reshape(-1, 1, 2).astype(np.float32), ~bad
+
+class TestRegistration(unittest.TestCase):
+    def test_models_recover_scaled_minimap(self):
+        # 미니맵: 축 정렬, 균일 스케일 0.6 + 평행이동
+        H = np.array([[0.6, 0, 15], [0, 0.6, 10], [0, 0, 1]], np.float64)
+        src, dst, good = correspondences(H)
+        corners = np.float32([[0, 0], [400, 0], [400, 400], [0, 400]]).reshape(-1, 1, 2)
+        expected = cv2.perspectiveTransform(corners, H)
+        for model in REGISTRATION_MODELS:
+            H_est, mask = estimate_transform(model, src, dst)
+            self.assertIsNotNone(H_est, model)
+            self.assertEqual(mask.shape, (len(src), 1))
+            err = np.abs(cv2.perspectiveTransform(corners, H_est) - expected).max()
+            self.assertLess(err, 1.0, model)
+            # 오매칭은 inlier에서 빠짐
+            self.assertFalse(np.any(mask.ravel().astype(bool) & ~good), model)
+
+    def test_translation_is_axis_aligned(self):
+        H = np.array([[1.3, 0, -20], [0, 1.3, 5], [0, 0, 1]], np.float64)
+        src, dst, _ = correspondences(H, outliers=0.0)
+        H_est, _ = estimate_transform('translation', src, dst)
+        self.assertAlmostEqual(H_est[0, 0], 1.3, places=2)
+        self.assertEqual(H_est[0, 1], 0.0)
+        self.assertEqual(H_est[1, 0], 0.0)
+        self.assertEqual(H_est[0, 0], H_est[1, 1])
+
+    def test_translation_from_single_match(self):
+        src = np.float32([[[10, 20]]])
+        dst = np.float32([[[35, 50]]])
+        H, mask = estimate_transform('translation', src, dst)
+        np.testing.assert_allclose(H, [[1, 0, 25], [0, 1, 30], [0, 0, 1]])
+        self.assertEqual(mask.ravel().tolist(), [1])
+
+    def test_too_few_matches_and_unknown_model(self):
+        src = np.float32([[[0, 0]], [[10, 0]], [[0, 10]]])
+        self.assertEqual(estimate_transform('homography', src, src), (None, None))
+        with self.assertRaises(ValueError):
+            estimate_transform('affine', src, src)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import cv2
+import numpy as np
+from src.retrieval import MapRetrievalIndex
+
+def _textured_map(seed, shape=(160, 480)):
+    # 맵마다 다른 무늬를 가진 가짜 미니맵 이미지
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 255, shape, dtype=np.uint8)
+    return cv2.GaussianBlur(noise, (5, 5), 0)
+
+class TestMapRetrievalIndex(unittest.TestCase):
+    def test_shortlist_ranks_matching_map_first(self):
+        sift = cv2.SIFT_create(nfeatures=500)
+        maps = {}
+        for slot in range(6):
+            _, des = sift.detectAndCompute(_textured_map(slot), None)
+            maps[slot] = des.astype(np.float32)
+
+        index = MapRetrievalIndex(vocab_size=64)
+        index.build(maps)
+        self.assertTrue(index.ready)
+
+        # 4번 맵의 일부를 잘라 화면처럼 사용
+        screen = _textured_map(4)[20:140, 100:400]
+        _, des_s = sift.detectAndCompute(screen, None)
+        shortlist = index.shortlist(des_s.astype(np.float32), 2)
+        self.assertEqual(len(shortlist), 2)
+        self.assertEqual(shortlist[0], 4)
+
+    def test_binary_descriptors_use_hamming_vocabulary(self):
+        orb = cv2.ORB_create(nfeatures=1000)
+        maps = {slot: orb.detectAndCompute(_textured_map(slot), None)[1] for slot in range(6)}
+        index = MapRetrievalIndex()
+        index.build(maps)
+        # 단어 중심도 비트열 (L2 k-means의 실수 중심이 아님)
+        self.assertTrue(index.binary)
+        self.assertEqual(index.vocabulary.dtype, np.uint8)
+        self.assertEqual(index.vocabulary.shape, (256, 32))
+        for slot in range(6):
+            _, des_s = orb.detectAndCompute(_textured_map(slot)[20:140, 100:400], None)
+            self.assertIn(slot, index.shortlist(des_s, 2))
+
+    def test_empty_index_returns_all_slots(self):
+        index = MapRetrievalIndex()
+        index.build({})
+        self.assertFalse(index.ready)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import shutil
+import tempfile
+import unittest
+import cv2
+import numpy as np
+from src.recording import SessionReader
+from src.synthetic import (textured_map, default_sprite, walk_positions, render_frame, generate_sequence,
+                           write_sequence, load_ground_truth)
+
+class TestSynthetic(unittest.TestCase):
+    def setUp(self):
+        self.map_bgr = cv2.cvtColor(textured_map(0, (60, 120)), cv2.COLOR_GRAY2BGR)
+
+    def test_render_places_sprite_at_mapped_position(self):
+        frame, H = render_frame(self.map_bgr, default_sprite(), (50.0, 30.0), scale=0.8, offset=(15, 10))
+        x, y = (H @ np.array([50.0, 30.0, 1.0]))[:2]
+        # 스프라이트 중심은 빨간색, 테두리는 노란색
+        self.assertEqual(tuple(frame[int(round(y)), int(round(x))]), (0, 0, 255))
+        # 여백은 검은색, 맵 원점은 offset 위치
+        self.assertEqual(tuple(frame[0, 0]), (0, 0, 0))
+        np.testing.assert_array_equal(frame[10, 15], self.map_bgr[0, 0])
+
+    def test_walk_stays_inside_margin(self):
+        rng = np.random.default_rng(1)
+        positions = walk_positions(120, 60, 500, rng, speed=300, margin=6, jump_prob=0.05)
+        self.assertEqual(positions.shape, (500, 2))
+        self.assertTrue(np.all(positions >= 6) and np.all(positions[:, 0] <= 114) and np.all(positions[:, 1] <= 54))
+
+    def test_sequence_round_trip(self):
+        frames, truth = generate_sequence(self.map_bgr, default_sprite(), count=5, fps=10, seed=3)
+        self.assertEqual([t['timestamp'] for t in truth], [0.0, 0.1, 0.2, 0.3, 0.4])
+        path = tempfile.mkdtemp()
+        try:
+            write_sequence(path, frames, truth, map_size=(120, 60))
+            reader = SessionReader(path)
+            self.assertEqual(reader.count('region'), 5)
+            timestamp, frame, _ = reader.frame('region', 2)
+            self.assertAlmostEqual(timestamp, 0.2)
+            np.testing.assert_array_equal(cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR), frames[2])
+            ground_truth = load_ground_truth(path)
+            self.assertEqual(ground_truth['map_size'], [120, 60])
+            self.assertEqual(ground_truth['frames'], truth)
+        finally:
+            shutil.rmtree(path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import cv2
+import numpy as np
+from src.template_match import TemplateMatcher
+
+class TestTemplateMatcher(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        noise = rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+        self.screen = cv2.GaussianBlur(noise, (7, 7), 0)
+
+    def test_coarse_to_fine_finds_exact_location(self):
+        template = self.screen[300:360, 500:620].copy()
+        matcher = TemplateMatcher(template)
+        self.assertGreater(matcher.levels, 0)
+        val, loc = matcher.match(self.screen)
+        self.assertEqual(loc, (500, 300))
+        self.assertGreater(val, 0.99)
+
+    def test_color_refine_scores_like_full_color_match(self):
+        template = self.screen[300:360, 500:620].copy()
+        # 같은 무늬의 색만 바꾼 미끼: 그레이스케일 점수는 높지만 컬러 점수는 낮아야 함
+        decoy = template[:, :, ::-1]
+        screen = self.screen.copy()
+        screen[100:160, 900:1020] = decoy
+        matcher = TemplateMatcher(template, grayscale=False)
+        self.assertGreater(matcher.levels, 0)
+        val, loc = matcher.match(screen)
+        self.assertEqual(loc, (500, 300))
+        full = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+        self.assertAlmostEqual(val, float(full.max()), places=4)
+        self.assertLess(TemplateMatcher(template, grayscale=False).match(screen[100:160, 900:1020])[0],
+                        TemplateMatcher(template).match(screen[100:160, 900:1020])[0])
+
+    def test_bgra_input_and_find_center(self):
+        template = self.screen[100:160, 40:160].copy()
+        bgra = cv2.cvtColor(self.screen, cv2.COLOR_BGR2BGRA)
+        found = TemplateMatcher(template).find(bgra, 0.9)
+        self.assertEqual(found[:2], (40 + 60, 100 + 30))
+
+    def test_small_template_uses_full_resolution(self):
+        template = self.screen[50:60, 70:80].copy()
+        matcher = TemplateMatcher(template, grayscale=False)
+        self.assertEqual(matcher.levels, 0)
+        self.assertEqual(matcher.match(self.screen[:200, :200])[1], (70, 50))
+
+    def test_template_larger_than_image(self):
+        matcher = TemplateMatcher(self.screen[:100, :100].copy())
+        self.assertEqual(matcher.match(self.screen[:50, :50]), (0, None))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,245 @@
+"""
+TrackerEngine을 Qt 없이 이미지/녹화 영상에 실행하고 프레임별 결과와 처리 시간을 출력합니다.
+
+사용 예:
+    python tracker_cli.py --config config.json recorded_frames/
+    python tracker_cli.py --map 쇼와=maps/showa.png --character char.png frame_001.png frame_002.png
+    python tracker_cli.py --config config.json --region 7,138,428,123 session.mp4 --quiet
+    python tracker_cli.py --config config.json recordings/20260201-120000   # 세션 녹화 (감지 영역 스트림)
+    python tracker_cli.py --config config.json recordings/20260201-120000 --quiet --stats-csv stages.csv
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import cv2
+import numpy as np
+from src.blob_detector import hsv_range_from_config
+from src.engine import TrackerEngine
+from src.features import FEATURE_ENGINES
+from src.recording import INDEX_FILE, SessionReader
+from src.registration import REGISTRATION_MODELS
+from src.template_match import load_template
+
+IMAGE_EXTS = ('png', 'jpg', 'jpeg', 'bmp')
+
+
+def iter_frames(inputs, fps):
+    """
+    입력 경로들에서 (이름, BGR 프레임, 시각) 을 차례로 생성합니다.
+    세션 녹화 폴더(감지 영역 스트림, 녹화 시각), 이미지 파일, 이미지 폴더(이름순), 동영상 파일을 받으며
+    이미지의 시각은 순번 / fps 입니다.
+    """
+    index = 0
+    for path in inputs:
+        if os.path.isfile(os.path.join(path, INDEX_FILE)):
+            reader = SessionReader(path)
+            for i, (timestamp, frame, _) in enumerate(reader.frames('region')):
+                yield f"{os.path.basename(os.path.normpath(path))}#{i}", \
+                    cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR), timestamp
+            continue
+        if os.path.isdir(path):
+            paths = sorted(p for ext in IMAGE_EXTS for p in glob.glob(os.path.join(path, f"*.{ext}")))
+        elif path.lower().rsplit('.', 1)[-1] in IMAGE_EXTS:
+            paths = [path]
+        else:
+            cap = cv2.VideoCapture(path)
+            if not cap.isOpened():
+                raise SystemExit(f"Failed to open input: {path}")
+            try:
+                n = 0
+                while True:
+                    ok, frame = cap.read()
+                    if not ok:
+                        break
+                    yield f"{os.path.basename(path)}#{n}", frame, cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                    n += 1
+            finally:
+                cap.release()
+            continue
+
+        for p in paths:
+            frame = load_template(p)
+            if frame is None:
+                raise SystemExit(f"Failed to load image: {p}")
+            yield os.path.basename(p), frame, index / fps
+            index += 1
+
+
+def parse_map_arg(value):
+    """'이름=경로' 또는 '경로' (이름은 파일 이름)"""
+    if '=' in value:
+        name, path = value.split('=', 1)
+    else:
+        name, path = os.path.splitext(os.path.basename(value))[0], value
+    return name, path
+
+
+def parse_range(value):
+    """'LOW-HIGH' -> (low, high)"""
+    low, high = value.split('-', 1)
+    return int(low), int(high)
+
+
+def load_config(path):
+    if not path:
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def build_engine(args, config):
+    """
+    명령행 옵션과 config.json(GUI와 같은 파일)으로 엔진을 구성합니다.
+    config의 특징점 엔진/맵별 특징점 수/PCA/정합 모델/매칭 스레드/모션 모델/색 덩어리 설정을 쓰고,
+    명령행에서 직접 준 옵션이 있으면 그쪽이 우선합니다.
+    """
+    engine = TrackerEngine(on_status=(lambda msg: print(f"# {msg}", file=sys.stderr)) if args.verbose else None)
+    feature = config.get('feature_engine') if isinstance(config.get('feature_engine'), dict) else {}
+    detector = args.engine or feature.get('detector', 'sift')
+    # config의 매처는 같은 검출기일 때만 사용 (--engine으로 바꾸면 그 엔진의 기본 매처)
+    matcher = args.matcher or (feature.get('matcher') if feature.get('detector', 'sift') == detector else None)
+    engine.set_feature_engine(detector, matcher, args.nfeatures or feature.get('nfeatures', 3000))
+    engine.set_registration_model(args.registration or config.get('registration_model') or 'homography')
+    engine.descriptor_pca_dims = args.pca_dims if args.pca_dims is not None else config.get('descriptor_pca_dims')
+    engine.use_feature_cache = not args.no_cache
+    engine.frame_gate.enabled = not args.no_gate
+    engine.homography_lock = not args.no_lock
+    engine.replay = True  # 예측은 녹화 시각 + 처리 시간 기준
+    engine.set_match_workers(args.workers or config.get('match_workers') or min(4, os.cpu_count() or 1))
+    if isinstance(config.get('motion_model'), dict):
+        engine.motion_model = bool(config['motion_model'].get('enabled', engine.motion_model))
+        engine.prediction_lead = float(config['motion_model'].get('lead', engine.prediction_lead))
+    if isinstance(config.get('color_blob'), dict):
+        engine.set_color_blob(config['color_blob'].get('enabled', False),
+                              hsv_range_from_config(config['color_blob']))
+    # 명령행 색 덩어리 옵션이 config보다 우선
+    hsv_range = dict(engine.color_blob_hsv or {})
+    if args.blob_hue:
+        hsv_range['hue'] = [parse_range(v) for v in args.blob_hue]
+    if args.blob_sat:
+        hsv_range['saturation'] = parse_range(args.blob_sat)
+    if args.blob_val:
+        hsv_range['value'] = parse_range(args.blob_val)
+    engine.set_color_blob(engine.color_blob or args.color_blob, hsv_range or None)
+
+    # (이름, 경로, 맵별 특징점 수)
+    maps = [parse_map_arg(m) + (None,) for m in args.map]
+    if not maps:
+        maps = [(m['name'], m['path'], m.get('nfeatures')) for m in config.get('maps', [])]
+    character = args.character or config.get('char_path')
+    if not maps or not character:
+        raise SystemExit("Maps and a character image are required (--map/--character or --config)")
+
+    for slot, (name, path, nfeatures) in enumerate(maps):
+        if not engine.set_map_source(slot, name, path, nfeatures):
+            raise SystemExit(f"Failed to load map {name}: {path}")
+    engine.build_retrieval()
+    if not engine.set_template(character):
+        raise SystemExit(f"Failed to load character image: {character}")
+    return engine
+
+
+def crop_region(args, config):
+    """
+    (x, y, w, h, 항상 자를지). --region은 모든 프레임을 자르고, config의 search_region(화면 좌표)은
+    그보다 큰 프레임(전체 화면 스크린샷 등)만 자릅니다 (세션 녹화는 이미 감지 영역만 들어 있음).
+    """
+    if args.region:
+        x, y, w, h = (int(v) for v in args.region.split(','))
+        return x, y, w, h, True
+    r = config.get('search_region')
+    if r:
+        return int(r['x']), int(r['y']), int(r['w']), int(r['h']), False
+    return None
+
+
+def format_row(name, result):
+    timings = result.get('timings', {})
+    if 'error' in result:
+        status = 'error'
+    elif result.get('skipped'):
+        status = 'skipped'
+    elif result.get('slot') is None:
+        status = 'no_map'
+    elif result.get('relative') is None:
+        status = 'no_char'
+    else:
+        status = 'ok'
+    rel = result.get('relative') or ('', '')
+    pred = result.get('predicted') or ('', '')
+    conf = f"{result['conf']:.2f}" if 'conf' in result else ''
+    ms = [f"{timings[k]:.1f}" if k in timings else '' for k in ('map', 'character', 'total')]
+    return '\t'.join(str(v) for v in [name, status, result.get('name') or '', rel[0], rel[1], pred[0], pred[1],
+                                      result.get('tier', ''), conf] + ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the minimap tracker engine over images or recordings")
+    parser.add_argument('inputs', nargs='+', help="session recordings, image files, folders of images or video files")
+    parser.add_argument('--config', help="config.json (GUI settings) to take maps, character image and engine "
+                                          "settings from")
+    parser.add_argument('--map', action='append', default=[], help="map image as NAME=PATH or PATH (repeatable)")
+    parser.add_argument('--character', help="character marker image")
+    parser.add_argument('--region', help="crop x,y,w,h from each frame (default: config search_region "
+                                          "for frames larger than it)")
+    parser.add_argument('--fps', type=float, default=30.0, help="frame rate used to timestamp image inputs")
+    parser.add_argument('--engine', choices=sorted(FEATURE_ENGINES), help="feature engine (default: config or sift)")
+    parser.add_argument('--matcher', help="matcher for the engine (default: config or engine default)")
+    parser.add_argument('--nfeatures', type=int, help="features per map (default: config or 3000)")
+    parser.add_argument('--registration', choices=REGISTRATION_MODELS, help="default: config or homography")
+    parser.add_argument('--pca-dims', type=int, help="project map descriptors to this many dimensions")
+    parser.add_argument('--workers', type=int, help="matching threads (default: config or up to 4)")
+    parser.add_argument('--no-gate', action='store_true', help="process every frame even if unchanged")
+    parser.add_argument('--no-lock', action='store_true', help="disable the homography lock")
+    parser.add_argument('--no-cache', action='store_true', help="do not read or write the feature cache")
+    parser.add_argument('--color-blob', action='store_true', help="find the character by its marker colour first")
+    parser.add_argument('--blob-hue', action='append', help="marker hue range LOW-HIGH (0-179, repeatable)")
+    parser.add_argument('--blob-sat', help="marker saturation range LOW-HIGH (default: from the character image)")
+    parser.add_argument('--blob-val', help="marker value range LOW-HIGH (default: from the character image)")
+    parser.add_argument('--quiet', action='store_true', help="print only the summary")
+    parser.add_argument('--verbose', action='store_true', help="print engine status messages to stderr")
+    parser.add_argument('--stats-csv', help="write per-stage timing statistics to this CSV file")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    engine = build_engine(args, config)
+    region = crop_region(args, config)
+
+    totals, counts = [], {}
+    if not args.quiet:
+        print('\t'.join(['frame', 'status', 'map', 'x', 'y', 'pred_x', 'pred_y', 'tier', 'conf',
+                         'map_ms', 'char_ms', 'total_ms']))
+    try:
+        for name, frame, timestamp in iter_frames(args.inputs, args.fps):
+            if region is not None:
+                x, y, w, h, always = region
+                if always or (frame.shape[0] >= y + h and frame.shape[1] >= x + w and frame.shape[:2] != (h, w)):
+                    frame = np.ascontiguousarray(frame[y:y + h, x:x + w])
+            # 녹화 시각을 캡처 시각으로 사용 (칼만 필터가 실제 프레임 간격으로 동작)
+            result = engine.process(frame, timestamp=timestamp)
+            row = format_row(name, result)
+            status = row.split('\t')[1]
+            counts[status] = counts.get(status, 0) + 1
+            totals.append(result['timings']['total'])
+            if not args.quiet:
+                print(row)
+    finally:
+        engine.close()
+
+    if not totals:
+        raise SystemExit("No frames processed")
+    tiers = engine.tier_counts
+    print(f"frames={len(totals)} " + ' '.join(f"{k}={v}" for k, v in sorted(counts.items())))
+    print(f"fps={1000.0 * len(totals) / sum(totals):.1f} p50={np.percentile(totals, 50):.1f}ms "
+          f"p99={np.percentile(totals, 99):.1f}ms "
+          f"tiers track/fast/full/miss={tiers['track']}/{tiers['fast']}/{tiers['full']}/{tiers['miss']}")
+    # 단계별 중앙값 (fps는 벽시계 기준이라 위의 처리 시간 기준 fps와 다를 수 있음)
+    print(engine.timer.summary())
+    if args.stats_csv:
+        engine.timer.write_csv(args.stats_csv)
+
+
+if __name__ == "__main__":
+    main()